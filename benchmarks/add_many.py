@@ -0,0 +1,57 @@
+'''
+    Compare how long it takes to add many children one at a time with add and configure
+    against adding them all at once with add_many
+
+    Run with ``python benchmarks/add_many.py [children]``
+'''
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from cwf.sections.section import Section
+
+########################
+###   BENCHMARK
+########################
+
+def make_root():
+    '''Root with a few options for the children to inherit'''
+    root = Section('')
+    return root.configure(kls='views.View', display=lambda request: True, needs_auth='can_view')
+
+def one_at_a_time(children):
+    '''Add each child and configure it'''
+    root = make_root()
+    for index in range(children):
+        root.add('s%s' % index).configure(target='show', alias='Section %s' % index)
+    return root
+
+def all_at_once(children, defer=False):
+    '''Add every child with add_many'''
+    root = make_root()
+    rows = ['s%s' % index for index in range(children)]
+    root.add_many(rows, target='show', alias=lambda url: 'Section %s' % url[1:], defer=defer)
+    return root
+
+def measure(build, children, **kwargs):
+    '''Return seconds it takes to build the tree'''
+    started = time.perf_counter()
+    build(children, **kwargs)
+    return time.perf_counter() - started
+
+if __name__ == '__main__':
+    children = 10000
+    if len(sys.argv) > 1:
+        children = int(sys.argv[1])
+
+    for name, build, kwargs in (
+          ('add', one_at_a_time, {})
+        , ('add_many', all_at_once, {})
+        , ('deferred', all_at_once, dict(defer=True))
+        ):
+        print("%-10s %8.3fs for %s children" % (name, measure(build, children, **kwargs), children))
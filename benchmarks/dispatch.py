@@ -0,0 +1,83 @@
+'''
+    Compare cold and warm dispatch over thousands of distinct view locations
+
+    Run with ``python benchmarks/dispatch.py [modules] [classes per module]``
+'''
+from __future__ import print_function
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from cwf.sections.dispatch import Dispatcher
+
+########################
+###   SETUP
+########################
+
+def make_views(directory, modules, classes):
+    '''
+        Make a package of views in directory and return the locations of every kls
+        Half of the kls are nested inside a holder class
+    '''
+    package = os.path.join(directory, 'bench_views')
+    os.makedirs(package)
+    open(os.path.join(package, '__init__.py'), 'w').close()
+
+    locations = []
+    for module_index in range(modules):
+        lines = []
+        for kls_index in range(classes):
+            name = 'View%s' % kls_index
+            if kls_index % 2:
+                lines.append("class Holder%s(object):\n    class %s(object):\n        def __call__(self, request, target):\n            return target\n" % (kls_index, name))
+                locations.append('bench_views.views%s.Holder%s.%s' % (module_index, kls_index, name))
+            else:
+                lines.append("class %s(object):\n    def __call__(self, request, target):\n        return target\n" % name)
+                locations.append('bench_views.views%s.%s' % (module_index, name))
+
+        with open(os.path.join(package, 'views%s.py' % module_index), 'w') as fle:
+            fle.write('\n'.join(lines))
+
+    return locations
+
+def timed(name, dispatcher, locations):
+    '''Dispatch to every location once and print how long it took'''
+    start = time.perf_counter()
+    for location in locations:
+        dispatcher(None, location, 'index')
+    taken = time.perf_counter() - start
+    print("%-40s %8.3fs  %8.2fus per dispatch" % (name, taken, taken / len(locations) * 1e6))
+
+########################
+###   MAIN
+########################
+
+def main(modules=50, classes=60):
+    directory = tempfile.mkdtemp()
+    try:
+        locations = make_views(directory, modules, classes)
+        sys.path.insert(0, directory)
+        print("Dispatching to %s locations in %s modules" % (len(locations), modules))
+
+        dispatcher = Dispatcher()
+        timed("cold (importing modules)", dispatcher, locations)
+        timed("warm", dispatcher, locations)
+
+        timed("cold (modules already imported)", Dispatcher(), locations)
+
+        dispatcher = Dispatcher()
+        for location in locations:
+            dispatcher.resolved[location] = dispatcher.split_location(location)
+        timed("cold (module and attrs already found)", dispatcher, locations)
+    finally:
+        sys.path.remove(directory)
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
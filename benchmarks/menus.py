@@ -0,0 +1,224 @@
+'''
+    Compare how long it takes to find the selected sections and to work out the global
+    and side nav for a big tree, along with how many allocations each request keeps,
+    against how it used to be done:
+
+        * Lowercasing urls for every comparison instead of using segment keys
+        * Checking every section in each level instead of walking the selected chain
+        * Giving every Info a copy of the path and closures for everything it works out
+
+    Garbage collection is turned off while measuring, like timeit does.
+
+    Run with ``python benchmarks/menus.py [children] [requests]``
+'''
+from __future__ import print_function
+
+import tracemalloc
+import os
+import gc
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from cwf.sections.section_master import SectionMaster, Info
+from cwf.sections.section import Section
+from cwf.views.menu import Menu
+
+########################
+###   CLOSURES
+########################
+
+class ClosureInfo(Info):
+    '''Info that is given closures for everything it works out'''
+    has_children = None
+
+    def __init__(self, url, alias, section, parent):
+        self.url = url
+        self.alias = alias
+        self.parent = parent or section.parent
+        self.section = section
+        self.options = section.options
+
+    def setup(self, admin, appear, display, selected, url_parts):
+        self.admin = admin
+        self.appear = appear
+        self.display = display
+        self.selected = selected
+        self.url_parts = url_parts
+
+    def setup_children(self, children, has_children):
+        self.children = children
+        self.has_children = has_children
+
+class ClosureSectionMaster(SectionMaster):
+    '''SectionMaster that lowercases urls for every comparison and makes closures for each Info'''
+    def selected_value(self, section, path):
+        url = section.url
+        if not path and url == '':
+            return True, []
+
+        parent_selected = True
+        if section.parent:
+            parent_selected, path = self.memoized.selected(section.parent, path=path)
+
+        if parent_selected and not path and url == '':
+            return True, []
+
+        if not parent_selected or not path:
+            return False, []
+
+        if path[0] == '' and str(url) in ('', '/'):
+            return True, path[1:]
+        elif path[0].lower() == str(url).lower():
+            return True, path[1:]
+        elif section.options.promote_children:
+            return True, path
+        else:
+            return False, []
+
+    def get_info(self, section, include_as, path, parent=None):
+        for url, alias in self.iter_section(section, include_as, path):
+            info = ClosureInfo(url, alias, section, parent)
+            path_copy = list(path)
+
+            admin = lambda info=info: self.memoized.admin(info)
+            appear = lambda info=info: self.memoized.exists(info) and self.memoized.active(info)
+            display = lambda info=info: self.memoized.display(info)[0]
+            selected = lambda info=info: self.memoized.selected(info, path=path_copy)
+            url_parts = lambda info=info: self.memoized.url_parts(info)
+
+            info.setup(admin, appear, display, selected, url_parts)
+            yield info
+
+class ClosureMenu(Menu):
+    '''Menu that uses the ClosureSectionMaster and gives each Info a closure for it's children'''
+    def __init__(self, *args, **kwargs):
+        super(ClosureMenu, self).__init__(*args, **kwargs)
+        self.master = ClosureSectionMaster(self.request)
+
+    def children_function_for(self, section, parent):
+        return lambda : self.navs_for(section.menu_children, parent=parent)
+
+    def navs_for(self, items, parent=None):
+        items = list(items)
+        self.master.conditionals.prime(item.section for item in items)
+
+        for item in items:
+            child = item.section
+            for info in self.master.get_info(child, item.include_as, self.path, parent=parent):
+                info.setup_children(self.children_function_for(child, info), child.has_children)
+                yield info
+
+########################
+###   BENCHMARK
+########################
+
+class Request(object):
+    def __init__(self, path):
+        self.META = {'PATH_INFO': path}
+
+def build(children):
+    '''Tree with a few top navs that each have many children, which each have a few children'''
+    root = Section('').configure(promote_children=True)
+    for top in range(5):
+        section = root.add('top%s' % top)
+        for index in range(children):
+            child = section.add('Child%s' % index)
+            for grandchild in range(3):
+                child.add('leaf%s' % grandchild)
+    return root
+
+def walk(infos):
+    '''Go through the menu like the template does, into the children of selected infos'''
+    count = 0
+    for info in infos:
+        count += 1
+        if info.selected()[0]:
+            count += walk(info.children())
+    return count
+
+def paths(requests, children):
+    '''Yield a path for each request'''
+    for number in range(requests):
+        yield '/top%s/child%s/leaf1/' % (number % 5, (number * 7) % children)
+
+def levels_selected(master, root, path):
+    '''Selected sections found by checking every section in each level of the menu'''
+    selected = []
+    level = [root]
+    while level:
+        sections = [item.section for parent in level for item in parent.menu_children]
+        level = [section for section in sections if master.memoized.selected(section, path=path)[0]]
+        selected.extend(level)
+    return selected
+
+def chain_selected(master, root, path):
+    '''Selected sections found by walking the selected chain'''
+    return master.selected_chain(root, path)
+
+def timed(func):
+    '''Return seconds it takes to call func with garbage collection turned off'''
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
+    finally:
+        gc.enable()
+
+def measure_selected(master_kls, find, root, requests, children):
+    '''Return seconds to find the selected sections for this many requests'''
+    def run():
+        for path in paths(requests, children):
+            find(master_kls(Request(path)), root, [part for part in path.split('/') if part])
+    return timed(run)
+
+def measure_menus(menu_kls, root, requests, children):
+    '''Return seconds to work out the global and side nav for this many requests'''
+    def run():
+        for path in paths(requests, children):
+            menu = menu_kls(Request(path), root)
+            walk(menu.global_nav())
+            walk(menu.side_nav())
+    return timed(run)
+
+def measure_allocations(menu_kls, root, children):
+    '''Return (blocks, bytes) still allocated after working out the menus for one request'''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        menu = menu_kls(Request(next(paths(1, children))), root)
+        walk(menu.global_nav())
+        walk(menu.side_nav())
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    return sum(stat.count_diff for stat in stats), sum(stat.size_diff for stat in stats)
+
+if __name__ == '__main__':
+    children = 500
+    if len(sys.argv) > 1:
+        children = int(sys.argv[1])
+
+    requests = 50
+    if len(sys.argv) > 2:
+        requests = int(sys.argv[2])
+
+    root = build(children)
+    for name, master_kls, find in (
+          ('levels', ClosureSectionMaster, levels_selected)
+        , ('chain', SectionMaster, chain_selected)
+        ):
+        print("selected %-12s %8.3fs for %s requests" % (name, measure_selected(master_kls, find, root, requests, children), requests))
+
+    for menu_kls in (ClosureMenu, Menu):
+        print("menus    %-12s %8.3fs for %s requests" % (menu_kls.__name__, measure_menus(menu_kls, root, requests, children), requests))
+
+    for menu_kls in (ClosureMenu, Menu):
+        blocks, size = measure_allocations(menu_kls, root, children)
+        print("memory   %-12s %8s blocks %8.1f KB for one request" % (menu_kls.__name__, blocks, size / 1024.0))
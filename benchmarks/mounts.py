@@ -0,0 +1,106 @@
+'''
+    Compare memory used by a tree where the same subtree is copied under many sections
+    when copies are mounts that share the subtree against copying every section
+
+    Run with ``python benchmarks/mounts.py [products] [help sections]``
+'''
+from __future__ import print_function
+
+import tracemalloc
+import os
+import sys
+import gc
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from django.conf import settings
+settings.configure()
+
+import django
+django.setup()
+
+from cwf.sections.pattern_list import PatternList
+from cwf.sections.section import Section, Item
+
+########################
+###   COPYING
+########################
+
+def eager_copy(parent, section):
+    '''Copy every section under section, like copy used to'''
+    cloned = section.clone(parent=parent)
+    parent.add_child(cloned)
+    eager_merge(cloned, section)
+
+def eager_merge(target, section):
+    items = list(section._children)
+    if section._base:
+        items.insert(0, section._base)
+
+    for item in items:
+        cloned = item.section.clone(parent=target)
+        eager_merge(cloned, item.section)
+        cloned_item = Item(cloned, consider_for_menu=item.consider_for_menu, include_as=item.include_as)
+        if item is section._base:
+            target._base = cloned_item
+        else:
+            target._children.append(cloned_item)
+
+def mount_copy(parent, section):
+    '''Copy using Section.copy, which mounts the section'''
+    parent.copy(section)
+
+########################
+###   BENCHMARK
+########################
+
+def view(request):
+    pass
+
+def make_help(sections):
+    '''Make a help tree with about this many sections'''
+    root = Section('help').configure(target=view, alias="Help")
+    level = [root]
+    made = 1
+    while made < sections:
+        next_level = []
+        for parent in level:
+            for index in range(5):
+                if made >= sections:
+                    break
+                next_level.append(parent.add('topic%s' % index).configure(target=view))
+                made += 1
+        level = next_level
+    return root
+
+def build(copy, products, help_sections):
+    '''Make a tree with the help tree under every product and make it's patterns'''
+    help = make_help(help_sections)
+    root = Section('').configure(promote_children=True)
+    for index in range(products):
+        product = root.add('product%s' % index).configure(target=view)
+        copy(product, help)
+    return root
+
+def measure(copy, products, help_sections):
+    '''Return (bytes after building, bytes after making patterns, number of patterns)'''
+    gc.collect()
+    tracemalloc.start()
+    root = build(copy, products, help_sections)
+    built = tracemalloc.get_traced_memory()[0]
+    patterns = list(PatternList(root))
+    with_patterns = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, with_patterns, len(patterns)
+
+if __name__ == '__main__':
+    products, help_sections = 200, 50
+    if len(sys.argv) > 1:
+        products = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        help_sections = int(sys.argv[2])
+
+    for name, copy in (('copied', eager_copy), ('mounted', mount_copy)):
+        built, with_patterns, count = measure(copy, products, help_sections)
+        print("%-8s %8.1f KiB built %8.1f KiB with %s patterns" % (name, built / 1024.0, with_patterns / 1024.0, count))
@@ -0,0 +1,82 @@
+'''
+    Compare how long it takes to build a big section tree with copy on write options
+    against copying every option with the setters like clone used to
+
+    Run with ``python benchmarks/options.py [sections]``
+'''
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from cwf.sections.options import Options, getargspec
+from cwf.sections.section import Section
+
+########################
+###   EAGER OPTIONS
+########################
+
+class EagerOptions(Options):
+    '''Options that inspect the setters every time and copy every option when cloned'''
+    def setters(self):
+        for name in self.setter_names:
+            func = getattr(self, name)
+            yield func, [arg for arg in getargspec(func).args if arg != 'self']
+
+    def clone(self, all=False, **kwargs):
+        passon = []
+        for _, required in self.setters():
+            passon.extend(required)
+
+        no_propogate = () if all else Options.no_propogate
+        if not self.propogate_display:
+            no_propogate += ('display', )
+
+        values = dict((arg, getattr(self, arg)) for arg in passon if arg not in no_propogate)
+        values.update(kwargs)
+
+        cloned = EagerOptions()
+        cloned.set_everything(**values)
+        return cloned
+
+########################
+###   BENCHMARK
+########################
+
+def build(options_kls, sections):
+    '''Build a tree of about this many sections, ten children for each section'''
+    root = Section('')
+    root.options = options_kls()
+    root.configure(kls='views.View', display=lambda request: True, needs_auth='can_view')
+
+    level = [root]
+    made = 1
+    while made < sections:
+        next_level = []
+        for parent in level:
+            for index in range(10):
+                if made >= sections:
+                    break
+                child = parent.add('s%s' % index).configure(target='show', alias='Section %s' % made)
+                next_level.append(child)
+                made += 1
+        level = next_level
+    return root
+
+def measure(options_kls, sections):
+    '''Return seconds it takes to build the tree'''
+    started = time.perf_counter()
+    build(options_kls, sections)
+    return time.perf_counter() - started
+
+if __name__ == '__main__':
+    sections = 5000
+    if len(sys.argv) > 1:
+        sections = int(sys.argv[1])
+
+    for options_kls in (EagerOptions, Options):
+        print("%-12s %8.3fs for %s sections" % (options_kls.__name__, measure(options_kls, sections), sections))
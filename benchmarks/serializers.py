@@ -0,0 +1,77 @@
+'''
+    Compare time and peak memory of Renderer.json with each registered serializer
+    that is installed, with and without streaming the response
+
+    Run with ``python benchmarks/serializers.py [items]``
+'''
+from __future__ import print_function
+
+import tracemalloc
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from django.conf import settings
+settings.configure()
+
+import django
+django.setup()
+
+from cwf.views.serializers import serializers
+from cwf.views.rendering import Renderer
+
+########################
+###   BENCHMARK
+########################
+
+def payload(items):
+    '''Generator of rows like a large JSView would give back'''
+    for i in range(items):
+        yield {'id': i, 'name': 'item %s' % i, 'tags': ['a', 'b', 'c'], 'score': i * 1.5}
+
+def make_data(stream, items):
+    '''Data to give the renderer, a generator when streaming and a list otherwise'''
+    data = payload(items)
+    if not stream:
+        data = list(data)
+    return data
+
+def respond(name, stream, data):
+    '''Make the response and consume it like the server would'''
+    response = Renderer().json(data, serializer=name, stream=stream)
+    if stream:
+        for chunk in response:
+            pass
+    else:
+        response.content
+
+def measure(name, stream, items):
+    '''
+        Return (seconds, peak bytes) for one response
+        The list of data is made before measuring so only the serializing is counted
+    '''
+    data = make_data(stream, items)
+    tracemalloc.start()
+    started = time.perf_counter()
+    respond(name, stream, data)
+    took = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return took, peak
+
+if __name__ == '__main__':
+    items = 100000
+    if len(sys.argv) > 1:
+        items = int(sys.argv[1])
+
+    for name in sorted(serializers.registered):
+        if not serializers.available(name):
+            print("%-8s not installed" % name)
+            continue
+
+        for stream in (False, True):
+            took, peak = measure(name, stream, items)
+            print("%-8s stream=%-5s %8.3fs %10.1f KiB peak" % (name, stream, took, peak / 1024.0))
@@ -0,0 +1,55 @@
+'''
+    Compare memory allocated per request for the state made by View.get_state
+    when it is a DictObj against when it is a State
+
+    Run with ``python benchmarks/state.py [requests]``
+'''
+from __future__ import print_function
+
+import tracemalloc
+import os
+import sys
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from django.conf import settings
+settings.configure(INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes'])
+
+import django
+django.setup()
+
+from django.template import Context
+
+from cwf.views.base import DictObj, State
+
+########################
+###   BENCHMARK
+########################
+
+def make(kls):
+    '''Make state like View.get_state does and use it as a template context'''
+    state = kls(menu=None, path=['one', 'two'], target='one', section=None, base_url='')
+    Context(state)
+    return state
+
+def allocated(kls, requests):
+    '''Return bytes still allocated per state after making this many states'''
+    keep = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(requests):
+        keep.append(make(kls))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    return sum(stat.size_diff for stat in stats) / float(requests)
+
+if __name__ == '__main__':
+    requests = 10000
+    if len(sys.argv) > 1:
+        requests = int(sys.argv[1])
+
+    for kls in (DictObj, State):
+        print("%-8s %8.1f bytes per request" % (kls.__name__, allocated(kls, requests)))
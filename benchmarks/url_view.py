@@ -0,0 +1,77 @@
+'''
+    Compare per request overhead of views found through the dispatcher
+    against views bound to their target when patterns are made (the ``direct`` option)
+
+    Run with ``python benchmarks/url_view.py [requests]``
+'''
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..'))
+
+from django.conf import settings
+settings.configure(ALLOWED_HOSTS=['*'], INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes'])
+
+import django
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser
+from django.test.client import RequestFactory
+
+from cwf.sections.pattern_list import PatternList
+from cwf.sections.section import Section
+from cwf.views.base import View
+
+########################
+###   SETUP
+########################
+
+class BenchView(View):
+    def one(self, request, thing=None):
+        return None, thing
+
+def view_for(direct):
+    '''Return (view, kwargs) from the pattern for a section'''
+    root = Section('').configure(kls=BenchView(), promote_children=True, direct=direct)
+    section = root.add('one').add('(?P<thing>\w+)').configure(target='one')
+    return PatternList(section).url_view()
+
+def make_requests(count):
+    '''Make requests up front so making them isn't timed'''
+    factory = RequestFactory()
+    requests = []
+    for _ in range(count):
+        request = factory.get('/one/stuff/')
+        request.user = AnonymousUser()
+        requests.append(request)
+    return requests
+
+def timed(name, count, direct):
+    '''Call the view for a section with count requests and print how long it took per request'''
+    view, kwargs = view_for(direct)
+    requests = make_requests(count)
+
+    start = time.perf_counter()
+    for request in requests:
+        view(request, thing='stuff', **kwargs)
+    taken = time.perf_counter() - start
+
+    print("%-30s %8.3fs  %8.2fus per request" % (name, taken, taken / count * 1e6))
+    return taken
+
+########################
+###   MAIN
+########################
+
+def main(count=20000):
+    print("Calling views for %s requests" % count)
+    through_dispatcher = timed("through the dispatcher", count, direct=False)
+    bound = timed("direct", count, direct=True)
+    print("%-30s %8.2fus per request" % ("saved", (through_dispatcher - bound) / count * 1e6))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -12,6 +12,8 @@ from django.contrib import admin
 
 from cwf.views.admin_views import AdminView
 from cwf.views.rendering import renderer
+from cwf.sections.permissions import permissions_for
+from cwf.admin.buttons import button_permissions
 
 from functools import wraps
 
@@ -151,6 +153,12 @@ class ButtonAdminMixin(object):
                 return renderer.redirect(request, url, no_processing=True)
             return wrapped(request, obj, button)
 
+    def prefetch_button_permissions(self, request):
+        """Find all the permissions the user has in one go if any of the buttons need them"""
+        user = getattr(request, 'user', None)
+        if user is not None:
+            permissions_for(user).prefetch(button_permissions(self.buttons))
+
     def button_response_context(self, request, response):
         """Add the buttons to the response if there are any defined"""
         if hasattr(self, 'buttons') and self.buttons:
@@ -158,6 +166,9 @@ class ButtonAdminMixin(object):
             if not hasattr(response, 'context_data'):
                 response.context_data = {}
 
+            # Find the user's permissions once for all the buttons
+            self.prefetch_button_permissions(request)
+
             # Make copy of buttons for this request
             original = response.context_data.get('original')
             buttons = [btn.copy_for_request(request, original) for btn in self.buttons]
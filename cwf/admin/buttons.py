@@ -1,6 +1,8 @@
 from django.utils.encoding import force_unicode
 from django.utils.safestring import mark_safe
 
+from cwf.sections.permissions import permissions_for, auth_perms
+
 ########################
 ###   WRAP
 ########################
@@ -63,21 +65,24 @@ class ButtonWrap(object):
             Determine if user has specified authentication
             If auth is boolean, return whether.is_authenticated()
 
-            Otherwise determine if use.has_perm(auth)
+            Otherwise determine if user has the permission auth
             Where if auth is a list or tuple, all items in that are checked
+            The user's permissions are found once per request
         """
+        permissions = permissions_for(user)
         if type(auth) is bool:
-            return user.is_authenticated()
-
-        # Find all the permissions to look for and check against
-        def iter_auth():
-            """Helper to determine the auths to look for"""
-            if type(auth) in (list, tuple):
-                for perm in auth:
-                    yield perm
-            else:
-                yield auth
-        return all(user.has_perm(auth) for auth in iter_auth())
+            return permissions.authenticated
+        return permissions.has_all(auth_perms(auth))
+
+def button_permissions(buttons):
+    """Return frozenset of every permission in needs_auth for these buttons and any in groups"""
+    perms = set()
+    for button in buttons:
+        if getattr(button, 'group', False):
+            perms.update(button_permissions(button.buttons))
+        else:
+            perms.update(auth_perms(getattr(button, 'needs_auth', None)))
+    return frozenset(perms)
 
 ########################
 ###   SINGLE
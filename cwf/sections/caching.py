@@ -0,0 +1,88 @@
+'''
+    Small in process caches used by sections and menus
+'''
+from collections import OrderedDict
+import threading
+import time
+
+########################
+###   LRU
+########################
+
+class LRUCache(object):
+    """
+        Dictionary like cache that forgets the least recently used entries
+        once it has more than max_entries in it.
+
+        If ttl is given then entries are also forgotten ttl seconds after they were set.
+
+        hits and misses count how many times get found something or didn't.
+
+        It is safe to share between threads.
+    """
+    def __init__(self, max_entries=256, ttl=None, timer=time.monotonic):
+        self.ttl = ttl
+        self.timer = timer
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Get value for this key, making it the most recently used"""
+        with self.lock:
+            if not self.alive(key):
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][1]
+
+    def set(self, key, value):
+        """Remember value for this key and forget the oldest entries if we have too many"""
+        expires = None
+        if self.ttl is not None:
+            expires = self.timer() + self.ttl
+
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while self.max_entries is not None and len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def alive(self, key):
+        """Say whether we have an entry for this key that hasn't expired, forgetting it if it has"""
+        if key not in self.entries:
+            return False
+
+        expires = self.entries[key][0]
+        if expires is not None and expires <= self.timer():
+            del self.entries[key]
+            return False
+
+        return True
+
+    def delete(self, key):
+        """Forget this key"""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """Forget everything"""
+        with self.lock:
+            self.entries.clear()
+
+    @property
+    def stats(self):
+        """Dictionary of hits, misses and number of entries"""
+        return dict(hits=self.hits, misses=self.misses, entries=len(self.entries))
+
+    def __contains__(self, key):
+        with self.lock:
+            return self.alive(key)
+
+    def __len__(self):
+        return len(self.entries)
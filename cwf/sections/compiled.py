@@ -0,0 +1,128 @@
+from .section_master import url_parts_from, segment_key
+
+class CompiledTree(object):
+    """
+        Flat and immutable representation of a tree of sections
+
+        Created by Section.freeze and used to answer questions about the tree
+        without walking the live section graph on every request.
+
+        Each section in the tree is given an index and everything else is
+        kept in tuples indexed by that number:
+
+            sections
+                The sections themselves, depth first with parents before children
+
+            parents
+                Index of each section's parent or None if the parent isn't in the tree
+
+            children
+                Tuple of Items for each section, base first
+
+            menu_children
+                Tuple of Items for each section with consider_for_menu and
+                promote_children already taken into account
+
+            url_parts
+                The request independent url parts for each section
+
+            segment_keys
+                The lowercased url of each section for comparing with the path of a request
+    """
+    def __init__(self, root):
+        self.root = root
+        self.indexes = {}
+
+        sections = []
+        for section in self.walk(root):
+            self.indexes[section] = len(sections)
+            sections.append(section)
+        self.sections = tuple(sections)
+
+        self.parents = tuple(self.indexes.get(section.parent) for section in self.sections)
+        self.children = tuple(tuple(section.children) for section in self.sections)
+        self.has_children = tuple(bool(children) for children in self.children)
+
+        self._menu_children = {}
+        self.menu_children = tuple(self.determine_menu_children(index) for index in range(len(self.sections)))
+        del self._menu_children
+
+        url_parts = []
+        for section, parent in zip(self.sections, self.parents):
+            parent_parts = []
+            if parent is not None:
+                parent_parts = url_parts[parent]
+            url_parts.append(tuple(url_parts_from(parent_parts, section.url)))
+        self.url_parts = tuple(url_parts)
+        self.segment_keys = tuple(segment_key(section.url) for section in self.sections)
+
+    def walk(self, root):
+        """Yield each section in the tree once, parents before children"""
+        seen = set()
+        stack = [root]
+        while stack:
+            section = stack.pop()
+            if section in seen:
+                continue
+            seen.add(section)
+            yield section
+
+            for item in reversed(list(section.children)):
+                stack.append(item.section)
+
+    ########################
+    ###   MENU CHILDREN
+    ########################
+
+    def determine_menu_children(self, index):
+        """Determine menu children for the section at this index, expanding promoted children once"""
+        if index in self._menu_children:
+            return self._menu_children[index]
+
+        # Guard against a section promoting itself
+        self._menu_children[index] = ()
+
+        section = self.sections[index]
+        result = []
+
+        items = []
+        if section._base:
+            items.append(section._base)
+        items.extend(section._children)
+
+        for item in items:
+            if item.consider_for_menu:
+                result.extend(self.promoted(item))
+
+        self._menu_children[index] = tuple(result)
+        return self._menu_children[index]
+
+    def promoted(self, item):
+        """
+            Items to put in the menu in place of this item
+            Just the item unless the section promotes it's children
+        """
+        section = item.section
+        if not section.options.promote_children:
+            return (item, )
+        return self.determine_menu_children(self.indexes[section])
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def index_of(self, section):
+        """Return index of this section in the tree"""
+        return self.indexes[section]
+
+    def parent_of(self, section):
+        """Return the parent section as recorded in the tree"""
+        parent = self.parents[self.indexes[section]]
+        if parent is not None:
+            return self.sections[parent]
+
+    def __contains__(self, section):
+        return section in self.indexes
+
+    def __len__(self):
+        return len(self.sections)
@@ -0,0 +1,216 @@
+'''
+    Find the values for many sections at the same time
+
+    Used by Menu when it has a values_pool so each level of the menu takes as long
+    as it's slowest Values rather than all of them one after the other.
+'''
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from django.db import close_old_connections, connections
+
+import threading
+import asyncio
+import time
+
+########################
+###   POOL
+########################
+
+async def raised(error):
+    '''Coroutine that raises this error'''
+    raise error
+
+class ValuesPool(object):
+    """
+        Finds values for many sections concurrently
+
+        Values are found in a ThreadPoolExecutor of max_workers threads, which is made
+        the first time it's needed and shared by every request that uses this pool.
+        Values that are coroutine functions are awaited together in one event loop
+        in one of those threads.
+
+        Each Values is given values.timeout seconds, or the timeout of the pool if that is None.
+        When it times out or fails, values.fallback is used instead.
+        If it has no fallback then nothing is shown when it times out and failures are raised.
+
+        Threads that time out are left to finish in the background and stay busy until they do.
+        Work is never queued behind busy workers, values that can't get a free worker are
+        treated as if they timed out straight away.
+
+        Database connections opened by values are closed by the worker when it is done.
+    """
+    def __init__(self, max_workers=4, timeout=None):
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+        # Number of workers that have been given something to do and haven't finished it
+        self.busy = 0
+
+        self.lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        """ThreadPoolExecutor that finds the values"""
+        if self._executor is None:
+            with self.lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cwf-values")
+        return self._executor
+
+    def shutdown(self, wait=True):
+        """Stop the threads in this pool, a new executor is made if it's used again"""
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def submit(self, func, *args):
+        """
+            Start func(*args) on a free worker and return the future for it
+            Or None if every worker is busy, including workers still finishing values that timed out
+        """
+        with self.lock:
+            if self.busy >= self.max_workers:
+                return None
+            self.busy += 1
+
+        try:
+            return self.executor.submit(self.work, func, *args)
+        except:
+            with self.lock:
+                self.busy -= 1
+            raise
+
+    def work(self, func, *args):
+        """
+            Call func(*args) in a worker
+            Database connections are only closed at the end of a request in the request's thread,
+            so the worker closes any it opened itself
+        """
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+            with self.lock:
+                self.busy -= 1
+
+    def timeout_for(self, values):
+        """Seconds to wait for these values"""
+        if values.timeout is not None:
+            return values.timeout
+        return self.timeout
+
+    ########################
+    ###   EVALUATING
+    ########################
+
+    def evaluate(self, jobs):
+        """
+            Return list of [(url, alias), ...] for each (values, info) in jobs
+            Where info is (request, parent_url_parts, path)
+
+            All jobs are started before we wait for any of them.
+            Jobs that can't get a free worker use their fallback as if they timed out.
+        """
+        jobs = list(jobs)
+        started = time.monotonic()
+
+        coroutines = []
+        for index, (values, info) in enumerate(jobs):
+            if values.is_coroutine and not (values.cache is not None and values.cache.has(info)):
+                coroutines.append(index)
+
+        # The coroutines get a worker first, as they only need the one
+        awaited = None
+        if coroutines:
+            awaited = self.submit(self.awaits, [jobs[index] for index in coroutines])
+
+        futures = {}
+        for index, (values, info) in enumerate(jobs):
+            if index not in coroutines:
+                futures[index] = self.submit(self.collect, values, info)
+
+        results = [None] * len(jobs)
+        for index, future in futures.items():
+            values, info = jobs[index]
+            try:
+                if future is None:
+                    raise FutureTimeout("No free workers to find values with")
+                results[index] = future.result(timeout=self.remaining(values, started))
+            except FutureTimeout as error:
+                results[index] = self.fallback(values, info, error, timed_out=True)
+            except Exception as error:
+                results[index] = self.fallback(values, info, error)
+
+        if coroutines:
+            try:
+                if awaited is None:
+                    raise FutureTimeout("No free workers to await values with")
+                timeout = self.remaining_for_all([jobs[index] for index in coroutines], started)
+                found_all = awaited.result(timeout=timeout)
+            except FutureTimeout as error:
+                found_all = [asyncio.TimeoutError(str(error))] * len(coroutines)
+
+            for index, found in zip(coroutines, found_all):
+                values, info = jobs[index]
+                if isinstance(found, asyncio.TimeoutError):
+                    results[index] = self.fallback(values, info, found, timed_out=True)
+                elif isinstance(found, Exception):
+                    results[index] = self.fallback(values, info, found)
+                else:
+                    try:
+                        results[index] = list(values.get_info_from(found, *info))
+                    except Exception as error:
+                        results[index] = self.fallback(values, info, error)
+
+        return results
+
+    def remaining(self, values, started):
+        """Seconds left for these values when they were all started at the same time"""
+        timeout = self.timeout_for(values)
+        if timeout is None:
+            return None
+        return max(0, started + timeout - time.monotonic())
+
+    def remaining_for_all(self, jobs, started):
+        """Seconds left for the values that have the longest to go, or None if any of them can take forever"""
+        remaining = [self.remaining(values, started) for values, _ in jobs]
+        if None in remaining:
+            return None
+        return max(remaining)
+
+    def collect(self, values, info):
+        """Find all the (url, alias) for these values"""
+        return list(values.get_info(*info))
+
+    def awaits(self, jobs):
+        """Run the coroutines for these jobs in their own event loop"""
+        return asyncio.run(self.gather(jobs))
+
+    async def gather(self, jobs):
+        """Await all the coroutines for these jobs, giving back their results or errors"""
+        awaitables = []
+        for values, info in jobs:
+            try:
+                awaitable = values.values(info)
+            except Exception as error:
+                awaitable = raised(error)
+
+            timeout = self.timeout_for(values)
+            if timeout is not None:
+                awaitable = asyncio.wait_for(awaitable, timeout)
+            awaitables.append(awaitable)
+        return await asyncio.gather(*awaitables, return_exceptions=True)
+
+    def fallback(self, values, info, error, timed_out=False):
+        """Return the fallback for these values or complain if there isn't one"""
+        fallback = values.fallback
+        if fallback is None:
+            if timed_out:
+                return []
+            raise error
+
+        if callable(fallback):
+            fallback = fallback(info)
+        return list(fallback)
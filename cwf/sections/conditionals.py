@@ -0,0 +1,112 @@
+'''
+    Conditionals for sections are only decided once for each request
+'''
+from .errors import ConfigurationError
+
+########################
+###   BATCH
+########################
+
+class Batch(object):
+    """
+        A conditional that is decided for many sections with one call
+
+        Use it as any of the conditionals (admin, active, exists or display)::
+
+            section.configure(display=Batch(visible_sections))
+
+        Where func is called with (request, sections) and returns either the
+        sections the conditional is True for or a dictionary of {section : bool}.
+
+        Menus give it all the sections in a level at once, so for example one
+        query can decide what is displayed for that whole level.
+    """
+    def __init__(self, func):
+        if not callable(func):
+            raise ConfigurationError("Batch conditionals need a callable(request, sections), not %s" % func)
+        self.func = func
+
+    def evaluate(self, request, sections):
+        """Return {section : bool} for these sections"""
+        answer = self.func(request, list(sections))
+        if not isinstance(answer, dict):
+            answer = dict((section, True) for section in answer)
+        return dict((section, bool(answer.get(section, False))) for section in sections)
+
+########################
+###   PER REQUEST
+########################
+
+class Conditionals(object):
+    """
+        Results of conditionals for a single request
+
+        Shared by Section.reachable, Section.can_display, SectionMaster and Menu
+        so each conditional is only called once for each section in a request.
+        Get the one for a request with conditionals_for(request)
+    """
+    names = ('admin', 'active', 'exists', 'display')
+
+    def __init__(self, request):
+        self.request = request
+        self.results = {}
+        self.reachables = {}
+
+    def get(self, name, section):
+        """Get result of this conditional for this section"""
+        key = (name, section)
+        if key not in self.results:
+            if isinstance(getattr(section.options, name), Batch):
+                self.prime([section], names=(name, ))
+            else:
+                self.results[key] = section.options.conditional(name, self.request)
+        return self.results[key]
+
+    def prime(self, sections, names=None):
+        """
+            Decide batch conditionals for all these sections
+            With one call for each Batch used by them
+        """
+        if names is None:
+            names = self.names
+
+        sections = list(sections)
+        for name in names:
+            order = []
+            groups = {}
+            for section in sections:
+                if (name, section) in self.results:
+                    continue
+
+                val = getattr(section.options, name)
+                if isinstance(val, Batch):
+                    if val not in groups:
+                        order.append(val)
+                        groups[val] = []
+                    groups[val].append(section)
+
+            for batch in order:
+                for section, result in batch.evaluate(self.request, groups[batch]).items():
+                    self.results[(name, section)] = result
+
+    def reachable(self, section):
+        """Determine if this section and all it's parents can be reached"""
+        if section not in self.reachables:
+            parent = section.parent
+            if parent and not parent.reachable(self.request):
+                self.reachables[section] = False
+            else:
+                self.reachables[section] = section.options.reachable(self.request, section=section)
+        return self.reachables[section]
+
+def conditionals_for(request):
+    """Get the Conditionals for this request, making one if it doesn't have one yet"""
+    conditionals = getattr(request, 'cwf_conditionals', None)
+    if conditionals is None or conditionals.request is not request:
+        conditionals = Conditionals(request)
+        try:
+            request.cwf_conditionals = conditionals
+        except AttributeError:
+            # Can't remember it on this request
+            pass
+    return conditionals
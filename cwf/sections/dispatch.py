@@ -1,42 +1,98 @@
 '''
     Central dispatch logic for all dispatched views
 '''
+from .errors import ConfigurationError
+
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import threading
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    # Python 3
+    string_types = (str, )
+
 class Dispatcher(object):
     '''
         Object used to determine what function to call for a request
         Will find correct class and then use target view as the function to call
         Will also cache views
+
+        Nothing about a request is stored on the dispatcher, so one dispatcher
+        can be used by many threads at once. Each view is only made once.
     '''
     def __init__(self):
         self.views = {}
+        self.locks = {}
+        self.resolved = {}
+        self.lock = threading.Lock()
 
     @property
     def __name__(self):
         """
-            Non-threadsafe hack to make amonpy happy
+            Name for the dispatcher to make amonpy happy
             And to make the dispatcher object wrappable by the wraps decorator
         """
-        if hasattr(self, 'view') and hasattr(self, 'target'):
-            return "Dispatcher: %s:%s" % (self.view.__class__.__name__, self.target)
-        else:
-            return self.__class__.__name__
+        return self.__class__.__name__
 
     def get_view(self, location):
         '''Ensure view for given location is in self.views and then return that view'''
         if location not in self.views:
-            self.views[location] = self.find_view(location)
+            with self.lock_for(location):
+                if location not in self.views:
+                    self.views[location] = self.find_view(location)
         return self.views[location]
 
+    def lock_for(self, location):
+        '''Lock used to make sure the view for this location is only made once'''
+        with self.lock:
+            if location not in self.locks:
+                self.locks[location] = threading.Lock()
+            return self.locks[location]
+
     def find_view(self, location):
         '''Find the kls for the given location and return an instance of this kls'''
-        if type(location) not in (unicode, str):
+        if type(location) not in string_types:
             # Already a class
             return location
         else:
-            obj = location.split('.')
-            path, name = obj[:-1], obj[-1]
-            pkg = __import__('.'.join(path), globals(), locals(), [name], -1)
-            return getattr(pkg, name)()
+            return self.resolve(location)()
+
+    def resolve(self, location):
+        '''
+            Find the object at this location, i.e. "path.to.module.kls"
+
+            The longest part of the location that can be imported is the module
+            and the rest is found with getattr one part at a time, so "module.Kls.Nested" works.
+            Which part is the module is remembered for each location.
+        '''
+        if location not in self.resolved:
+            self.resolved[location] = self.split_location(location)
+
+        module_name, attrs = self.resolved[location]
+        result = importlib.import_module(module_name)
+        for attr in attrs:
+            result = getattr(result, attr)
+        return result
+
+    def split_location(self, location):
+        '''Return (module name, (attr, ...)) for this location'''
+        parts = location.split('.')
+        for index in range(len(parts) - 1, 0, -1):
+            module_name = '.'.join(parts[:index])
+            try:
+                importlib.import_module(module_name)
+            except ImportError as error:
+                # Only try a shorter module if it was this module that couldn't be found
+                # Rather than something it imports
+                missing = getattr(error, 'name', None)
+                if missing is None or (module_name + '.').startswith(missing + '.'):
+                    continue
+                raise
+            return module_name, tuple(parts[index:])
+
+        raise ImportError("Couldn't find a module for %s" % location)
 
     def __call__(self, request, kls, target, *args, **kwargs):
         '''
@@ -44,8 +100,67 @@ class Dispatcher(object):
             It is assumed this is created by Section.patterns in which case Http404 is already raised if section is unreachable
         '''
         view = self.get_view(kls)
-        self.view = view
-        self.target = target
         return view(request, target, *args, **kwargs)
 
+    ########################
+    ###   WARMING
+    ########################
+
+    def locations(self, sections):
+        '''
+            Return list of every kls used with the dispatcher by these sections and everything under them
+            sections may be a single section or a list of sections
+        '''
+        if not isinstance(sections, (list, tuple)):
+            sections = [sections]
+
+        found = []
+        seen = set()
+        for root in sections:
+            for section in [root] + list(root.descendants()):
+                if section in seen:
+                    continue
+                seen.add(section)
+
+                # Same as Options.url_view, only targets that aren't callable use the dispatcher
+                options = section.options
+                if options.redirect or not options.target or callable(options.target):
+                    continue
+
+                kls = options.get_view_kls()
+                if kls is not None and kls not in found:
+                    found.append(kls)
+        return found
+
+    def warm(self, sections, parallel=False, max_workers=None, complain=True):
+        '''
+            Find and make the view for every kls used by these sections
+            So the first requests don't have to
+
+            If parallel is True then views are found in a pool of max_workers threads.
+
+            Returns dictionary of {kls : error} for any that couldn't be found.
+            If complain is True then a ConfigurationError listing them is raised instead.
+        '''
+        locations = self.locations(sections)
+
+        def warm_one(location):
+            try:
+                self.get_view(location)
+            except Exception as error:
+                return location, error
+
+        if parallel:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(warm_one, locations))
+        else:
+            results = [warm_one(location) for location in locations]
+
+        failures = dict(result for result in results if result)
+        if failures and complain:
+            raise ConfigurationError("Couldn't find views for %s" % ', '.join(
+                "%s (%s: %s)" % (location, error.__class__.__name__, error) for location, error in failures.items()
+            ))
+        return failures
+
 dispatcher = Dispatcher()
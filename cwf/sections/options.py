@@ -1,9 +1,17 @@
+from .conditionals import Batch, conditionals_for
+from .permissions import permissions_for, auth_perms
 from .errors import ConfigurationError
-from .dispatch import dispatcher
+from .dispatch import dispatcher, string_types
 
 import inspect
 import re
 
+try:
+    from inspect import getfullargspec as getargspec
+except ImportError:
+    # Python 2
+    from inspect import getargspec
+
 ########################
 ###   EXTRAS
 ########################
@@ -15,69 +23,200 @@ regexes = {
 
 class Empty(object): pass
 
+class Deferred(object):
+    """
+        Value for an option that is only worked out the first time it is used
+        Calling it gives back func(*args)
+    """
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __call__(self):
+        return self.func(*self.args)
+
+def resolved(own, name):
+    """Get this option from a dictionary of set options, working it out if it was Deferred"""
+    value = own[name]
+    if isinstance(value, Deferred):
+        value = value()
+        own[name] = value
+    return value
+
 ########################
 ###   OPTIONS
 ########################
 
 class Options(object):
-    def __init__(self):
-        # Some flags to determine what to show
-        # These may be callables that accept (request)
-        # admin: Flag to hardcode that this is only visible due to admin privelege
-        # active: Overrides exists and display to disable viewing and visiting
-        # exists: Overrides display to disable viewing and visiting
-        # display: Says whether this should be displayed
-        #     active, exists and display affect children as well
-        self.admin = False
-        self.active = True
-        self.exists = True
-        self.display = True
-
-        # Flag for the pattern generation
-        self.catch_all = False
-
-        # Some settings for determining view
-        # kls: The view class. Can be the kls itself or a string name of the kls
-        # module: Where to find the kls if the kls is specified as a string. (can be object or location)
-        # target: The function on the kls to invoke
-        # redirect will override kls, module and target
-        # extra_context: Extra request context to give the view
-        self.kls = None
-        self.module = None
-        self.target = None
-        self.redirect = None
-        self.extra_context = None
-
-        # Some options for having a section as a django include
-        self.app_name = None
-        self.namespace = None
-
-        # Determine what to show in the menu
-        # alias: what appears in the menu
-        # match: Determine if this part of the url should be given to the view as a keyword argument
-        #   The value given will be the name this part of the url is given as
-        # values: Values object determining possible values as child elements in the menu
-        # needs_auth: Either string, list of strings or boolean
-        #   If boolean: Says whether request.user.is_authenticated() must be true for display and visiting
-        #   If string or list of strings: The permissions request.user must have for display and visiting
-        # promote_children: Says whether children should be displayed at this level instead of displaying this
-        self.alias = None
-        self.match = None
-        self.values = None
-        self.needs_auth = False
-        self.promote_children = False
-        self.propogate_display = True
+    """
+        Options for a section
+
+        Every option is a slot. Values are only stored when they are set and
+        anything that isn't set is inherited from the options this was cloned from
+        or is the default. Inherited values are put in the slot the first time they are used.
+
+        clone shares the values that are set with the clone rather than copying them,
+        and they are copied the first time either of them is changed afterwards.
+    """
+    # Some flags to determine what to show
+    # These may be callables that accept (request)
+    # admin: Flag to hardcode that this is only visible due to admin privelege
+    # active: Overrides exists and display to disable viewing and visiting
+    # exists: Overrides display to disable viewing and visiting
+    # display: Says whether this should be displayed
+    #     active, exists and display affect children as well
+
+    # Flags for the pattern generation
+    # catch_all: Pattern matches anything after the url of this section
+    # direct: Find the view and bind it to the target when patterns are made instead of every request
+
+    # Some settings for determining view
+    # kls: The view class. Can be the kls itself or a string name of the kls
+    # module: Where to find the kls if the kls is specified as a string. (can be object or location)
+    # target: The function on the kls to invoke
+    # redirect will override kls, module and target
+    # extra_context: Extra request context to give the view
+
+    # Some options for having a section as a django include
+    # app_name and namespace
+
+    # Determine what to show in the menu
+    # alias: what appears in the menu
+    # match: Determine if this part of the url should be given to the view as a keyword argument
+    #   The value given will be the name this part of the url is given as
+    # values: Values object determining possible values as child elements in the menu
+    # needs_auth: Either string, list of strings or boolean
+    #   If boolean: Says whether request.user.is_authenticated() must be true for display and visiting
+    #   If string or list of strings: The permissions request.user must have for display and visiting
+    # promote_children: Says whether children should be displayed at this level instead of displaying this
+    defaults = (
+          ('admin', False), ('active', True), ('exists', True), ('display', True)
+        , ('catch_all', False), ('direct', False)
+        , ('kls', None), ('module', None), ('target', None), ('redirect', None), ('extra_context', None)
+        , ('app_name', None), ('namespace', None)
+        , ('alias', None), ('match', None), ('values', None), ('needs_auth', False)
+        , ('promote_children', False), ('propogate_display', True)
+        )
+    fields = tuple(name for name, _ in defaults)
+    default_values = dict(defaults)
+
+    # Options that aren't given to a clone unless all=True
+    no_propogate = ('alias', 'match', 'values', 'target', 'redirect', 'promote_children', 'propogate_display')
+    nothing_hidden = frozenset()
+
+    # _own: Options that were set on this object
+    # _shared: Whether _own is also used by a clone
+    # _base: Where to find options that aren't set, (hidden, own, next _base) or None
+    # _patterns: Patterns already made by create_pattern
+    __slots__ = fields + ('_own', '_shared', '_base', '_patterns')
+
+    setter_names = ('set_conditionals', 'set_view', 'set_urlname', 'set_menu', 'set_urlpattern')
+
+    # Required args for the setters, for each class
+    _signatures = {}
+
+    def __init__(self, base=None, own=None):
+        # Our own bookkeeping doesn't need to go through __setattr__
+        setter = object.__setattr__
+        setter(self, '_base', base)
+        setter(self, '_own', {} if own is None else own)
+        setter(self, '_shared', False)
+        setter(self, '_patterns', {})
+
+    def __getstate__(self):
+        """
+            What copy and pickle need to make these options again
+            Which is the options that were set and where to find the rest
+        """
+        return {'own': dict(self._own), 'base': self._base}
+
+    def __setstate__(self, state):
+        """Make these options from what __getstate__ gave back"""
+        Options.__init__(self, base=state['base'], own=state['own'])
+
+    def __getattr__(self, name):
+        """Only called for options that haven't been set or used yet"""
+        if name not in Options.default_values:
+            raise AttributeError(name)
+
+        own = self._own
+        if name in own:
+            value = resolved(own, name)
+        else:
+            value = self.inherited(name)
+        object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        if name in Options.default_values:
+            if self._shared:
+                self._own = dict(self._own)
+                self._shared = False
+            self._own[name] = value
+        object.__setattr__(self, name, value)
+
+    def inherited(self, name):
+        """Find value for an option that isn't set on this object"""
+        base = self._base
+        while base is not None:
+            hidden, own, base = base
+            if name in hidden:
+                break
+            if name in own:
+                return resolved(own, name)
+        return Options.default_values[name]
+
+    def raw(self, name):
+        """Value for an option as it was set or inherited, without working it out if it was Deferred"""
+        own = self._own
+        if name in own:
+            return own[name]
+
+        base = self._base
+        while base is not None:
+            hidden, own, base = base
+            if name in hidden:
+                break
+            if name in own:
+                return own[name]
+        return Options.default_values[name]
+
+    def inherit(self, **values):
+        """
+            Return options that inherit everything set on these options, with values on top
+
+            Unlike clone, values don't go through the setters, so they must already be valid.
+            Values may be Deferred, in which case they are worked out the first time they are used.
+        """
+        unknown = [name for name in values if name not in Options.default_values]
+        if unknown:
+            raise ConfigurationError("Can't inherit unknown options (%s)" % ', '.join(sorted(unknown)))
+
+        self._shared = True
+        return Options(base=(Options.nothing_hidden, self._own, self._base), own=values)
 
     ########################
     ###   SETTERS
     ########################
 
+    @classmethod
+    def setter_signatures(kls):
+        """[(name, required), ...] for each setter method, only inspected once for each class"""
+        if kls not in Options._signatures:
+            signatures = []
+            for name in kls.setter_names:
+                func = getattr(kls, name)
+                required = tuple(arg for arg in getargspec(func).args if arg != 'self')
+                signatures.append((name, required))
+            Options._signatures[kls] = signatures
+        return Options._signatures[kls]
+
     def setters(self):
         '''Determine each setter method and required args for that method'''
-        for method in ('set_conditionals', 'set_view', 'set_urlname', 'set_menu', 'set_urlpattern'):
-            func = getattr(self, method)
-            required = list(arg for arg in inspect.getargspec(func).args if arg != 'self')
-            yield func, required
+        for name, required in self.setter_signatures():
+            yield getattr(self, name), list(required)
 
     def set_everything(self, **kwargs):
         '''
@@ -105,13 +244,17 @@ class Options(object):
     def set_conditionals(self, admin=Empty, active=Empty, exists=Empty, display=Empty):
         '''
             Set conditionals
-            These are either booleans or callable objects that take in one argument
+            These are either booleans, callable objects that take in one argument
+            or a Batch that decides the conditional for many sections at once
             ConfigurationError will be raised if this is not the case
         '''
         vals = (('admin', admin), ('active', active), ('exists', exists), ('display', display))
 
         for name, val in vals:
-            if val is not Empty:
+            if isinstance(val, Batch):
+                setattr(self, name, val)
+
+            elif val is not Empty:
                 if type(val) is not bool and not callable(val):
                     raise ConfigurationError(
                         "Conditionals must be boolean or callable(request), not %s (%s=%s)" % (type(val), name, val)
@@ -127,7 +270,7 @@ class Options(object):
                     if not inspect.isfunction(check) and not inspect.ismethod(check):
                         check = getattr(val, '__call__')
 
-                    args = inspect.getargspec(check).args
+                    args = getargspec(check).args
                     num_args = len(args)
                     if num_args != needed:
                         raise ConfigurationError(
@@ -146,7 +289,7 @@ class Options(object):
             if val is not Empty:
                 valid_extra_context = name == 'extra_context' and type(val) is dict
                 if name != 'extra_context' or not valid_extra_context:
-                    if val is not None and type(val) not in (str, unicode) and not callable(val):
+                    if val is not None and type(val) not in string_types and not callable(val):
                         raise ConfigurationError(
                             "%s must be either a string or a callble, not %s (%s)" % (
                                 name, type(val), val
@@ -180,12 +323,13 @@ class Options(object):
             if val is not Empty:
                 setattr(self, name, val)
 
-    def set_urlpattern(self, catch_all=Empty):
+    def set_urlpattern(self, catch_all=Empty, direct=Empty):
         """Set options for url pattern generation"""
-        vals = (('catch_all', catch_all), )
+        vals = (('catch_all', catch_all), ('direct', direct))
         for name, val in vals:
             if val is not Empty:
                 setattr(self, name, val)
+                self._patterns = {}
 
     ########################
     ###   URL PATTERN
@@ -200,7 +344,20 @@ class Options(object):
             otherwise
               * Prepend with ^
               * And end with /$ if doesn't already end with a slash
+
+            Patterns are remembered for each url_parts and catch_all
         '''
+        if type(url_parts) in (list, tuple):
+            key = (tuple(url_parts), self.catch_all)
+        else:
+            key = ((url_parts, ), self.catch_all)
+
+        if key not in self._patterns:
+            self._patterns[key] = self.make_pattern(url_parts)
+        return self._patterns[key]
+
+    def make_pattern(self, url_parts):
+        """Make the pattern that create_pattern returns"""
         pattern = self.string_from_url_parts(url_parts)
         if pattern is None:
             # No url_parts, give anything pattern
@@ -311,7 +468,7 @@ class Options(object):
             # No view to be determined
             return None
 
-        if self.kls is not None and type(self.kls) not in (str, unicode):
+        if self.kls is not None and type(self.kls) not in string_types:
             # kls is already an object
             return self.kls
 
@@ -320,7 +477,7 @@ class Options(object):
             # No module, return kls as a string
             return kls
 
-        if type(self.module) in (str, unicode):
+        if type(self.module) in string_types:
             # Module is a string, concatenate with kls
             module = self.clean_module_name(self.module)
             return "%s.%s" % (module, kls)
@@ -337,9 +494,12 @@ class Options(object):
     ###   HELPERS
     ########################
 
-    def reachable(self, request):
-        """Determine if options say this exists and has permissions for this request"""
-        if not self.conditional('exists', request) or not self.conditional('active', request):
+    def reachable(self, request, section=None):
+        """
+            Determine if options say this exists and has permissions for this request
+            Conditionals are remembered for the request if we know what section these options are for
+        """
+        if not self.conditional('exists', request, section=section) or not self.conditional('active', request, section=section):
             # Not active or doesn't exist
             return False
         return self.has_permissions(request.user)
@@ -347,63 +507,67 @@ class Options(object):
     def clone(self, all=False, **kwargs):
         """
             Return a copy of this object with new options.
-            It Determines current options, updates with new options
-            And returns a new Options object with these options
-        """
-        passon = []
-        for _, required in self.setters():
-            passon.extend(required)
 
-        if all:
-            no_propogate = ()
-        else:
-            no_propogate = (
-                  'alias', 'match', 'values', 'target', 'redirect'
-                , 'promote_children', 'propogate_display'
-                )
+            The copy inherits the options set on this object, except for those in
+            no_propogate unless all is True, and display if propogate_display is False.
+            Nothing is copied until either of them is changed.
+
+            Only the new options are checked by the setters.
+        """
+        hidden = ()
+        if not all:
+            hidden = Options.no_propogate
 
         # Make sure display doesn't propogate if propogate_display is False
         if not self.propogate_display:
-            no_propogate += ('display', )
-
-        values = dict((arg, getattr(self, arg)) for arg in passon if arg not in no_propogate)
-        values.update(kwargs)
+            hidden += ('display', )
 
+        self._shared = True
         cloned = Options()
-        cloned.set_everything(**values)
+        cloned._base = (frozenset(hidden), self._own, self._base)
+        if kwargs:
+            cloned.set_everything(**kwargs)
         return cloned
 
     ########################
     ###   UTILITY
     ########################
 
-    def conditional(self, name, request):
-        '''Return conditional. If conditional is callable, return result of calling with request'''
+    def conditional(self, name, request, section=None):
+        '''
+            Return conditional. If conditional is callable, return result of calling with request
+
+            If section is given then the result is remembered for the rest of the request
+            Batch conditionals can only be decided for a section
+        '''
+        if section is not None:
+            return conditionals_for(request).get(name, section)
+
         val = getattr(self, name)
+        if isinstance(val, Batch):
+            raise ConfigurationError("Batch conditional for '%s' can only be decided for a section" % name)
+
         if callable(val):
             return val(request)
         else:
             return val
 
     def has_permissions(self, user):
-        '''Determine if user has permissions given these options'''
+        '''
+            Determine if user has permissions given these options
+            Permissions are checked against all the user's permissions, found once per request
+        '''
         needs_auth = self.needs_auth
         if not needs_auth:
             return True
 
         # Determine if user is authenticated
-        authenticated = user.is_authenticated()
+        permissions = permissions_for(user)
+        authenticated = permissions.authenticated
         if type(needs_auth) is bool:
             return authenticated
         else:
-            def iterAuth():
-                if type(needs_auth) in (list, tuple):
-                    for auth in needs_auth:
-                        yield auth
-                else:
-                    yield needs_auth
-
-            return authenticated and all(user.has_perm(auth) for auth in iterAuth())
+            return authenticated and permissions.has_all(auth_perms(needs_auth))
 
     def clean_module_name(self, name):
         '''
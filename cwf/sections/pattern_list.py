@@ -1,3 +1,5 @@
+from .dispatch import Dispatcher
+
 try:
     from django.conf.urls.defaults import include as django_include
 except ImportError:
@@ -6,26 +8,65 @@ except ImportError:
 class PatternList(object):
     """
         Encapsulate logic in creating a pattern_list
+
+        Patterns are made in one depth first pass where each child is given the url
+        parts of it's parent rather than working them out again from the root.
+
+        The pattern tuples for each section are remembered on the section
+        until Section.changed says that part of the tree is different.
     """
-    def __init__(self, section, stop_at=None, include_as=None, without_include=False):
+    def __init__(self, section, stop_at=None, include_as=None, without_include=False, parent_url_parts=None):
         self.section = section
         self.include_as = include_as
         self.without_include = without_include
+        self.given_parent_url_parts = parent_url_parts
 
         if stop_at is None:
             stop_at = self.section
         self.stop_at = stop_at
 
     def __iter__(self):
-        return self.pattern_list()
+        return iter(self.pattern_list())
 
     def pattern_list(self):
-        """Return list of url patterns for this section and its children"""
+        """
+            Return list of url patterns for this section and its children
+            Using the list remembered on the section if there is one
+        """
+        cache = getattr(self.section, '_patterns', None)
+        if type(cache) is not dict:
+            return list(self.generate_pattern_list())
+
+        key = (self.stop_at, self.include_as, self.without_include)
+        if key not in cache:
+            cache[key] = list(self.generate_pattern_list())
+        return cache[key]
+
+    def generate_pattern_list(self):
+        """Yield url patterns for this section and its children"""
         for item in self.section.url_children:
-            pattern_list = PatternList(item.section, stop_at=self.stop_at, include_as=item.include_as)
+            pattern_list = self.pattern_list_for_item(item)
             for pattern_tuple in self.pattern_list_for(item, pattern_list):
                 yield pattern_tuple
 
+    def pattern_list_for_item(self, item):
+        """
+            Make a PatternList for this item
+            Give it the url parts of it's parent if we already know them
+        """
+        parent_url_parts = None
+        if item.section is self.section:
+            parent_url_parts = self.given_parent_url_parts
+        elif getattr(item.section, 'parent', None) is self.section:
+            parent_url_parts = self.chain_url_parts()
+
+        if parent_url_parts is None:
+            return PatternList(item.section, stop_at=self.stop_at, include_as=item.include_as)
+
+        return PatternList(item.section
+            , stop_at=self.stop_at, include_as=item.include_as, parent_url_parts=parent_url_parts
+            )
+
     def pattern_list_for(self, item, pattern_list):
         """
             Determine all pattern_tuples given an Item and associated PatternList object
@@ -72,13 +113,35 @@ class PatternList(object):
         return self.section.url_options.create_pattern(url_parts)
 
     def url_view(self):
-        """Return (view, kwargs) for this section"""
+        """
+            Return (view, kwargs) for this section
+            If the direct option is set then the view from the dispatcher is bound to it's target now
+        """
         view_info = self.section.url_options.url_view(self.section)
         if view_info:
             view, kwargs = view_info
+            if isinstance(view, Dispatcher) and self.section.url_options.direct and kwargs.get('kls') is not None:
+                view, kwargs = self.direct_view(view, kwargs)
             view = self.section.make_view(view, self.section)
             return view, kwargs
 
+    def direct_view(self, dispatcher, kwargs):
+        """
+            Return (view, kwargs) where view is already bound to the kls and target in kwargs
+            Uses view.bind(target) if the view has it
+        """
+        kwargs = dict(kwargs)
+        kls = kwargs.pop('kls')
+        target = kwargs.pop('target')
+
+        view = dispatcher.get_view(kls)
+        if hasattr(view, 'bind'):
+            return view.bind(target), kwargs
+
+        def bound(request, *args, **kwargs):
+            return view(request, target, *args, **kwargs)
+        return bound, kwargs
+
     def url_part(self):
         """Get url part for this section"""
         part = self.section.url
@@ -102,10 +165,27 @@ class PatternList(object):
             self._url_parts = url_parts
         return self._url_parts
 
+    def chain_url_parts(self):
+        """
+            Get url_parts for this section without include_as
+            This is what children use as their parent url parts
+        """
+        if self.include_as is None:
+            return self.determine_url_parts()
+
+        if not hasattr(self, '_chain_url_parts'):
+            chain = PatternList(self.section, stop_at=self.stop_at, parent_url_parts=self.given_parent_url_parts)
+            self._chain_url_parts = chain.determine_url_parts()
+        return self._chain_url_parts
+
     def parent_url_parts(self):
         """Get url_parts from parent"""
         parts = []
         if self.section.parent and not self.section is self.stop_at:
+            if self.given_parent_url_parts is not None:
+                # Already given to us by the parent
+                return list(self.given_parent_url_parts)
+
             # Get parent patterns
             parts = PatternList(self.section.parent, stop_at=self.stop_at).determine_url_parts()
         return parts
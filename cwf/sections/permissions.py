@@ -0,0 +1,110 @@
+'''
+    Find the permissions a user has in one go rather than with a has_perm for each check
+'''
+
+########################
+###   PERMISSIONS
+########################
+
+class Permissions(object):
+    """
+        Permissions for a user, used for needs_auth checks
+
+        If the user has get_all_permissions then all their permissions are found
+        with that once and kept in a frozenset that every check is served from.
+        Otherwise each check is given to user.has_perm.
+
+        Get the one for a user with permissions_for(user). As request.user is
+        made for each request, this means permissions are found once per request.
+    """
+    def __init__(self, user):
+        self.user = user
+
+    @property
+    def authenticated(self):
+        """Whether the user is authenticated"""
+        authenticated = self.user.is_authenticated
+        if callable(authenticated):
+            authenticated = authenticated()
+        return authenticated
+
+    @property
+    def prefetchable(self):
+        """Whether we can find all the permissions for this user at once"""
+        return callable(getattr(self.user, 'get_all_permissions', None))
+
+    @property
+    def granted(self):
+        """Frozenset of every permission the user has"""
+        if not hasattr(self, '_granted'):
+            self._granted = frozenset(self.user.get_all_permissions())
+        return self._granted
+
+    def prefetch(self, needed):
+        """
+            Find the user's permissions now if any of the needed permissions are going to be checked
+            Returns whether any were needed
+
+            Nothing is found for users that aren't authenticated as needs_auth doesn't check them
+        """
+        needed = frozenset(needed)
+        if needed and self.prefetchable and self.authenticated:
+            self.granted
+        return bool(needed)
+
+    def has(self, perm):
+        """Whether the user has this permission"""
+        if not self.prefetchable:
+            return self.user.has_perm(perm)
+
+        # Same as django, active superusers have every permission
+        if getattr(self.user, 'is_active', True) and getattr(self.user, 'is_superuser', False):
+            return True
+
+        return perm in self.granted
+
+    def has_all(self, perms):
+        """Whether the user has all these permissions"""
+        return all(self.has(perm) for perm in perms)
+
+def permissions_for(user):
+    """Get the Permissions for this user, making one if it doesn't have one yet"""
+    permissions = getattr(user, 'cwf_permissions', None)
+    if permissions is None or permissions.user is not user:
+        permissions = Permissions(user)
+        try:
+            user.cwf_permissions = permissions
+        except AttributeError:
+            # Can't remember it on this user
+            pass
+    return permissions
+
+########################
+###   COLLECTING
+########################
+
+def auth_perms(needs_auth):
+    """Yield the permission strings in a needs_auth option"""
+    if not needs_auth or type(needs_auth) is bool:
+        return
+
+    if type(needs_auth) in (list, tuple):
+        for perm in needs_auth:
+            yield perm
+    else:
+        yield needs_auth
+
+def section_permissions(root):
+    """Return frozenset of every permission in needs_auth for the sections in this tree"""
+    perms = set()
+    seen = set()
+    stack = [root]
+    while stack:
+        section = stack.pop()
+        if section in seen:
+            continue
+        seen.add(section)
+
+        perms.update(auth_perms(section.options.needs_auth))
+        stack.extend(item.section for item in section.children)
+    return frozenset(perms)
@@ -0,0 +1,258 @@
+'''
+    Resolve urls for a section by walking a trie of url segments
+    instead of trying every regex in urlpatterns one after the other
+'''
+from django.urls.resolvers import URLResolver, RegexPattern, ResolverMatch
+from django.urls.exceptions import Resolver404
+
+from .pattern_list import PatternList
+
+import re
+
+regexes = {
+      'multiSlash' : re.compile('/+')
+    , 'regex_characters' : re.compile(r'[.^$*+?{}\[\]\\|()]')
+    , 'unsafe_segment' : re.compile(r'[./|^$]|\[\^|\\[SWDB]|\(\?(?!P<|:)')
+    }
+
+########################
+###   TRIE
+########################
+
+class Entry(object):
+    """A single url pattern in the trie"""
+    def __init__(self, order, pattern, view, kwargs, name, app_names, namespaces):
+        self.name = name
+        self.view = view
+        self.order = order
+        self.pattern = pattern
+        self.app_names = list(app_names)
+        self.namespaces = list(namespaces)
+        self.kwargs = kwargs or {}
+        self.regex = re.compile(pattern)
+
+    def match(self, path):
+        """Match the whole path the same way django would"""
+        if self.pattern.endswith('$'):
+            return self.regex.fullmatch(path)
+        return self.regex.search(path)
+
+class Node(object):
+    """
+        A node in the trie
+
+        literals
+            Children for segments that must equal a particular string
+
+        matches
+            Children for segments that must match a regex
+
+        entries
+            Entries whose url ends at this node
+
+        tails
+            Entries that can't be split any further than this node
+            These are checked against the whole path whenever we reach this node
+    """
+    def __init__(self):
+        self.tails = []
+        self.entries = []
+        self.matches = {}
+        self.literals = {}
+
+    def literal(self, segment):
+        """Get or create the child for this literal segment"""
+        if segment not in self.literals:
+            self.literals[segment] = Node()
+        return self.literals[segment]
+
+    def match(self, part):
+        """Get or create the child for this regex segment"""
+        if part not in self.matches:
+            self.matches[part] = (re.compile(part), Node())
+        return self.matches[part][1]
+
+class SectionTrie(object):
+    """
+        A trie of url segments for all the patterns made from a section
+
+        Segments are tried as literals first, then as regexes, then any catch_all
+        patterns. Every candidate is checked against it's full regex and the one
+        that comes first in urlpatterns wins, so the result is always the same as
+        what django would find with the patterns from section.patterns()
+    """
+    def __init__(self, section):
+        self.count = 0
+        self.root = Node()
+        self.add_pattern_list(PatternList(section), (), (), ())
+
+    ########################
+    ###   BUILDING
+    ########################
+
+    def add_pattern_list(self, pattern_list, prefix, app_names, namespaces):
+        """
+            Add all the patterns from this PatternList
+            Follows PatternList.pattern_list_for except includes are flattened into the trie
+        """
+        for item in pattern_list.section.url_children:
+            child = pattern_list.pattern_list_for_item(item)
+
+            if item.include_as is not None and not pattern_list.without_include:
+                options = item.section.url_options
+                included = PatternList(item.section, without_include=True)
+                self.add_pattern_list(included
+                    , prefix + (item.include_as, )
+                    , app_names + (options.app_name, )
+                    , namespaces + (options.namespace, )
+                    )
+
+            elif item.section is pattern_list.section:
+                self.add_section(child, prefix, app_names, namespaces)
+
+            else:
+                self.add_pattern_list(child, prefix, app_names, namespaces)
+
+    def add_section(self, pattern_list, prefix, app_names, namespaces):
+        """Add the pattern for the section in this pattern_list if it has one"""
+        pattern_tuple = pattern_list.pattern_tuple()
+        if not pattern_tuple:
+            return
+
+        pattern, view, kwargs, name = pattern_tuple
+        if prefix:
+            pattern = "^%s%s" % (''.join("%s/" % part for part in prefix), pattern[1:])
+
+        entry = Entry(self.count, pattern, view, kwargs, name, app_names, namespaces)
+        self.count += 1
+
+        url_parts = pattern_list.determine_url_parts()
+        steps, complete = self.steps(list(prefix) + list(url_parts))
+
+        if complete and not pattern.endswith('$') and steps:
+            # Pattern doesn't have to end here, last part could match only part of a segment
+            steps = steps[:-1]
+            complete = False
+
+        node = self.root
+        for literal, part in steps:
+            if literal:
+                node = node.literal(part)
+            else:
+                node = node.match(part)
+
+        if complete and pattern.endswith('$'):
+            node.entries.append(entry)
+        else:
+            node.tails.append(entry)
+
+    def steps(self, url_parts):
+        """
+            Return ([(literal, part), ...], complete) for these url parts
+
+            Where complete says whether all the url parts could be turned into segments
+            We stop at the first part that is a regex that may match across a slash
+        """
+        steps = []
+        if url_parts is None:
+            return steps, False
+
+        for part in url_parts:
+            if part is None:
+                return steps, False
+
+            part = str(part)
+            if not regexes['regex_characters'].search(part):
+                for segment in regexes['multiSlash'].split(part):
+                    if segment:
+                        steps.append((True, segment))
+            elif regexes['unsafe_segment'].search(part):
+                return steps, False
+            else:
+                try:
+                    re.compile(part)
+                except re.error:
+                    return steps, False
+                steps.append((False, part))
+
+        return steps, True
+
+    ########################
+    ###   RESOLVING
+    ########################
+
+    def candidates(self, segments):
+        """Yield every entry the path in these segments could match"""
+        last = len(segments) - 1
+        stack = [(self.root, 0)]
+        while stack:
+            node, position = stack.pop()
+            for entry in node.tails:
+                yield entry
+
+            if position >= last:
+                for entry in node.entries:
+                    yield entry
+                continue
+
+            # Only segments followed by a slash are walked
+            segment = segments[position]
+
+            for regex, child in node.matches.values():
+                if regex.fullmatch(segment):
+                    stack.append((child, position + 1))
+
+            if segment in node.literals:
+                stack.append((node.literals[segment], position + 1))
+
+    def resolve(self, path):
+        """Return (entry, match) for the path or None if nothing matches"""
+        candidates = sorted(self.candidates(path.split('/')), key=lambda entry: entry.order)
+        for entry in candidates:
+            match = entry.match(path)
+            if match:
+                return entry, match
+
+########################
+###   DJANGO RESOLVER
+########################
+
+class SectionResolver(URLResolver):
+    """
+        Django resolver that uses a SectionTrie to resolve paths
+
+        Reversing still uses the normal urlpatterns for the section
+        Use via section.patterns(trie=True)
+    """
+    def __init__(self, section):
+        self.section = section
+        super(SectionResolver, self).__init__(RegexPattern(r'^'), section.patterns())
+
+    @property
+    def trie(self):
+        """Lazily create the trie"""
+        if not hasattr(self, '_trie'):
+            self._trie = SectionTrie(self.section)
+        return self._trie
+
+    def resolve(self, path):
+        """Find the entry for this path and return a ResolverMatch for it"""
+        path = str(path)
+        found = self.trie.resolve(path)
+        if not found:
+            raise Resolver404({'tried': [], 'path': path})
+
+        entry, match = found
+        kwargs = match.groupdict()
+        args = () if kwargs else match.groups()
+        kwargs = dict((key, val) for key, val in kwargs.items() if val is not None)
+
+        captured = dict(kwargs)
+        kwargs.update(entry.kwargs)
+
+        match_args = (entry.view, args, kwargs, entry.name, entry.app_names, entry.namespaces, entry.pattern, [])
+        try:
+            return ResolverMatch(*match_args, captured_kwargs=captured, extra_kwargs=entry.kwargs)
+        except TypeError:
+            # Django before 4.1 doesn't know about captured and extra kwargs
+            return ResolverMatch(*match_args)
@@ -0,0 +1,152 @@
+'''
+    Build urls for a section without going through django's reverse
+'''
+from django.urls import get_script_prefix, NoReverseMatch
+
+import re
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+regexes = {
+      'multiSlash' : re.compile('/+')
+    , 'regex_characters' : re.compile(r'[.^$*+?{}\[\]\\|()]')
+    }
+
+class ReverseTemplate(object):
+    """
+        Precomputed template for the url of a section
+
+        Made from the same url parts PatternList uses for the section's pattern.
+        Every part of the url is either a literal string or a named group
+        from a section with a ``match`` option.
+
+            pattern
+                The full pattern for the section, as django would see it
+
+            regex
+                pattern compiled
+
+            segments
+                List of (name, regex, literal) where name and regex are None for literals
+
+            names
+                Names of all the groups in the url
+    """
+    def __init__(self, section):
+        self.section = section
+
+        url_parts = self.determine_url_parts()
+        self.pattern = section.url_options.create_pattern([self.url_part(url, match) for url, match in url_parts])
+        self.regex = re.compile(self.pattern)
+
+        self.segments = self.determine_segments(url_parts)
+        self.names = set(name for name, _, _ in self.segments if name is not None)
+
+        # Reversing is the same as create_pattern: no trailing slash for catch_all and empty urls
+        self.trailing_slash = not section.url_options.catch_all and any(
+            name is not None or literal for name, _, literal in self.segments
+            )
+
+    ########################
+    ###   BUILDING
+    ########################
+
+    def determine_url_parts(self):
+        """
+            Get [(url, match), ...] from the top of the url to this section
+
+            Stops at a section that was included with include_as
+            and uses the include_as as the start of the url instead
+        """
+        url_parts = []
+        seen = set()
+        section = self.section
+        while section is not None and section not in seen:
+            seen.add(section)
+            url_parts.insert(0, (section.url, section.url_options.match))
+
+            parent = section.parent
+            if parent is None:
+                break
+
+            include_as = self.include_as(parent, section)
+            if include_as is not None:
+                url_parts.insert(0, (include_as, None))
+                break
+
+            section = parent
+
+        for url, _ in url_parts:
+            if url is None:
+                raise NoReverseMatch("Can't reverse %s, it has a url of None" % self.section.__unicode__())
+
+        return [(url, match) for url, match in url_parts if url != ""]
+
+    def include_as(self, parent, section):
+        """Find what this section was included into the parent as"""
+        for item in parent.children:
+            if item.section is section:
+                return item.include_as
+
+    def url_part(self, url, match):
+        """Same as PatternList.url_part"""
+        if match:
+            return "(?P<%s>%s)" % (match, url)
+        return url
+
+    def determine_segments(self, url_parts):
+        """
+            Turn the url parts into segments
+            Literals have slashes cleaned up so nothing needs to be done per reverse
+        """
+        segments = []
+        for url, match in url_parts:
+            if match:
+                segments.append((match, re.compile(r"(?:%s)\Z" % url), None))
+            else:
+                if regexes['regex_characters'].search(url):
+                    raise NoReverseMatch(
+                        "Can't reverse %s, '%s' isn't a literal and has no match" % (self.section.__unicode__(), url)
+                        )
+
+                literal = regexes['multiSlash'].sub('/', url).strip('/')
+                if literal:
+                    segments.append((None, None, literal))
+
+        return segments
+
+    ########################
+    ###   USAGE
+    ########################
+
+    def reverse(self, kwargs):
+        """Return the url for these kwargs, complaining if they don't fit the url"""
+        if set(kwargs) != self.names:
+            raise NoReverseMatch(
+                "Reversing %s needs keyword arguments %s, not %s" % (
+                    self.section.__unicode__(), sorted(self.names), sorted(kwargs)
+                )
+            )
+
+        parts = []
+        for name, regex, literal in self.segments:
+            if name is None:
+                parts.append(literal)
+            else:
+                value = "%s" % kwargs[name]
+                if not regex.match(value):
+                    raise NoReverseMatch(
+                        "Reversing %s with %s=%r doesn't match '%s'" % (
+                            self.section.__unicode__(), name, value, regex.pattern[3:-3]
+                        )
+                    )
+                parts.append(value)
+
+        path = '/'.join(parts)
+        if self.trailing_slash:
+            path = "%s/" % path
+
+        return "%s%s" % (get_script_prefix(), quote(path, safe="/~:@!$&'()*+,;="))
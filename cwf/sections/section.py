@@ -2,10 +2,17 @@ from django.urls import re_path as url
 from django.http import Http404
 
 from functools import wraps
+import itertools
+import weakref
 
 from .errors import ConfigurationError
+from .conditionals import conditionals_for
+from .section_master import shared_values
 from .pattern_list import PatternList
-from .options import Options
+from .resolver import SectionResolver
+from .reverse import ReverseTemplate
+from .compiled import CompiledTree
+from .options import Options, Deferred
 
 class Item(object):
     """
@@ -22,11 +29,12 @@ class Item(object):
         return cls(section, **options)
 
     def clone(self, parent):
-        """Convenience for making a clone of this item"""
-        old_section = self.section
-        cloned_section = old_section.clone(parent=parent)
-        cloned_section.merge(old_section, take_base=True)
-        return self.__class__(cloned_section, consider_for_menu=self.consider_for_menu, include_as=self.include_as)
+        """
+            Convenience for making a clone of this item
+            The section is mounted under the new parent rather than copied
+        """
+        mounted = Mount(self.section, parent=parent)
+        return self.__class__(mounted, consider_for_menu=self.consider_for_menu, include_as=self.include_as)
 
     def __repr__(self):
         return "<Item {}|:|menu:{}|:|include:{}>".format(self.section, self.consider_for_menu, self.include_as)
@@ -36,7 +44,7 @@ class Section(object):
         Contain logic for each section of the url
     '''
     def __init__(self, url='/', name=None, parent=None):
-        self.url  = url
+        self._url = url
         self.name = name
         self.parent = parent
 
@@ -46,6 +54,17 @@ class Section(object):
         self._pattern = None
         self._options = None
 
+        # Remembered results from PatternList, patterns() and reverse()
+        self._patterns = {}
+        self._urlpatterns = {}
+        self._reverse_template = None
+
+        # Set by freeze() to the CompiledTree this section belongs to
+        self.compiled = None
+
+        # Mounts that share this section, see Mount
+        self._mounts = None
+
     ########################
     ###   USAGE
     ########################
@@ -80,9 +99,26 @@ class Section(object):
                 )
             Without the positional argument at the beginning, the first line can't have a comma
         """
+        self.before_change()
         self.options.set_everything(**kwargs)
+        self.changed(subtree=True)
         return self
 
+    def freeze(self):
+        """
+            Compile the whole tree this section belongs to into a CompiledTree
+            and give it to every section in the tree.
+
+            Menus and SectionMaster will then read children, menu children and
+            url parts from the compiled tree instead of working them out per request.
+
+            Frozen sections complain if they are changed afterwards.
+        """
+        compiled = CompiledTree(self.root_ancestor())
+        for section in compiled.sections:
+            section.compiled = compiled
+        return compiled
+
     ########################
     ###   SECTION ADDERS
     ########################
@@ -106,6 +142,8 @@ class Section(object):
             If clone is specified as a keyword argument to be True then section is copied
             Otherwise, sections will just have their parent overriden and added as a child
         '''
+        self.before_change()
+
         clone = False
         if 'clone' in options:
             clone = options['clone']
@@ -116,8 +154,10 @@ class Section(object):
                 self.copy(section, **options)
             else:
                 section.parent=self
+                section.changed(subtree=True)
                 self.add_child(section, **options)
 
+        self.changed()
         return self
 
     def merge(self, section, take_base=False):
@@ -125,12 +165,14 @@ class Section(object):
             Copy children from a section into this section.
             Will only copy section._base if take_base is True
         '''
+        self.before_change()
         if take_base and section._base:
             self._base = section._base.clone(parent=self)
 
         for item in section._children:
             self._children.append(item.clone(parent=self))
 
+        self.changed()
         return self
 
     def add_child(self, section, first=False, **options):
@@ -140,26 +182,104 @@ class Section(object):
 
             Will be appended as an instance of the Item object
         """
+        self.before_change()
         new_item = Item.create(section, options)
         if first:
             self._base = new_item
         else:
             self._children.append(new_item)
+
+        self.changed()
         return section
 
+    def add_many(self, rows, defer=False, **shared_options):
+        """
+            Add a child for each row in one go and return the new sections
+
+            Each row is either a url or a dictionary with url and optionally name,
+            along with any options for that child.
+
+            shared_options are checked once and given to every child.
+            alias and match in shared_options may also be callables that take the row
+            and return the alias or match for each child. If defer is True then they
+            are only called the first time that option is used.
+
+            Only options in a row other than alias and match are given to the setters,
+            and the tree is only marked as changed once, after every child is added.
+        """
+        self.before_change()
+
+        derived = []
+        for option in ('alias', 'match'):
+            if callable(shared_options.get(option)):
+                derived.append((option, shared_options.pop(option)))
+
+        template = self.options.clone(**shared_options)
+
+        sections = []
+        for row in rows:
+            name = None
+            extra = None
+            if isinstance(row, dict):
+                extra = dict(row)
+                url = extra.pop('url', None)
+                name = extra.pop('name', None)
+            else:
+                url = row
+
+            if not url:
+                raise ConfigurationError("Every row given to add_many needs a url, got %s" % (row, ))
+
+            values = {}
+            for option, func in derived:
+                if defer:
+                    values[option] = Deferred(func, row)
+                else:
+                    values[option] = func(row)
+
+            if extra:
+                for option in ('alias', 'match'):
+                    if option in extra:
+                        values[option] = extra.pop(option)
+
+            section = Section(url=url, name=name, parent=self)
+            section.options = template.inherit(**values)
+            if extra:
+                section.options.set_everything(**extra)
+            sections.append(section)
+
+        self._children.extend(Item(section) for section in sections)
+        self.changed()
+        return sections
+
     def copy(self, section, first=False, **kwargs):
-        """Create a clone of the given section, merge clone with original; and add clone as a child"""
+        """
+            Add a copy of the given section and everything under it as a child
+
+            The copy is a Mount that shares the section with the original until either is changed
+        """
         options = {key:val for key, val in kwargs.items() if key in ('consider_for_menu', 'include_as')}
 
-        cloned = section.clone(parent=self)
-        self.add_child(cloned, first=first, **options)
-        cloned.merge(section, take_base=True)
+        mounted = Mount(section, parent=self)
+        self.add_child(mounted, first=first, **options)
         return self
 
     ########################
     ###   SPECIAL
     ########################
 
+    @property
+    def url(self):
+        """The part of the url this section represents"""
+        return self._url
+
+    @url.setter
+    def url(self, value):
+        """Changing the url changes the urls of everything under this section"""
+        self.before_change()
+        self._url = value
+        self.changed(subtree=True)
+
     @property
     def options(self):
         """Options is a lazily loaded Options object"""
@@ -201,6 +321,12 @@ class Section(object):
             Get all the children
             Children are from self._base and self._children.
         """
+        if self.compiled is not None:
+            return iter(self.compiled.children[self.compiled.index_of(self)])
+        return self._iter_children()
+
+    def _iter_children(self):
+        """Yield base followed by the rest of the children"""
         if self._base:
             yield self._base
 
@@ -225,6 +351,12 @@ class Section(object):
             Children are from self._base and self._children.
             Yield only those whose consider_for_menu is truthy
         """
+        if self.compiled is not None:
+            return iter(self.compiled.menu_children[self.compiled.index_of(self)])
+        return self._iter_menu_children()
+
+    def _iter_menu_children(self):
+        """Yield menu children with any promoted children in their place"""
         if self._base and self._base.consider_for_menu:
             for promoted in self._base.section.promoted_menu_children(self._base):
                 yield promoted
@@ -250,6 +382,8 @@ class Section(object):
     @property
     def has_children(self):
         """Return whether section has children"""
+        if self.compiled is not None:
+            return self.compiled.has_children[self.compiled.index_of(self)]
         return bool(any(self.children))
 
     def __iter__(self):
@@ -272,10 +406,42 @@ class Section(object):
     ###   URL PATTERNS
     ########################
 
-    def patterns(self, without_include=False):
-        """Get urlpatterns for this section"""
-        tuples = list(PatternList(self, without_include=without_include))
-        return [url(*tpl) for tpl in tuples]
+    def patterns(self, without_include=False, trie=False):
+        """
+            Get urlpatterns for this section
+
+            If trie is True then a list with a single SectionResolver is returned instead.
+            It resolves to the same views as the normal patterns but finds them by walking
+            a trie of url segments rather than trying each regex in turn.
+        """
+        if trie:
+            return [SectionResolver(self)]
+
+        if without_include not in self._urlpatterns:
+            tuples = list(PatternList(self, without_include=without_include))
+            self._urlpatterns[without_include] = [url(*tpl) for tpl in tuples]
+        return list(self._urlpatterns[without_include])
+
+    @property
+    def reverse_template(self):
+        """ReverseTemplate for this section, made once until the tree changes"""
+        if self._reverse_template is None:
+            self._reverse_template = ReverseTemplate(self)
+        return self._reverse_template
+
+    @property
+    def url_pattern(self):
+        """Compiled regex of the full pattern for this section"""
+        return self.reverse_template.regex
+
+    def reverse(self, **kwargs):
+        """
+            Return the url for this section without going through django's reverse
+
+            kwargs are the values for each section in the url with a ``match`` option
+            django.urls.NoReverseMatch is raised if they don't fit the url
+        """
+        return self.reverse_template.reverse(kwargs)
 
     def make_view(self, view, section):
         """
@@ -310,6 +476,9 @@ class Section(object):
 
     def root_ancestor(self):
         """Find ancestor that has no parent"""
+        if self.compiled is not None:
+            return self.compiled.root
+
         result = self
         parents = []
         while result.parent and result.parent not in parents:
@@ -317,15 +486,247 @@ class Section(object):
             result = result.parent
         return result
 
+    def changed(self, subtree=False):
+        """
+            Called when the tree changes at this section
+
+            Forgets values that were shared between requests
+            and any patterns or reverse templates remembered by this section and it's ancestors.
+
+            If subtree is True then patterns remembered by descendants are also
+            forgotten, for when the url parts leading to them are different.
+        """
+        shared_values.invalidate()
+
+        sections = self.ancestors()
+        if subtree:
+            sections = itertools.chain(sections, self.descendants())
+
+        for section in sections:
+            section._patterns = {}
+            section._urlpatterns = {}
+            section._reverse_template = None
+
+    def ancestors(self):
+        """Return this section and all it's parents"""
+        result = [self]
+        parent = self.parent
+        while parent and parent not in result:
+            result.append(parent)
+            parent = getattr(parent, 'parent', None)
+        return result
+
+    def descendants(self):
+        """Yield every section under this one"""
+        seen = set([self])
+        stack = [item.section for item in self.children]
+        while stack:
+            section = stack.pop()
+            if section not in seen:
+                seen.add(section)
+                yield section
+                stack.extend(item.section for item in section.children)
+
+    def ensure_not_frozen(self):
+        """Complain if this section has been frozen"""
+        if self.compiled is not None:
+            raise ConfigurationError("Can't change %s after it has been frozen" % self.__unicode__())
+
+    def before_change(self):
+        """
+            Called before this section is changed
+
+            Complains if it is frozen and makes sure any mounts sharing this section
+            take their own copy of it first, so they don't see the change.
+        """
+        self.ensure_not_frozen()
+        for section in self.ancestors():
+            for mount in list(section._mounts or ()):
+                mounted = mount.mounted_at(self, section)
+                if mounted is not None:
+                    mounted.materialize()
+
+    def add_mount(self, mount):
+        """Remember a mount that shares this section"""
+        if self._mounts is None:
+            self._mounts = weakref.WeakSet()
+        self._mounts.add(mount)
+
     def reachable(self, request):
-        """Determine if this view is reachable for this request"""
-        if self.parent and not self.parent.reachable(request):
-            return False
-        return self.options.reachable(request)
+        """
+            Determine if this view is reachable for this request
+            The answer is remembered for the rest of the request
+        """
+        return conditionals_for(request).reachable(self)
 
     def can_display(self, request):
         """Determine if we can display this section"""
         options = self.options
-        can_display = options.conditional('display', request)
+        can_display = options.conditional('display', request, section=self)
         has_permissions = options.has_permissions(request.user)
         return has_permissions and can_display, options.propogate_display
+
+class Mount(Section):
+    """
+        A section that shares the url, name, options and children of another section
+        but has it's own parent, so it can be put in many places in the tree.
+
+        Children of the shared section are mounted under this mount the first time
+        they are looked at, so url parts, patterns and menus are worked out per mount.
+
+        The shared section is copied into the mount, without copying it's children,
+        the first time either of them is changed.
+    """
+    def __init__(self, source, parent=None):
+        self.source = Mount.shared_section(source)
+        self.shared = True
+        self.parent = parent
+
+        self._own = None
+        self._mounted = {}
+        self._mounts = None
+        self._mount_options = None
+
+        self._pattern = None
+        self._patterns = {}
+        self._urlpatterns = {}
+        self._reverse_template = None
+        self.compiled = None
+
+        self.source.add_mount(self)
+
+    ########################
+    ###   SHARED ATTRIBUTES
+    ########################
+
+    def shared_attribute(name, changes_tree=False):
+        """
+            Property that is read from the source until this mount has it's own copy
+            If changes_tree then setting it tells the tree it changed, like Section.url does
+        """
+        def getter(self):
+            if self.shared:
+                return getattr(self.source, name)
+            return self._own[name]
+
+        def setter(self, value):
+            if changes_tree:
+                self.before_change()
+            self.materialize()
+            self._own[name] = value
+            if changes_tree:
+                self.changed(subtree=True)
+        return property(getter, setter)
+
+    url = shared_attribute('url', changes_tree=True)
+    name = shared_attribute('name')
+    del shared_attribute
+
+    @property
+    def _options(self):
+        """
+            Options of the source, which are only cloned like Section.clone does
+            if the clone would be different, i.e. display doesn't propogate
+        """
+        if self.shared:
+            if self._mount_options is None:
+                options = self.source.options
+                if not options.propogate_display:
+                    options = options.clone(all=True)
+                self._mount_options = options
+            return self._mount_options
+        return self._own['_options']
+
+    @_options.setter
+    def _options(self, value):
+        self.materialize()
+        self._own['_options'] = value
+
+    @property
+    def _base(self):
+        if self.shared:
+            return self.mount_item(self.source._base)
+        return self._own['_base']
+
+    @_base.setter
+    def _base(self, value):
+        self.materialize()
+        self._own['_base'] = value
+
+    @property
+    def _children(self):
+        if self.shared:
+            return [self.mount_item(item) for item in self.source._children]
+        return self._own['_children']
+
+    @_children.setter
+    def _children(self, value):
+        self.materialize()
+        self._own['_children'] = value
+
+    ########################
+    ###   MOUNTING
+    ########################
+
+    @staticmethod
+    def shared_section(section):
+        """The section a mount of this section would share"""
+        while isinstance(section, Mount) and section.shared:
+            section = section.source
+        return section
+
+    def mount_item(self, item):
+        """Return an item with the section from this item mounted under this mount"""
+        if item is None:
+            return None
+
+        if item not in self._mounted:
+            mounted = Mount(item.section, parent=self)
+            self._mounted[item] = Item(mounted, consider_for_menu=item.consider_for_menu, include_as=item.include_as)
+        return self._mounted[item]
+
+    def materialize(self):
+        """Take our own copy of the source, children of the source stay shared"""
+        if not self.shared:
+            return
+
+        source = self.source
+        self._own = dict(
+              url = source.url
+            , name = source.name
+            , _options = source.options.clone(all=True)
+            , _base = self.mount_item(source._base)
+            , _children = [self.mount_item(item) for item in source._children]
+            )
+        self.shared = False
+        source._mounts.discard(self)
+
+    def mounted_at(self, section, ancestor):
+        """
+            Find where section is in this mount of ancestor
+            Following the same path as from ancestor down to section, which is under it
+        """
+        path = []
+        current = section
+        while current is not ancestor:
+            path.append(current)
+            current = current.parent
+
+        mounted = self
+        for current in reversed(path):
+            found = None
+            current = Mount.shared_section(current)
+            for item in mounted._iter_children():
+                if getattr(item.section, 'source', None) is current:
+                    found = item.section
+                    break
+
+            if found is None:
+                return None
+            mounted = found
+        return mounted
+
+    def before_change(self):
+        """Take our own copy of the source before we are changed"""
+        super(Mount, self).before_change()
+        self.materialize()
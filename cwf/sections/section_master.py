@@ -1,3 +1,8 @@
+from .permissions import permissions_for, section_permissions
+from .conditionals import conditionals_for
+
+import weakref
+
 ########################
 ###   MEMOIZER
 ########################
@@ -7,11 +12,17 @@ def memoized(self, typ, obj, **kwargs):
         For a given typ:
             Determine identity of obj
                 Memoize result of self.calculator.<typ>_value(obj, **kwargs)
+
+        The obj is stored alongside it's result so it can't be garbage collected
+        and have it's id given to another object while we still remember it.
     """
+    results = self.results[typ]
     identity = id(obj)
-    if identity not in self.results[typ]:
-        self.results[typ][identity] = getattr(self.calculator, "%s_value" % typ)(obj, **kwargs)
-    return self.results[typ][identity]
+    found = results.get(identity)
+    if found is None or found[0] is not obj:
+        found = (obj, getattr(self.calculator, "%s_value" % typ)(obj, **kwargs))
+        results[identity] = found
+    return found[1]
 
 def memoizer(typ):
     '''Return function that uses memoized for particular type'''
@@ -19,59 +30,201 @@ def memoizer(typ):
         return self.memoized(typ, obj, **kwargs)
     return memoized
 
+def memoizer_init(self):
+    '''Give each memoizer it's own results for each namespace'''
+    self.results = dict((namespace, {}) for namespace in self.namespaces)
+
 def make_memoizer(calculator, *namespaces):
     '''
         Create a class for memoizing particular values under particular namespaces
         Will use <typ>_value(obj, **kwargs) methods on calculator to memoize results for an obj
         Where identity of obj is determined by id(obj)
+
+        Each instance of the class has it's own results.
+
+        There are no locks:
+          * A memoizer belongs to one SectionMaster, which belongs to one request,
+            so in practice only one thread uses it
+          * If it is shared, the worst that happens is two threads calculate the same
+            value and the last one to finish is kept. Results are stored as one
+            (obj, value) tuple with a single dictionary assignment, so a thread never
+            sees half a result or a result for a different object.
     '''
     attrs = {}
-    results = {}
     for value in namespaces:
-        results[value] = {}
         attrs[value] = memoizer(value)
 
-    attrs['results'] = results
+    attrs['__init__'] = memoizer_init
     attrs['memoized'] = memoized
+    attrs['namespaces'] = namespaces
     attrs['calculator'] = calculator
     return type("Memoizer", (object, ), attrs)
 
+########################
+###   SHARED VALUES
+########################
+
+class SharedValues(object):
+    '''
+        Memoize values that don't depend on the request so they can be shared between requests
+        Results are kept against the object itself and forgotten when that object is garbage collected
+
+        Everything is forgotten when invalidate is called, which Section does whenever
+        the shape of a tree is changed with add, adopt or merge
+    '''
+    def __init__(self, *namespaces):
+        self.version = 0
+        self.namespaces = namespaces
+        self.results = self.make_results()
+
+    def make_results(self):
+        '''Make an empty store for each namespace'''
+        return dict((namespace, weakref.WeakKeyDictionary()) for namespace in self.namespaces)
+
+    def invalidate(self):
+        '''
+            Forget all results
+            Results are replaced rather than cleared so that anything still calculating
+            puts it's answer into the old results instead of the new ones
+        '''
+        self.results = self.make_results()
+        self.version += 1
+
+    def get(self, typ, obj, calculate):
+        '''Get result for this obj under this namespace, using calculate(obj) if we don't have it yet'''
+        results = self.results[typ]
+        if obj not in results:
+            results[obj] = calculate(obj)
+        return results[obj]
+
+    def set(self, typ, obj, value):
+        '''Remember a result for this obj under this namespace'''
+        self.results[typ][obj] = value
+
+# Values for sections that are the same for every request
+shared_values = SharedValues('url_parts', 'permissions', 'segment_keys', 'segment_children', 'digests')
+
+########################
+###   URL PARTS
+########################
+
+def url_parts_from(parent_parts, url):
+    '''Return url parts for a url given the url parts of it's parent'''
+    urls = list(parent_parts)
+
+    if type(url) in (str, unicode) and url.startswith("/"):
+        url = url[1:]
+
+    if not urls or urls[-1] != '' or url != '':
+        urls.append(url)
+
+    if not urls or urls[0] != '':
+        urls.insert(0, '')
+
+    return urls
+
+########################
+###   SEGMENTS
+########################
+
+def segment_key(url):
+    '''Return what a part of the path must be, lowercased, for a section with this url to be selected'''
+    if url in ('', '/'):
+        return ''
+    return unicode(url).lower()
+
+def segment_children(section):
+    '''
+        Return ({segment key : [(position, child), ...]}, [(position, child), ...]) for children of this section
+        The second list is children that promote their children, which may be selected whatever the path is
+    '''
+    by_key = {}
+    promoted = []
+    for position, item in enumerate(section.children):
+        child = item.section
+        if child.options.promote_children:
+            promoted.append((position, child))
+        else:
+            by_key.setdefault(segment_key(child.url), []).append((position, child))
+    return by_key, promoted
+
 ########################
 ###   SECTION MASTER
 ########################
 
 class SectionMaster(object):
-    '''Determine information for sections for a given request'''
+    '''
+        Determine information for sections for a given request
+
+        url_parts for sections don't depend on the request and are shared between requests
+        Everything else, and url_parts for Info objects, is only memoized for this request
+
+        Conditionals are remembered in the Conditionals for the request
+        so they are shared with Section.reachable and Menu
+    '''
     def __init__(self, request):
         self.request = request
         self.memoized = make_memoizer(self
             , 'admin', 'url_parts', 'active', 'exists', 'display', 'selected'
             )()
 
+        # (url, alias) pairs for sections whose values were found by prefetch_values
+        self.prefetched_values = {}
+
+        # {id(path) : (path, lowercased parts)} for paths given to selected
+        self.path_keys_for = {}
+
+        # {root : (path, {section : index into path})} for the selected sections in each tree
+        self.chains = {}
+
+    @property
+    def conditionals(self):
+        '''Conditionals for this request'''
+        return conditionals_for(self.request)
+
+    def prefetch_permissions(self, root):
+        '''
+            Find all the permissions the user has in one go
+            If any section in the tree under root needs them
+        '''
+        user = getattr(self.request, 'user', None)
+        if user is not None:
+            needed = shared_values.get('permissions', root, section_permissions)
+            permissions_for(user).prefetch(needed)
+
+    def conditional(self, name, section):
+        '''Get result of a conditional for a section or the section of an Info object'''
+        if isinstance(section, Info):
+            section = section.section
+        return section.options.conditional(name, self.request, section=section)
+
     ########################
     ###   MEMOIZED VALUES
     ########################
 
     def url_parts_value(self, section):
-        '''Determine list of url parts of parent and this section'''
-        urls = []
+        '''
+            Determine list of url parts of parent and this section
+            Frozen sections already know their url parts
+        '''
         if not section:
             return []
 
-        if hasattr(section, 'parent') and section.parent:
-            urls.extend(self.memoized.url_parts(section.parent))
+        compiled = getattr(section, 'compiled', None)
+        if compiled is not None:
+            return list(compiled.url_parts[compiled.index_of(section)])
 
-        url = section.url
-        if type(url) in (str, unicode) and url.startswith("/"):
-            url = url[1:]
+        if isinstance(section, Info):
+            return self.calculate_url_parts(section)
+        return shared_values.get('url_parts', section, self.calculate_url_parts)
 
-        if not urls or urls[-1] != '' or url != '':
-            urls.append(url)
-
-        if not urls or urls[0] != '':
-            urls.insert(0, '')
+    def calculate_url_parts(self, section):
+        '''Join url parts from the parent with the url of this section'''
+        parent_parts = []
+        if hasattr(section, 'parent') and section.parent:
+            parent_parts = self.memoized.url_parts(section.parent)
 
-        return urls
+        return url_parts_from(parent_parts, section.url)
 
     def admin_value(self, section):
         '''Determine if section is only seen via admin priveleges'''
@@ -79,7 +232,7 @@ class SectionMaster(object):
             if self.memoized.admin(section.parent):
                 return True
 
-        is_admin = section.options.conditional('admin', self.request)
+        is_admin = self.conditional('admin', section)
         return section.options.needs_auth or is_admin
 
     def active_value(self, section):
@@ -87,14 +240,14 @@ class SectionMaster(object):
         if hasattr(section, 'parent') and section.parent:
             if not self.memoized.active(section.parent):
                 return False
-        return section.options.conditional('active', self.request)
+        return self.conditional('active', section)
 
     def exists_value(self, section):
         '''Determine if section and parent exists'''
         if hasattr(section, 'parent') and section.parent:
             if not self.memoized.exists(section.parent):
                 return False
-        return section.options.conditional('exists', self.request)
+        return self.conditional('exists', section)
 
     def display_value(self, section):
         '''Determine if section and parent can be displayed'''
@@ -113,9 +266,10 @@ class SectionMaster(object):
 
         # Make sure that regardless of what this section is, it's parent is selected
         # Also get here the rest of the path to check this section against
+        full_path = path
         parent_selected = True
         if section.parent:
-            parent_selected, path = self.memoized.selected(section.parent, path=path)
+            parent_selected, path = self.memoized.selected(section.parent, path=full_path)
 
         if parent_selected and not path and url == '':
             # Parent consumed the rest of the path
@@ -127,16 +281,131 @@ class SectionMaster(object):
         if not parent_selected or not path:
             return False, []
 
-        # Check against the url
-        if path[0] == '' and unicode(url) in ('', '/'):
-            return True, path[1:]
-        elif path[0].lower() == unicode(url).lower():
+        # The rest of the path is always the end of the full path
+        # So we compare against the part of the full path it starts at
+        index = len(full_path) - len(path)
+        if self.path_keys(full_path)[index] == self.segment_key(section):
             return True, path[1:]
+        elif section.options.promote_children:
+            return True, path
         else:
-            if section.options.promote_children:
-                return True, path
-            else:
-                return False, []
+            return False, []
+
+    def path_keys(self, path):
+        """Lowercased parts of this path, only worked out once for each path"""
+        found = self.path_keys_for.get(id(path))
+        if found is None or found[0] is not path:
+            found = (path, [unicode(part).lower() for part in path])
+            self.path_keys_for[id(path)] = found
+        return found[1]
+
+    def segment_key(self, section):
+        """
+            Segment key for the url of a section or Info object
+            Frozen sections already know their segment key and other sections share it between requests
+
+            Section.url tells the tree when it changes, but the key is kept with the url it was made from
+            so it is also made again if the url of anything else has changed.
+        """
+        if isinstance(section, Info):
+            return section.segment_key()
+
+        compiled = getattr(section, 'compiled', None)
+        if compiled is not None:
+            return compiled.segment_keys[compiled.index_of(section)]
+
+        url = section.url
+        found = shared_values.get('segment_keys', section, lambda section: (url, segment_key(url)))
+        if found[0] != url:
+            found = (url, segment_key(url))
+            shared_values.set('segment_keys', section, found)
+        return found[1]
+
+    def selected_chain(self, section, path):
+        """
+            Return list of this section and every selected section under it, parents before children
+
+            Only children whose segment key is the next part of the path are looked at
+            along with children that promote their children, so this takes as long as
+            the path is deep rather than as big as the tree is.
+            What it finds is remembered for selected_value.
+        """
+        chain = []
+        if not self.memoized.selected(section, path=path)[0]:
+            return chain
+
+        keys = self.path_keys(path)
+        seen = set([section])
+        stack = [section]
+        while stack:
+            section = stack.pop()
+            chain.append(section)
+
+            rest = self.memoized.selected(section, path=path)[1]
+            key = keys[len(path) - len(rest)] if rest else ''
+
+            by_key, promoted = shared_values.get('segment_children', section, segment_children)
+            candidates = sorted(by_key.get(key, []) + promoted, key=lambda candidate: candidate[0])
+            for _, child in reversed(candidates):
+                if child not in seen and self.memoized.selected(child, path=path)[0]:
+                    seen.add(child)
+                    stack.append(child)
+
+        return chain
+
+    def chain_for(self, section, path):
+        """
+            Return {section : index into path of the rest of the path} for the selected sections
+            in the tree this section is in. Found with selected_chain once for each path.
+        """
+        root = section.root_ancestor()
+        found = self.chains.get(root)
+        if found is None or found[0] is not path:
+            path_length = len(path or [])
+            indexes = {}
+            for selected in self.selected_chain(root, path):
+                indexes[selected] = path_length - len(self.memoized.selected(selected, path=path)[1])
+            found = (path, indexes)
+            self.chains[root] = found
+        return found[1]
+
+    def selected_index(self, obj, path):
+        """
+            Return index into path of the rest of the path for a selected section or Info object
+            Or None if it isn't selected
+        """
+        if isinstance(obj, Info):
+            return obj.selected_index()
+        return self.chain_for(obj, path).get(obj)
+
+    def info_index(self, info):
+        """
+            Return index into path of the rest of the path if this Info is selected, otherwise None
+            Same as selected_value, but one comparison against what was found for it's parent
+        """
+        path = info.path or []
+        url = info.url
+        if not path and url == '':
+            return 0
+
+        index = 0
+        if info.parent:
+            index = self.selected_index(info.parent, path)
+            if index is None:
+                return None
+
+        if index == len(path):
+            # Parent consumed the rest of the path
+            if url == '':
+                return index
+            return None
+
+        if self.path_keys(path)[index] == info.segment_key():
+            return index + 1
+        elif info.options.promote_children:
+            return index
+        else:
+            return None
 
     ########################
     ###   INFO
@@ -149,20 +418,19 @@ class SectionMaster(object):
             If section has values, url, alias is yielded for each value
             if Section has no values, it's own url and alias is yielded
         """
-        if not section.options.conditional('active', self.request):
+        if not self.conditional('active', section):
             # Section not even active
             return
 
-        if section.options.values:
-            # We determine the parent url parts to give to the values
-            parent_url_definition = self.memoized.url_parts(section.parent)
-            parent_url_parts = []
-
-            for index in range(len(parent_url_definition)):
-                parent_url_parts.append(path[index])
+        if section in self.prefetched_values:
+            # Values were already found by prefetch_values
+            for url, alias in self.prefetched_values[section]:
+                yield url, alias
 
+        elif section.options.values:
             # Get the values!
-            for url, alias in section.options.values.get_info(self.request, parent_url_parts, path):
+            # Each one is passed on as it's found so streaming values are never all held here
+            for url, alias in section.options.values.get_info(*self.values_info(section, path)):
                 yield url, alias
         else:
             # This item only has one item to show in the menu
@@ -171,59 +439,129 @@ class SectionMaster(object):
                 url = include_as
             yield url, section.alias
 
+    def values_info(self, section, path):
+        """Return (request, parent_url_parts, path) to give the values of this section"""
+        # We determine the parent url parts to give to the values
+        parent_url_definition = self.memoized.url_parts(section.parent)
+        parent_url_parts = []
+
+        for index in range(len(parent_url_definition)):
+            parent_url_parts.append(path[index])
+
+        return self.request, parent_url_parts, path
+
+    def prefetch_values(self, sections, path, pool):
+        """
+            Use a ValuesPool to find values for all these sections at the same time
+            Only for active sections that have values from a callable
+        """
+        jobs = []
+        found_for = []
+        for section in sections:
+            values = section.options.values
+            if section in self.prefetched_values or not values or not callable(values.values):
+                continue
+
+            if not self.conditional('active', section):
+                continue
+
+            found_for.append(section)
+            jobs.append((values, self.values_info(section, path)))
+
+        if jobs:
+            for section, found in zip(found_for, pool.evaluate(jobs)):
+                self.prefetched_values[section] = found
+
     def get_info(self, section, include_as, path, parent=None):
         '''
             Yield Info objects for this section
             Used by templates to render the menus
         '''
         for url, alias in self.iter_section(section, include_as, path):
-            for info in self._get_info(url, alias, section, path, parent):
-                yield info
-
-    def _get_info(self, url, alias, section, path, parent):
-        """Closure to yield info for a url, alias pair"""
-        info = Info(url, alias, section, parent)
-        path_copy = list(path)
-
-        # Use SectionMaster logic to keep track of parent_url and parent_selected
-        # By giving it the info instead of section
-        admin = lambda : self.memoized.admin(info)
-        appear = lambda : self.memoized.exists(info) and self.memoized.active(info)
-        display = lambda : self.memoized.display(info)[0]
-        selected = lambda : self.memoized.selected(info, path=path_copy)
-        url_parts = lambda: self.memoized.url_parts(info)
-
-        # Give lazily loaded stuff to info and yield it
-        info.setup(admin, appear, display, selected, url_parts)
-        yield info
+            yield Info(url, alias, section, parent, master=self, path=path)
 
 ########################
 ###   INFO OBJECT
 ########################
 
+class Unknown(object):
+    '''Used by Info for values it hasn't worked out yet'''
+
 class Info(object):
-    '''Object to hold information used by templates'''
-    def __init__(self, url, alias, section, parent):
+    '''
+        Object to hold information used by templates
+
+        admin, appear, display and url_parts are found by the SectionMaster,
+        which is given the info instead of the section so values keep track of their own parent.
+        They are only worked out when they are used and are remembered by the master for the request.
+
+        selected is worked out once from what was found for the parent and kept on the info.
+
+        children needs the menu the info belongs to, which Menu.navs_for gives it.
+    '''
+    __slots__ = (
+          'url', 'alias', 'parent', 'section', 'options', 'master', 'path', 'menu'
+        , '_index', '_selected'
+        )
+
+    def __init__(self, url, alias, section, parent, master=None, path=None):
         self.url = url
         self.alias = alias
         self.parent = parent or section.parent
         self.section = section
         self.options = section.options
 
-    def setup(self, admin, appear, display, selected, url_parts):
-        self.admin = admin
-        self.appear = appear
-        self.display = display
-        self.selected = selected
-        self.url_parts = url_parts
+        self.path = path
+        self.menu = None
+        self.master = master
+
+        self._index = Unknown
+        self._selected = None
+
+    def admin(self):
+        return self.master.memoized.admin(self)
+
+    def appear(self):
+        memoized = self.master.memoized
+        return memoized.exists(self) and memoized.active(self)
+
+    def display(self):
+        return self.master.memoized.display(self)[0]
+
+    def selected(self):
+        if self._selected is None:
+            index = self.selected_index()
+            if index is None:
+                self._selected = (False, [])
+            else:
+                self._selected = (True, (self.path or [])[index:])
+        return self._selected
+
+    def selected_index(self):
+        if self._index is Unknown:
+            self._index = self.master.info_index(self)
+        return self._index
 
-    def setup_children(self, children, has_children):
-        self.children = children
-        self.has_children = has_children
+    def segment_key(self):
+        if self.url is self.section.url:
+            return self.master.segment_key(self.section)
+        return segment_key(self.url)
+
+    def url_parts(self):
+        return self.master.memoized.url_parts(self)
+
+    def children(self):
+        if self.menu is None:
+            return []
+        return self.menu.navs_for(self.section.menu_children, parent=self)
 
     def can_display(self, request):
         return self.section.can_display(request)
 
+    @property
+    def has_children(self):
+        return self.section.has_children
+
     @property
     def menu_children(self):
         return self.section.menu_children
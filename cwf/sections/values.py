@@ -1,14 +1,169 @@
+from .caching import LRUCache
 from .errors import ConfigurationError
 
+from functools import cmp_to_key
+from itertools import islice
+import inspect
+import asyncio
+import heapq
+import copy
+
 class BadValues(Exception): pass
 
+########################
+###   CACHE
+########################
+
+def parent_url_parts_key(info):
+    '''Default key for ValuesCache, which assumes values only depend on the url of the parent'''
+    request, parent_url_parts, path = info
+    return tuple(parent_url_parts)
+
+class ValuesCache(object):
+    '''
+        Remembers transformed and sorted values so a callable isn't used on every menu
+
+        ttl: Seconds before values are found again, None to keep them until they're invalidated
+        max_entries: How many results to keep before the least recently used are forgotten
+        key: callable((request, parent_url_parts, path)) -> hashable key for the values
+            Defaults to the parent_url_parts
+    '''
+    missing = object()
+
+    def __init__(self, ttl=None, max_entries=128, key=None):
+        if key is None:
+            key = parent_url_parts_key
+
+        if not callable(key):
+            raise ConfigurationError("key must be a callable, not %s" % key)
+
+        self.key = key
+        self.entries = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    def get(self, info, calculate):
+        '''Get remembered values for this info, or remember the result of calculate(info)'''
+        key = self.key(info)
+        values = self.entries.get(key, self.missing)
+        if values is self.missing:
+            values = calculate(info)
+            if values is not None:
+                values = tuple(values)
+            self.entries.set(key, values)
+
+        if values is None:
+            return None
+        return list(values)
+
+    def has(self, info):
+        '''Whether we have values remembered for this info'''
+        return self.key(info) in self.entries
+
+    def invalidate(self, key=None):
+        '''Forget values for this key, or everything if no key is given'''
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.delete(key)
+
+    @property
+    def hits(self):
+        return self.entries.hits
+
+    @property
+    def misses(self):
+        return self.entries.misses
+
+    @property
+    def stats(self):
+        return self.entries.stats
+
+########################
+###   STREAMING
+########################
+
+def unique(values):
+    '''Yield values that haven't been yielded yet'''
+    seen = set()
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            yield value
+
+class Worst(object):
+    '''Entry in the heap used by smallest, which orders the worst entry first'''
+    def __init__(self, order, identity, item):
+        self.order = order
+        self.item = item
+        self.identity = identity
+
+    def __lt__(self, other):
+        return other.order < self.order
+
+def smallest(items, wanted, key, distinct=False):
+    '''
+        Return the wanted smallest items from (identity, item) pairs, in order
+        Ties are kept in the order they were found
+
+        If distinct then only the first item for each identity is considered.
+        Only the wanted best items are held at any time. An item that is pushed out
+        can never come back in, so a later duplicate of it is already known to be too big.
+    '''
+    if wanted is None:
+        if distinct:
+            items = unique_pairs(items)
+        return [item for _, item in sorted(items, key=lambda pair: key(pair[1]))]
+
+    if wanted <= 0:
+        return []
+
+    heap = []
+    members = set()
+    for index, (identity, item) in enumerate(items):
+        if distinct and identity in members:
+            continue
+
+        entry = Worst((key(item), index), identity, item)
+        if len(heap) < wanted:
+            heapq.heappush(heap, entry)
+        elif entry.order < heap[0].order:
+            pushed_out = heapq.heapreplace(heap, entry)
+            members.discard(pushed_out.identity)
+        else:
+            continue
+
+        if distinct:
+            members.add(identity)
+
+    return [entry.item for entry in sorted(heap, key=lambda entry: entry.order)]
+
+def unique_pairs(items):
+    '''Yield (identity, item) pairs with identities that haven't been yielded yet'''
+    seen = set()
+    for identity, item in items:
+        if identity not in seen:
+            seen.add(identity)
+            yield identity, item
+
+########################
+###   VALUES
+########################
+
 class Values(object):
     '''Holds multiple values for a single section'''
-    def __init__(self, values=None, each=None, sorter=False, as_set=True, sort_after_transform=True):
+    def __init__(self, values=None, each=None, sorter=False, as_set=True, sort_after_transform=True, dynamic=None, cache=None
+        , stream=False, offset=0, limit=None, timeout=None, fallback=None
+        ):
         # values: The values to use
         #   Can be list or callable((request, parent_url_parts, path))->[]
         self.values = values
 
+        # dynamic: Determine if the values can be different between requests with the same path
+        #   Menus with dynamic values are never taken from the menu cache
+        #   Defaults to whether values is a callable
+        if dynamic is None:
+            dynamic = callable(values)
+        self.dynamic = dynamic
+
         # as_set: Determine if values should be considered a set to remove duplicates
         #   Sorter will be used after values transformed into a set
         self.as_set = as_set
@@ -29,6 +184,35 @@ class Values(object):
         if type(sorter) is not bool and not callable(self.sorter):
             raise ConfigurationError("Sorter must be a callable, not %s" % self.sorter)
 
+        # cache: ValuesCache to remember transformed and sorted values in
+        #   If True: A ValuesCache with the default policy
+        #   If None: values are found every time
+        if cache is True:
+            cache = ValuesCache()
+        self.cache = cache
+        if self.cache is not None and not callable(getattr(self.cache, 'get', None)):
+            raise ConfigurationError("Cache must be a ValuesCache, not %s" % self.cache)
+
+        # stream: Work on values as an iterator rather than making lists and sets of them
+        #   Sorting only holds offset + limit values and removing duplicates only holds
+        #   the values it has seen before it gets that many
+        self.stream = stream
+
+        # offset and limit: Window of values to show when streaming
+        #   Either a number or callable((request, parent_url_parts, path))->number
+        #   A limit of None means all values after offset
+        self.offset = offset
+        self.limit = limit
+
+        # timeout: Seconds to wait for values when a menu finds them concurrently
+        #   None means the timeout of the ValuesPool is used
+        self.timeout = timeout
+
+        # fallback: What to show if finding values concurrently times out or fails
+        #   Either list of (url, alias) or callable((request, parent_url_parts, path))->[(url, alias)]
+        #   If None then nothing is shown when it times out and failures are raised
+        self.fallback = fallback
+
     def get_info(self, request, parent_url_parts, path):
         """Yield (alias, url) for each value"""
         # Get sorted values
@@ -41,8 +225,59 @@ class Values(object):
             if val:
                 yield val
 
+    def get_info_from(self, found, request, parent_url_parts, path):
+        """Yield (alias, url) for each value when values has already been called and gave found"""
+        info = (request, parent_url_parts, path)
+        calculate = lambda info: self.given(found).get_values(info)
+
+        if self.cache is not None:
+            values = self.cache.get(info, calculate)
+        else:
+            values = calculate(info)
+
+        for val in values or ():
+            if val:
+                yield val
+
     def get_values(self, info):
-        """Get transformed, sorted values"""
+        """Get transformed, sorted values, from the cache if we have one"""
+        calculate = self.calculate_values
+        if self.stream:
+            calculate = self.stream_values
+
+        if self.cache is not None:
+            return self.cache.get(info, calculate)
+        return calculate(info)
+
+    @property
+    def is_coroutine(self):
+        """Whether values is a coroutine function"""
+        return inspect.iscoroutinefunction(self.values)
+
+    def source(self, info):
+        """
+            Call values with info
+            Coroutines are run to completion here unless a ValuesPool has already awaited them
+        """
+        found = self.values(info)
+        if inspect.isawaitable(found):
+            found = asyncio.run(found)
+        return found
+
+    def given(self, found):
+        """Return a copy of these Values that uses found instead of calling values"""
+        given = copy.copy(self)
+        given.values = found
+        given.cache = None
+        return given
+
+    def invalidate(self, key=None):
+        """Forget cached values for this key, or all of them if no key is given"""
+        if self.cache is not None:
+            self.cache.invalidate(key)
+
+    def calculate_values(self, info):
+        """Find values and transform and sort them"""
         if not self.values:
             return None
 
@@ -61,6 +296,57 @@ class Values(object):
 
         return transformed
 
+    def stream_values(self, info):
+        """
+            Yield transformed, sorted values in the window from offset to offset + limit
+            Without holding all of them
+        """
+        if not self.values:
+            return
+
+        offset, limit = self.window(info)
+        end = None
+        if limit is not None:
+            end = offset + limit
+
+        values = self.values
+        if callable(values):
+            try:
+                values = self.source(info)
+            except Exception as error:
+                raise BadValues(values, error)
+        values = iter(values)
+
+        if not self.sorter:
+            if self.as_set:
+                values = unique(values)
+            for value in islice(values, offset, end):
+                yield self.transform_value(value, info)
+            return
+
+        if callable(self.sorter):
+            key = cmp_to_key(self.sorter)
+        else:
+            key = lambda value: value
+
+        if self.sort_after_transform:
+            pairs = ((value, self.transform_value(value, info)) for value in values)
+            for transformed in smallest(pairs, end, key, distinct=self.as_set)[offset:]:
+                yield transformed
+        else:
+            pairs = ((value, value) for value in values)
+            for value in smallest(pairs, end, key, distinct=self.as_set)[offset:]:
+                yield self.transform_value(value, info)
+
+    def window(self, info):
+        """Return (offset, limit) for this info"""
+        offset, limit = self.offset, self.limit
+        if callable(offset):
+            offset = offset(info)
+        if callable(limit):
+            limit = limit(info)
+        return offset or 0, limit
+
     def transform_values(self, values, info):
         ''''
             use self.each on values if self.each is defined
@@ -68,16 +354,20 @@ class Values(object):
             Otherwise turn values list of [v1, v2, v3] into [(v1, v1), (v2, v2), (v3, v3)]
         '''
         if self.each:
-            result = []
-            for value in values:
-                try:
-                    result.append(self.each(info, value))
-                except Exception as error:
-                    raise BadValues(self.each, value, error)
-            return result
+            return [self.transform_value(value, info) for value in values]
         else:
             return [(value, value) for value in values]
 
+    def transform_value(self, value, info):
+        '''Use self.each on a single value if self.each is defined, otherwise return (value, value)'''
+        if not self.each:
+            return (value, value)
+
+        try:
+            return self.each(info, value)
+        except Exception as error:
+            raise BadValues(self.each, value, error)
+
     def normalised_values(self, info):
         '''
             Return values as a list
@@ -88,7 +378,7 @@ class Values(object):
         values = self.values
         if callable(values):
             try:
-                values = list(values(info))
+                values = list(self.source(info))
             except Exception as error:
                 raise BadValues(values, error)
 
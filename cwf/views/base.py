@@ -1,21 +1,141 @@
 from .rendering import renderer
-from .menu import Menu
+from .menu import Menu, path_parts
 
 import json
-import re
-
-regexes = {
-    'multi_slash' : re.compile('/+')
-    }
 
 class DictObj(dict):
     """Dictionary with attribute access"""
     def __init__(self, *args, **kwargs):
-        super(DictObj, self).__init__(self, *args, **kwargs)
+        super(DictObj, self).__init__(*args, **kwargs)
         self.__dict__ = self
 
+class State(object):
+    """
+        State for a request, made by View.get_state
+
+        The fields every request has are kept in slots and anything else goes
+        into an overflow dictionary. Supports both attribute and item access and
+        is a mapping, so it can be given to a template context as is.
+    """
+    fields = ('menu', 'path', 'target', 'section', 'base_url')
+    __slots__ = fields + ('extra', 'make_menu')
+
+    def __init__(self, menu=None, path=None, target=None, section=None, base_url=None, make_menu=None, **extra):
+        # If make_menu is given then menu is made from it the first time it's asked for
+        self.make_menu = make_menu
+        if make_menu is None:
+            self.menu = menu
+
+        self.path = path
+        self.target = target
+        self.section = section
+        self.base_url = base_url
+        self.extra = extra
+
+    ########################
+    ###   ATTRIBUTE ACCESS
+    ########################
+
+    def __getattr__(self, key):
+        """Only called for keys that aren't slots or a menu that hasn't been made yet"""
+        if key == 'menu' and self.make_menu is not None:
+            self.menu = self.make_menu()
+            return self.menu
+
+        if key in State.__slots__:
+            raise AttributeError(key)
+
+        try:
+            return self.extra[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        if key == 'menu':
+            object.__setattr__(self, 'make_menu', None)
+
+        if key in State.__slots__:
+            object.__setattr__(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __delattr__(self, key):
+        if key in State.__slots__:
+            raise AttributeError("Can't delete %s from state" % key)
+
+        try:
+            del self.extra[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    ########################
+    ###   ITEM ACCESS
+    ########################
+
+    def __getitem__(self, key):
+        if key in State.fields:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in State.fields:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in State.fields:
+            raise KeyError("Can't delete %s from state" % key)
+        del self.extra[key]
+
+    def __contains__(self, key):
+        return key in State.fields or key in self.extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(State.fields) + len(self.extra)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def keys(self):
+        return list(State.fields) + list(self.extra.keys())
+
+    def values(self):
+        """Values for every key, which makes the menu if it hasn't been made yet"""
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        """(key, value) for every key, which makes the menu if it hasn't been made yet"""
+        return [(key, self[key]) for key in self.keys()]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __repr__(self):
+        """Shows the menu as <lazy> if it hasn't been made, so logging the state doesn't make it"""
+        shown = []
+        for key in self.keys():
+            if key == 'menu' and self.make_menu is not None:
+                shown.append("menu=<lazy>")
+            else:
+                shown.append("%s=%r" % (key, self[key]))
+        return "<State %s>" % ', '.join(shown)
+
 class View(object):
-    """Base class for cwf views"""
+    """
+        Base class for cwf views
+
+        ``templates`` lists names of templates used by the targets on this view
+        so that :py:meth:`cwf.views.rendering.Renderer.precompile` can load them at startup.
+    """
+    templates = ()
+
     def __init__(self):
         self.renderer = renderer
 
@@ -40,6 +160,39 @@ class View(object):
         # Render the result
         return self.rendered_from_result(request, result)
 
+    def bind(self, target):
+        """
+            Return a callable(request, *args, **kwargs) that does the same as calling
+            this view with this ``target``.
+
+            Used by sections with the ``direct`` option so the target is only found once
+            instead of on every request. If the class changes how targets are found or
+            executed, then the callable just calls the view.
+        """
+        kls = self.__class__
+        overridden = hasattr(self, 'override') or any(
+              getattr(kls, name) is not getattr(View, name)
+              for name in ('__call__', 'get_result', 'execute', 'has_target', 'get_target')
+            )
+
+        if overridden:
+            def bound(request, *args, **kwargs):
+                return self(request, target, *args, **kwargs)
+            return bound
+
+        # Complain now rather than on every request
+        if not self.has_target(target):
+            raise Exception("View object doesn't have a target : %s" % target)
+
+        method = self.get_target(target)
+        def bound(request, *args, **kwargs):
+            request.state = self.get_state(request, target)
+            result = method(request, *args, **self.clean_view_kwargs(kwargs))
+            if callable(result):
+                result = result(request)
+            return self.rendered_from_result(request, result)
+        return bound
+
     def rendered_from_result(self, request, result):
         """
             If the result being rendered is ``None``, then a ``Http404`` will be raised.
@@ -161,16 +314,19 @@ class View(object):
 
     def get_state(self, request, target):
         """
-            Return an object that can be used to store state for a request.
+            Return a :py:class:`State` that can be used to store state for a request.
 
             For convenience, this object behaves like a Javascript object (supports both
             dot notation and array notation for accessing and setting variables).
+            It is also a mapping, so it is used as the template context without being copied.
 
             When it's created, it is initialized with some values:
 
                 ``menu``
                     If we got here via a CWF Section, then we will be able to create
                     a :py:class:`cwf.views.menu.Menu` object from that section.
+                    It is only made the first time it is used, so requests that never
+                    render a menu don't pay for one.
 
                 ``path``
                     The path of the request with no leading, trailing; or duplicate slashes.
@@ -190,12 +346,12 @@ class View(object):
         if base_url != '' and path[0] == '':
             path.pop(0)
 
-        menu = None
+        make_menu = None
         if section:
-            menu = Menu(request, section)
+            make_menu = lambda : self.make_menu(request, section, base_url)
 
-        return DictObj(
-              menu = menu
+        return State(
+              make_menu = make_menu
             , path = path
             , target = target
             , section = section
@@ -216,16 +372,28 @@ class View(object):
 
     def path_from_request(self, request):
         """Determine the path for this request"""
+        parts = self.path_parts(request)
+        if not parts:
+            return ['', ''] if request.path else ['']
+        return [''] + [part.lower() for part in parts] + ['']
+
+    def make_menu(self, request, section, base_url):
+        """Make the menu for State, which only happens the first time it is used"""
+        # request.path is the same as PATH_INFO when there is no base url
+        # So the menu can use the parts we already have
+        menu_path = None
+        if base_url == '':
+            menu_path = self.path_parts(request) or ['']
+        return Menu(request, section, path=menu_path)
+
+    def path_parts(self, request):
+        """
+            Parts of request.path with no leading, trailing or duplicate slashes
+            Remembered on the request so the path is only split once
+        """
         path = request.path
-        if path:
-            path = regexes['multi_slash'].sub('/', request.path)
-
-        path = [p.lower() for p in path.split('/')]
-
-        if path and path[-1] != '':
-            path.append('')
-
-        if path and path[0] != '':
-            path.insert(0, '')
-
-        return path
+        found = getattr(request, 'cwf_path_parts', None)
+        if not isinstance(found, tuple) or found[0] != path:
+            found = (path, path_parts(path))
+            request.cwf_path_parts = found
+        return found[1]
@@ -1,6 +1,13 @@
 from cwf.sections.section_master import SectionMaster
+from .menu_renderer import MenuRenderer
 from .rendering import renderer
 
+from django.utils.safestring import mark_safe
+
+def path_parts(path):
+    """Return parts of this path with no leading, trailing or duplicate slashes"""
+    return [part for part in path.split('/') if part]
+
 class Menu(object):
     """
         Knows how to get the information required to render the
@@ -9,11 +16,29 @@ class Menu(object):
         Assumes a top nav with one selected item.
 
         And a side nav that is everything under the selected top nav item
+
+        If it has a cache (a :py:class:`cwf.views.menu_cache.MenuCache`) then
+        render_nav will get html from there when it can.
+
+        If it has a values_pool (a :py:class:`cwf.sections.concurrency.ValuesPool`)
+        then values for all the sections in a level are found at the same time.
     """
-    def __init__(self, request, section):
+    cache = None
+    values_pool = None
+
+    def __init__(self, request, section, cache=None, values_pool=None, path=None):
         self.request = request
         self.section = section
 
+        if path is not None:
+            self._path = path
+
+        if cache is not None:
+            self.cache = cache
+
+        if values_pool is not None:
+            self.values_pool = values_pool
+
         self.master = SectionMaster(self.request)
 
     def global_nav(self):
@@ -22,7 +47,9 @@ class Menu(object):
             navs for just the top level sections.
         """
         if not hasattr(self, '_global_nav'):
-            self._global_nav = list(self.navs_for(self.section.root_ancestor().menu_children))
+            root = self.section.root_ancestor()
+            self.master.prefetch_permissions(root)
+            self._global_nav = list(self.navs_for(root.menu_children))
         return self._global_nav
 
     def side_nav(self):
@@ -59,33 +86,37 @@ class Menu(object):
     def path(self):
         """
             Get and memoize path from the request
-            Make sure no trailing or leading slashes
+            Make sure no trailing, leading or duplicate slashes
+
+            View.get_state gives the menu the path it already found so this is only used
+            when the menu is made some other way.
         """
         if not hasattr(self, "_path"):
             meta = self.request
             if hasattr(self.request, 'META'):
                 meta = self.request.META
-            path = meta['PATH_INFO']
-            while path and path.startswith("/"):
-                path = path[1:]
-            while path and path.endswith("/"):
-                path = path[:-1]
-            self._path = path.split('/')
+            self._path = path_parts(meta['PATH_INFO']) or ['']
         return self._path
 
-    def children_function_for(self, section, parent):
-        """Return lambda to get menu for children of some section"""
-        return lambda : self.navs_for(section.menu_children, parent=parent)
-
     def navs_for(self, items, parent=None):
         """
             Return list of infos representing each top nav item
+            Each info is given this menu so it can find it's own children
+            Batch conditionals are decided for the whole level before we start
+            And so are values if we have a values_pool
         """
+        items = list(items)
+        self.master.conditionals.prime(item.section for item in items)
+
+        if self.values_pool is not None:
+            self.master.prefetch_values([item.section for item in items], self.path, self.values_pool)
+
         for item in items:
             child = item.section
             include_as = item.include_as
             for info in self.master.get_info(child, include_as, self.path, parent=parent):
-                info.setup_children(self.children_function_for(child, info), child.has_children)
+                # So info.children can find navs for the children of it's section
+                info.menu = self
                 yield info
 
     def render(self, menu, template, ignore_children=False):
@@ -93,6 +124,48 @@ class Menu(object):
             Turn a list of info objects into html using a particular template
             Menu is result of self.global_nav or self.side_nav
             Template is path to the template to use
+
+            Template may also be a MenuRenderer class or instance, which is also
+            used instead of the template engine for cwf's own menu/base.html
         """
+        native = self.native_renderer(template, ignore_children)
+        if native is not None:
+            return native.render(menu)
+
         extra = dict(menu=menu, children_template=template, ignore_children=ignore_children)
         return renderer.simple_render(template, extra)
+
+    def render_nav(self, nav, template='menu/base.html', ignore_children=None):
+        """
+            Render either 'global_nav' or 'side_nav' with this template
+            Going through self.cache if we have one
+
+            ignore_children defaults to True for the global nav
+        """
+        if ignore_children is None:
+            ignore_children = nav == 'global_nav'
+
+        if self.cache is not None:
+            return self.cache.render(self, nav, template, ignore_children)
+        return self.render(getattr(self, nav)(), template, ignore_children)
+
+    @property
+    def global_nav_html(self):
+        """Html for the global nav using menu/base.html"""
+        return mark_safe(self.render_nav('global_nav'))
+
+    @property
+    def side_nav_html(self):
+        """Html for the side nav using menu/base.html"""
+        return mark_safe(self.render_nav('side_nav'))
+
+    def native_renderer(self, template, ignore_children):
+        """Return a MenuRenderer to use for this template if there is one"""
+        if isinstance(template, MenuRenderer):
+            return template
+
+        if isinstance(template, type) and issubclass(template, MenuRenderer):
+            return template(ignore_children=ignore_children)
+
+        if MenuRenderer.renders(template):
+            return MenuRenderer(ignore_children=ignore_children)
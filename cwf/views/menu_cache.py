@@ -0,0 +1,279 @@
+'''
+    Cache for the html of rendered menus
+
+    Most requests for the same path by users that can see the same sections
+    end up with exactly the same html for their menus, so we remember it.
+'''
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache import caches
+
+from cwf.sections.conditionals import Conditionals, Batch
+from cwf.sections.section_master import shared_values
+from cwf.sections.dispatch import string_types
+from cwf.sections.options import Deferred
+from cwf.sections.caching import LRUCache
+
+import hashlib
+
+########################
+###   KEY
+########################
+
+def describe(value):
+    """
+        Something to put in a digest for the value of an option that is the same in every process
+        Functions and classes are described by where they come from, other objects by their class
+    """
+    if value is None or isinstance(value, (bool, int, float) + string_types):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return tuple(describe(val) for val in value)
+
+    if isinstance(value, Deferred):
+        return ('deferred', describe(value.func), describe(value.args))
+
+    kls = value
+    if not isinstance(value, type) and not hasattr(value, '__name__'):
+        kls = value.__class__
+    return "%s.%s" % (getattr(kls, '__module__', None), getattr(kls, '__qualname__', kls.__name__))
+
+class MenuKey(object):
+    """
+        Default key strategy for MenuCache
+
+        The key is a digest of:
+            * Which nav, template and ignore_children is being rendered
+            * The version given to the MenuKey
+            * A digest of the section tree
+            * The path of the request
+            * A visibility fingerprint
+
+        The digest of the tree is made from the url, name and options that change the menu
+        for every section in it, so processes with the same tree make the same keys and can
+        share a django cache. Changes the digest can't see, like what a function given as an
+        alias returns or a change to the template, need a different version for each deploy.
+
+        The visibility fingerprint is the answers to every conditional that is a callable
+        and every needs_auth for the sections the menu may show. These are the only parts
+        of a menu that depend on more than the path, and they are remembered for the request
+        so the menu doesn't decide them again if it has to be rendered.
+
+        Calling it returns None if the menu shouldn't be cached, which is when any of those
+        sections have dynamic Values.
+    """
+    prefix = 'cwf.menu'
+
+    # Options that change how a section appears in the menu
+    menu_options = (
+          'alias', 'values', 'admin', 'active', 'exists', 'display', 'needs_auth'
+        , 'promote_children', 'propogate_display'
+        )
+
+    def __init__(self, version=None):
+        self.version = version
+
+    def __call__(self, menu, nav, template, ignore_children):
+        """Return key for this menu or None if it can't be cached"""
+        fingerprint = self.fingerprint(menu, nav, ignore_children)
+        if fingerprint is None:
+            return None
+
+        parts = self.parts(menu, nav, template, ignore_children)
+        parts.append(fingerprint)
+        return "%s:%s" % (self.prefix, hashlib.sha1(repr(parts).encode('utf-8')).hexdigest())
+
+    def parts(self, menu, nav, template, ignore_children):
+        """Everything other than the fingerprint that goes into the key"""
+        root = menu.section.root_ancestor()
+        return [
+              nav, self.template_name(template), bool(ignore_children)
+            , self.version, shared_values.get('digests', root, self.tree_digest)
+            , '/'.join(menu.path)
+            ]
+
+    def tree_digest(self, root):
+        """
+            Digest of every section in the tree under root
+            Shared between requests until the tree changes
+        """
+        digest = hashlib.sha1()
+        stack = [(root, 0, None)]
+        while stack:
+            section, depth, item = stack.pop()
+
+            described = [depth, describe(section.url), describe(section.name)]
+            if item is not None:
+                described.extend([item.consider_for_menu, describe(item.include_as)])
+            for name in self.menu_options:
+                described.append(describe(section.options.raw(name)))
+            digest.update(repr(described).encode('utf-8'))
+
+            for child in reversed(list(section.children)):
+                stack.append((child.section, depth + 1, child))
+        return digest.hexdigest()
+
+    def template_name(self, template):
+        """Name for the template, which may also be a MenuRenderer class or instance"""
+        if isinstance(template, str):
+            return template
+
+        kls = template
+        if not isinstance(template, type):
+            kls = template.__class__
+        return "%s.%s:%s" % (kls.__module__, kls.__name__, getattr(template, 'ignore_children', None))
+
+    ########################
+    ###   FINGERPRINT
+    ########################
+
+    def fingerprint(self, menu, nav, ignore_children):
+        """
+            Return list of answers that decide what is visible in this menu
+            Or None if the menu has dynamic values
+
+            Goes through each level of the menu, only going into sections that are on the path,
+            which are all found at the start with SectionMaster.chain_for.
+            The parents of each section are included as well, as they decide what it shows.
+            The global nav only has the first level unless it is rendered with children.
+        """
+        root = menu.section.root_ancestor()
+        menu.master.prefetch_permissions(root)
+        conditionals = menu.master.conditionals
+        descend = nav != 'global_nav' or not ignore_children
+
+        selected = {}
+        if descend:
+            selected = menu.master.chain_for(root, menu.path)
+
+        answers = []
+        seen = set()
+        level = [(root, False)]
+        while level:
+            sections = [(item.section, loose) for parent, loose in level for item in parent.menu_children]
+            conditionals.prime(section for section, _ in sections)
+
+            level = []
+            for section, loose in sections:
+                values = section.options.values
+                if values and values.dynamic:
+                    return None
+
+                answers.extend(self.parents_visibility(menu, section, seen))
+                answers.append(self.visibility(menu, section))
+                seen.add(section)
+
+                # Children of sections with values are always looked at
+                # Because selected can't be determined from the section alone
+                loose = loose or bool(values)
+                if descend and (loose or section in selected):
+                    level.append((section, loose))
+
+        return answers
+
+    def parents_visibility(self, menu, section, seen):
+        """
+            Visibility of the parents of this section that aren't in seen yet, from the top down
+            The SectionMaster looks at parents when deciding what a section shows,
+            which includes the root and promoted sections that aren't in menu_children themselves
+        """
+        parents = []
+        parent = section.parent
+        while parent is not None and parent not in seen:
+            seen.add(parent)
+            parents.append(parent)
+            parent = parent.parent
+        return [self.visibility(menu, parent) for parent in reversed(parents)]
+
+    def visibility(self, menu, section):
+        """Answers to the conditionals and needs_auth that can change between requests for this section"""
+        options = section.options
+        conditionals = menu.master.conditionals
+
+        answer = []
+        for name in Conditionals.names:
+            val = getattr(options, name)
+            if isinstance(val, Batch) or callable(val):
+                answer.append(conditionals.get(name, section))
+
+        user = getattr(menu.request, 'user', None)
+        if options.needs_auth and user is not None:
+            answer.append(options.has_permissions(user))
+
+        return tuple(answer)
+
+########################
+###   CACHE
+########################
+
+class MenuCache(object):
+    """
+        Remember html for rendered menus
+
+        Html is kept in an in process LRUCache of max_entries and, if given a backend,
+        in a django cache as well. The backend may be the name of a cache in settings.CACHES
+        or a cache object.
+
+        key is a callable(menu, nav, template, ignore_children) that returns the key to use
+        or None if the menu shouldn't be cached. Defaults to a MenuKey with the version given
+        here, which should be different for each deploy if processes share the django cache.
+
+        Use it by giving it to a Menu::
+
+            menu_cache = MenuCache(backend='default')
+            menu = Menu(request, section, cache=menu_cache)
+            menu.render_nav('global_nav')
+    """
+    def __init__(self, backend=None, key=None, max_entries=256, timeout=DEFAULT_TIMEOUT, version=None):
+        if key is None:
+            key = MenuKey(version=version)
+
+        self.key = key
+        self.backend = backend
+        self.timeout = timeout
+        self.local = LRUCache(max_entries)
+
+    @property
+    def cache(self):
+        """The django cache to use, if any"""
+        if isinstance(self.backend, str):
+            return caches[self.backend]
+        return self.backend
+
+    def get(self, key):
+        """Get html for this key from the local cache, then the django cache"""
+        html = self.local.get(key)
+        if html is None and self.cache is not None:
+            html = self.cache.get(key)
+            if html is not None:
+                self.local.set(key, html)
+        return html
+
+    def set(self, key, html):
+        """Remember html for this key"""
+        self.local.set(key, html)
+        if self.cache is not None:
+            self.cache.set(key, html, self.timeout)
+
+    def clear(self):
+        """
+            Forget everything in the local cache
+            Keys include a digest of the trees, so changing a section is enough to stop old html being used
+        """
+        self.local.clear()
+
+    def render(self, menu, nav, template, ignore_children=False):
+        """Get html for this nav of the menu, rendering and remembering it if we don't have it yet"""
+        key = self.key(menu, nav, template, ignore_children)
+        if key is None:
+            return self.make(menu, nav, template, ignore_children)
+
+        html = self.get(key)
+        if html is None:
+            html = self.make(menu, nav, template, ignore_children)
+            self.set(key, html)
+        return html
+
+    def make(self, menu, nav, template, ignore_children):
+        """Render this nav of the menu"""
+        return menu.render(getattr(menu, nav)(), template, ignore_children)
@@ -0,0 +1,165 @@
+from django.utils.html import conditional_escape, strip_spaces_between_tags
+from django.template import TemplateDoesNotExist
+
+from .rendering import renderer
+
+import os
+
+########################
+###   MENU RENDERER
+########################
+
+class MenuRenderer(object):
+    """
+        Renders a menu to the same html as ``menu/base.html``
+        without going through the template engine.
+
+        Everything is written into one list in a single pass over the infos
+        and joined at the end.
+
+        Subclass and override the methods named after the blocks in the template:
+
+            selected_item_attrs(info) and unselected_item_attrs(info)
+                Attributes for the <li> of the info
+
+            item_link(info)
+                Html for the link of an info that can be displayed
+
+            item_children(info, selected, buf)
+                Write the children of an info into buf
+    """
+    template = 'menu/base.html'
+    template_location = os.path.join(os.path.dirname(__file__), '..', 'templates', 'menu', 'base.html')
+
+    def __init__(self, ignore_children=False):
+        self.ignore_children = ignore_children
+
+    # (template, whether it is ours) for the last menu/base.html that was looked at
+    checked = None
+
+    @classmethod
+    def renders(cls, template):
+        """
+            Determine if we can render in place of this template
+            Only true if it is menu/base.html and that hasn't been replaced by another template
+
+            The template comes from renderer.templates, which only loads it again when it changes,
+            so where it came from is only looked at again when it is a different template.
+        """
+        if template != cls.template:
+            return False
+
+        try:
+            found = renderer.templates.get(template)
+        except TemplateDoesNotExist:
+            return False
+
+        checked = cls.checked
+        if checked is None or checked[0] is not found:
+            checked = (found, cls.is_ours(found))
+            cls.checked = checked
+        return checked[1]
+
+    @classmethod
+    def is_ours(cls, found):
+        """Determine if this template is the menu/base.html that comes with cwf"""
+        origin = getattr(found, 'origin', None) or getattr(getattr(found, 'template', None), 'origin', None)
+        name = getattr(origin, 'name', None)
+        if not name:
+            return False
+
+        return os.path.realpath(name) == os.path.realpath(cls.template_location)
+
+    ########################
+    ###   RENDERING
+    ########################
+
+    def render(self, menu):
+        """Return html for this menu"""
+        buf = ["\n\n"]
+        self.write_menu(menu, buf, top=True)
+        buf.append("\n")
+        return ''.join(buf)
+
+    def write_menu(self, menu, buf, top=False):
+        """
+            Write a <ul> for the infos in this menu into buf
+            Nothing is written if none of the infos have anything to show
+
+            Only the top level keeps whitespace between items
+            Levels under it are inside the {% spaceless %} of their parent
+        """
+        start = len(buf)
+        buf.append("<ul>\n\n" if top else "<ul>")
+
+        wrote = False
+        for info in menu:
+            if not info.appear():
+                continue
+
+            if top:
+                buf.append("\n    ")
+
+            if self.write_item(info, buf):
+                wrote = True
+
+        if not wrote:
+            del buf[start:]
+            return False
+
+        buf.append("\n</ul>" if top else "</ul>")
+        return True
+
+    def write_item(self, info, buf):
+        """Write a <li> for this info into buf and say whether anything was written"""
+        selected = info.selected()[0]
+        if selected:
+            attributes = self.selected_item_attrs(info)
+        else:
+            attributes = self.unselected_item_attrs(info)
+
+        attributes = attributes.strip()
+        if attributes:
+            attributes = " %s" % attributes
+
+        start = len(buf)
+        buf.append("<li%s>" % attributes)
+
+        wrote = False
+        if info.display():
+            link = strip_spaces_between_tags(self.item_link(info).strip())
+            if link:
+                buf.append(link)
+                wrote = True
+
+        if self.item_children(info, selected, buf):
+            wrote = True
+
+        if not wrote:
+            del buf[start:]
+            return False
+
+        buf.append("</li>")
+        return True
+
+    ########################
+    ###   BLOCKS
+    ########################
+
+    def selected_item_attrs(self, info):
+        """Attributes for a selected item"""
+        return ' class="selected"'
+
+    def unselected_item_attrs(self, info):
+        """Attributes for an item that isn't selected"""
+        return ''
+
+    def item_link(self, info):
+        """Link for an item"""
+        return '<a href="%s">%s</a>' % (conditional_escape(info.full_url), conditional_escape(info.alias))
+
+    def item_children(self, info, selected, buf):
+        """Write children of a selected item into buf and say whether anything was written"""
+        if not self.ignore_children and selected:
+            return self.write_menu(info.children(), buf)
+        return False
@@ -1,20 +1,170 @@
 from django.template.backends.django import Template as BackendTemplate
 from django.template import loader, RequestContext, Context, Template
-from django.http import HttpResponse, Http404, HttpResponseRedirect
+from django.http import HttpResponse, StreamingHttpResponse, Http404, HttpResponseRedirect
+
+from cwf.sections.errors import ConfigurationError
+from cwf.sections.dispatch import dispatcher
 
 from .redirect_address import RedirectAddress
+from .serializers import serializers
+
+import threading
+import os
+
+try:
+    from django.template.autoreload import reset_loaders
+except ImportError:
+    # Older django doesn't cache in it's loaders unless told to
+    reset_loaders = None
+
+########################
+###   TEMPLATE CACHE
+########################
+
+class TemplateCache(object):
+    """
+        Remember compiled templates by name
 
-import json
+        If check_mtime is True then a template is loaded again when the modified time
+        of its file changes. Only the file of the template itself is looked at, not
+        any templates it extends or includes. If check_mtime is None then settings.DEBUG is used.
+
+        get_template is used to load templates and defaults to ``loader.get_template``
+
+        reset is called before loading a template that has changed, so django's
+        own cached loaders forget it too. Defaults to ``django.template.autoreload.reset_loaders``
+    """
+    def __init__(self, check_mtime=None, get_template=None, reset=None):
+        self.reset = reset
+        self.check_mtime = check_mtime
+        self.get_template = get_template
+
+        self.lock = threading.Lock()
+        self.templates = {}
+
+    def get(self, name):
+        """Get the template for this name, loading it if we don't have it yet or it has changed"""
+        if isinstance(name, (Template, BackendTemplate)):
+            return name
+
+        found = self.templates.get(name)
+        if found is not None:
+            template, filename, mtime = found
+            if not self.should_check or self.mtime(filename) == mtime:
+                return template
+
+            reset = self.reset or reset_loaders
+            if reset is not None:
+                reset()
+
+        return self.load(name)
+
+    def load(self, name):
+        """Load this template and remember it"""
+        get_template = self.get_template or loader.get_template
+        template = get_template(name)
+        filename = self.filename(template)
+        with self.lock:
+            self.templates[name] = (template, filename, self.mtime(filename))
+        return template
+
+    def clear(self):
+        """Forget all the templates"""
+        with self.lock:
+            self.templates.clear()
+
+    @property
+    def should_check(self):
+        """Whether to look at the modified time of templates"""
+        if self.check_mtime is None:
+            from django.conf import settings
+            return settings.DEBUG
+        return self.check_mtime
+
+    def filename(self, template):
+        """Name of the file this template came from, if any"""
+        origin = getattr(template, 'origin', None)
+        name = getattr(origin, 'name', None)
+        if isinstance(name, str) and os.path.exists(name):
+            return name
+
+    def mtime(self, filename):
+        """Modified time of this file or None"""
+        if filename is None:
+            return None
+
+        try:
+            return os.path.getmtime(filename)
+        except OSError:
+            return None
+
+    ########################
+    ###   PRECOMPILING
+    ########################
+
+    def templates_for(self, sections):
+        """
+            Return names of every template listed by the views for these sections and everything under them
+            Views list their templates with a ``templates`` attribute
+        """
+        names = []
+        for location in dispatcher.locations(sections):
+            for name in getattr(dispatcher.get_view(location), 'templates', ()):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def precompile(self, sections=None, names=None, complain=True):
+        """
+            Load the templates with these names and those used by these sections
+            So the first requests don't have to
+
+            Returns dictionary of {name : error} for any that couldn't be loaded.
+            If complain is True then a ConfigurationError listing them is raised instead.
+        """
+        names = list(names or [])
+        if sections is not None:
+            names.extend(name for name in self.templates_for(sections) if name not in names)
+
+        failures = {}
+        for name in names:
+            try:
+                self.load(name)
+            except Exception as error:
+                failures[name] = error
+
+        if failures and complain:
+            raise ConfigurationError("Couldn't load templates %s" % ', '.join(
+                "%s (%s: %s)" % (name, error.__class__.__name__, error) for name, error in failures.items()
+            ))
+        return failures
+
+########################
+###   RENDERER
+########################
 
 class Renderer(object):
     """
         Stateless class that simplifies usage of Django machinary for creating HttpResponse objects
 
         An instantiated instance of this class is provided from ``cwf.views.rendering.renderer``
+
+        Compiled templates are kept in ``templates``, a :py:class:`TemplateCache`,
+        which is shared by every renderer unless one is given.
     """
+    templates = TemplateCache()
+
+    def __init__(self, templates=None):
+        if templates is not None:
+            self.templates = templates
+
+    def precompile(self, sections=None, names=None, complain=True):
+        """Load templates into the template cache before they are needed, see :py:meth:`TemplateCache.precompile`"""
+        return self.templates.precompile(sections, names, complain=complain)
+
     def simple_render(self, template, extra):
         """Return the string from rendering specified template with a normal Context object"""
-        t = loader.get_template(template)
+        t = self.templates.get(template)
         c = Context(extra)
         return t.render(c)
 
@@ -28,10 +178,7 @@ class Renderer(object):
             to modify the rendered template before creating the HttpResponse object
         """
         context = self.request_context(request, extra)
-        if isinstance(template, Template) or isinstance(template, BackendTemplate):
-            template_obj = template
-        else:
-            template_obj = loader.get_template(template)
+        template_obj = self.templates.get(template)
         render = template_obj.render(context)
 
         # Modify render if we want to
@@ -73,11 +220,24 @@ class Renderer(object):
         """Return HttpResponse object with data and a 'application/xml' content_type"""
         return HttpResponse(data, content_type="application/xml")
 
-    def json(self, data):
-        """Return HttpResponse object with data dumped as a json string and a 'application/javascript' content_type"""
-        if type(data) not in (str, unicode):
-            data = json.dumps(data)
-        return HttpResponse(data, content_type='application/javascript')
+    def json(self, data, serializer=None, stream=False):
+        """
+            Return HttpResponse object with data dumped as a json string and a 'application/javascript' content_type
+
+            serializer is the name of a serializer in ``cwf.views.serializers.serializers``
+            or a serializer object. The default is the first of ``serializers.preferred`` that is installed.
+
+            If stream is True then a StreamingHttpResponse is returned instead
+            and lists are dumped a few items at a time as the response is sent.
+        """
+        content_type = 'application/javascript'
+        if type(data) in (str, unicode):
+            return HttpResponse(data, content_type=content_type)
+
+        serializer = serializers.get(serializer)
+        if stream:
+            return StreamingHttpResponse(serializer.chunks(data), content_type=content_type)
+        return HttpResponse(serializer.dumps(data), content_type=content_type)
 
     def redirect(self, request, address, *args, **kwargs):
         """Return a HttpResponseRedirect object"""
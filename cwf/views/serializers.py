@@ -0,0 +1,178 @@
+'''
+    Serializers used by Renderer.json to turn data into json
+
+    The json module is used unless orjson or ujson are asked for, as they don't give
+    back exactly the same json.
+'''
+import importlib
+import types
+import json
+
+########################
+###   SERIALIZERS
+########################
+
+class JsonSerializer(object):
+    """
+        Turns data into json using the json module
+        Other serializers subclass this and override dumps
+
+        module is the name of the module that must be importable to use this serializer.
+
+        chunks gives back the json in pieces so it can be streamed.
+        Lists, tuples and generators are given back per_chunk items at a time
+        and anything else is given back in one piece.
+
+        separator is what dumps puts between items in a list, so the streamed json
+        is exactly the same as the json from dumps.
+    """
+    module = None
+    per_chunk = 100
+    separator = ', '
+
+    @classmethod
+    def available(kls):
+        """Say whether the module this serializer needs can be imported"""
+        if kls.module is None:
+            return True
+
+        try:
+            importlib.import_module(kls.module)
+        except ImportError:
+            return False
+        return True
+
+    def dumps(self, data):
+        """Return data as a json string or bytes"""
+        return json.dumps(data)
+
+    def chunks(self, data):
+        """Yield data as json in pieces"""
+        if not isinstance(data, (list, tuple, types.GeneratorType)):
+            yield self.dumps(data)
+            return
+
+        # The items are dumped a few at a time and joined as text
+        # So the whole list is never in memory as json
+        yield '['
+        first = True
+        batch = []
+        for item in data:
+            batch.append(self.text(self.dumps(item)))
+            if len(batch) >= self.per_chunk:
+                yield self.join(batch, first)
+                first = False
+                batch = []
+
+        if batch:
+            yield self.join(batch, first)
+        yield ']'
+
+    def join(self, batch, first):
+        """Join a batch of dumped items, with a comma in front unless it's the first batch"""
+        joined = self.separator.join(batch)
+        if first:
+            return joined
+        return '%s%s' % (self.separator, joined)
+
+    def text(self, dumped):
+        """Make sure what dumps gave us is a string"""
+        if isinstance(dumped, bytes):
+            return dumped.decode('utf-8')
+        return dumped
+
+class OrjsonSerializer(JsonSerializer):
+    """Serializer using orjson, which gives back bytes"""
+    module = 'orjson'
+    separator = ','
+
+    def dumps(self, data):
+        import orjson
+        return orjson.dumps(data)
+
+class UjsonSerializer(JsonSerializer):
+    """Serializer using ujson"""
+    module = 'ujson'
+    separator = ','
+
+    def dumps(self, data):
+        import ujson
+        return ujson.dumps(data)
+
+########################
+###   REGISTRY
+########################
+
+class Serializers(object):
+    """
+        Registry of serializers by name
+
+        get with no name gives the first serializer in preferred that can be used.
+        The json module is always available, so there is always one to fall back on.
+
+        preferred is only the json module by default, because orjson and ujson don't give
+        back the same json (no spaces, different floats and escaping). Use prefer to opt in.
+    """
+    def __init__(self, preferred=None):
+        if preferred is None:
+            preferred = ['json']
+
+        self.found = {}
+        self.registered = {}
+        self.preferred = preferred
+
+    def register(self, name, serializer):
+        """Register a Serializer class or instance with this name"""
+        self.registered[name] = serializer
+        self.found.pop(name, None)
+        self.found.pop(None, None)
+
+    def prefer(self, *names):
+        """Use the first of these that is available when get isn't given a name"""
+        self.preferred = list(names)
+        self.found.pop(None, None)
+
+    def available(self, name):
+        """Say whether the serializer with this name is registered and can be used"""
+        serializer = self.registered.get(name)
+        if serializer is None:
+            return False
+        return serializer.available()
+
+    def get(self, name=None):
+        """
+            Return the serializer instance registered with this name
+            Or the first one in preferred that is available if name is None
+
+            If name is already a serializer then it is given back as is.
+        """
+        if name is not None and not isinstance(name, str):
+            return name
+
+        if name not in self.found:
+            self.found[name] = self.find(name)
+        return self.found[name]
+
+    def find(self, name):
+        """Find the serializer for this name"""
+        if name is None:
+            for option in self.preferred:
+                if self.available(option):
+                    return self.get(option)
+            return self.get('json')
+
+        if name not in self.registered:
+            raise KeyError("No serializer registered called %s" % name)
+
+        serializer = self.registered[name]
+        if not serializer.available():
+            raise ImportError("Serializer %s needs %s, which couldn't be imported" % (name, serializer.module))
+
+        if isinstance(serializer, type):
+            serializer = serializer()
+        return serializer
+
+serializers = Serializers()
+serializers.register('json', JsonSerializer)
+serializers.register('ujson', UjsonSerializer)
+serializers.register('orjson', OrjsonSerializer)
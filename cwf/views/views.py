@@ -34,7 +34,15 @@ class LocalOnlyView(View):
         return super(LocalOnlyView, self).execute(target, request, args, kwargs)
 
 class JSView(View):
-    """Convert target output into a json response"""
+    """
+        Convert target output into a json response
+
+        ``serializer`` and ``stream`` are given to
+        :py:meth:`Renderer.json <cwf.views.rendering.Renderer.json>`
+    """
+    stream = False
+    serializer = None
+
     def execute(self, target, request, args, kwargs):
         """
             Assume the result of calling the target returns ``(template, data)``.
@@ -43,4 +51,4 @@ class JSView(View):
         """
         result = super(JSView, self).execute(target, request, args, kwargs)
         template, data = result
-        return self.renderer.json(data)
+        return self.renderer.json(data, serializer=self.serializer, stream=self.stream)
@@ -4,7 +4,7 @@ from noseOfYeti.tokeniser.support import noy_sup_setUp
 from should_dsl import should, should_not
 from django.test import TestCase
 
-from cwf.admin.buttons import ButtonWrap
+from cwf.admin.buttons import ButtonWrap, Button, ButtonGroup, button_permissions
 
 from contextlib import contextmanager
 import fudge
@@ -229,3 +229,16 @@ describe TestCase, "ButtonWrap":
             self.request.has_attr(user=user)
 
             self.wrapper.has_auth(user, auth) |should| be(True)
+
+describe TestCase, "Collecting permissions for buttons":
+    it "finds the permissions in needs_auth for all buttons including those in groups":
+        buttons = [
+              Button('one', 'One', needs_auth='app.one')
+            , Button('two', 'Two', needs_auth=True)
+            , ButtonGroup('group'
+                , [ Button('three', 'Three', needs_auth=['app.three', 'app.one'])
+                  , Button('four', 'Four')
+                  ]
+                )
+            ]
+        button_permissions(buttons) |should| equal_to(frozenset(['app.one', 'app.three']))
@@ -0,0 +1,97 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+
+from cwf.sections.errors import ConfigurationError
+from cwf.sections.pattern_list import PatternList
+from cwf.sections.section import Section
+
+# Make the errors go away
+be, equal_to, throw = None, None, None
+
+def view(request):
+    pass
+
+describe TestCase, "Adding many sections":
+    before_each:
+        self.root = Section('').configure(kls="Views", display=False, propogate_display=False)
+
+    def urls(self, section):
+        return [item.section.url for item in section.children]
+
+    it "adds a section for each row in order":
+        sections = self.root.add_many(['one', dict(url='two', name='second'), 'three'])
+
+        [section.url for section in sections] |should| equal_to(['one', 'two', 'three'])
+        self.urls(self.root) |should| equal_to(['one', 'two', 'three'])
+        sections[1].name |should| equal_to('second')
+        for section in sections:
+            section.parent |should| be(self.root)
+
+    it "gives children the same options as add and configure would":
+        added = Section('').configure(kls="Views", display=False, propogate_display=False)
+        expected = added.add('one').configure(target='thing', catch_all=True)
+        many, = self.root.add_many(['one'], target='thing', catch_all=True)
+
+        for name in ('kls', 'target', 'catch_all', 'display', 'alias', 'match', 'propogate_display'):
+            getattr(many.options, name) |should| equal_to(getattr(expected.options, name))
+
+    it "uses options from each row on top of the shared options":
+        one, two = self.root.add_many(
+              [dict(url='one', alias='First', match='first', target='other'), 'two']
+            , target='thing'
+            )
+
+        one.options.alias |should| equal_to('First')
+        one.options.match |should| equal_to('first')
+        one.options.target |should| equal_to('other')
+        two.alias |should| equal_to('Two')
+        two.options.match |should| be(None)
+        two.options.target |should| equal_to('thing')
+
+    it "only checks shared options once and still complains about them":
+        (lambda: self.root.add_many(['one'], display='yes')) |should| throw(ConfigurationError)
+        (lambda: self.root.add_many(['one'], nope=True)) |should| throw(ConfigurationError)
+        (lambda: self.root.add_many([dict(url='one', nope=True)])) |should| throw(ConfigurationError)
+        (lambda: self.root.add_many([dict(name='one')])) |should| throw(ConfigurationError)
+
+    it "derives alias and match from callables":
+        titles = dict(one='First', two='Second')
+        one, two = self.root.add_many(['one', 'two'], alias=lambda row: titles[row], match=lambda row: "%s_id" % row)
+        one.alias |should| equal_to('First')
+        two.options.match |should| equal_to('two_id')
+
+    it "only derives alias and match when they are used if defer is True":
+        called = []
+        def alias(row):
+            called.append(row)
+            return row.upper()
+
+        one, two = self.root.add_many(['one', 'two'], alias=alias, defer=True)
+        called |should| equal_to([])
+
+        two.alias |should| equal_to('TWO')
+        two.alias |should| equal_to('TWO')
+        called |should| equal_to(['two'])
+
+        # Deferred values are also worked out for clones
+        one.options.clone(all=True).alias |should| equal_to('ONE')
+        called |should| equal_to(['two', 'one'])
+
+    it "makes the same patterns as adding them one at a time":
+        added = Section('').configure(kls="Views")
+        for url in ('one', 'two'):
+            added.add(url).configure(target=view)
+
+        root = Section('').configure(kls="Views")
+        root.add_many(['one', 'two'], target=view)
+
+        [tpl[0] for tpl in PatternList(root)] |should| equal_to([tpl[0] for tpl in PatternList(added)])
+
+    it "forgets remembered patterns once":
+        self.root.add('zero').configure(target=view)
+        list(PatternList(self.root))
+        self.root.add_many(['one'], target=view)
+        self.urls(self.root) |should| equal_to(['zero', 'one'])
+        len(list(PatternList(self.root))) |should| equal_to(2)
@@ -0,0 +1,37 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+
+from cwf.sections.caching import LRUCache
+
+# Make the errors go away
+be, equal_to = None, None
+
+describe TestCase, "LRUCache":
+    it "remembers values":
+        cache = LRUCache()
+        cache.get('one') |should| be(None)
+        cache.get('one', 'default') |should| equal_to('default')
+
+        cache.set('one', 1)
+        cache.get('one') |should| be(1)
+        ('one' in cache) |should| be(True)
+
+        cache.delete('one')
+        ('one' in cache) |should| be(False)
+
+    it "forgets the least recently used values":
+        cache = LRUCache(max_entries=2)
+        cache.set('one', 1)
+        cache.set('two', 2)
+        cache.get('one')
+        cache.set('three', 3)
+
+        len(cache) |should| be(2)
+        ('one' in cache) |should| be(True)
+        ('two' in cache) |should| be(False)
+        ('three' in cache) |should| be(True)
+
+        cache.clear()
+        len(cache) |should| be(0)
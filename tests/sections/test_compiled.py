@@ -0,0 +1,116 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+
+from cwf.sections.errors import ConfigurationError
+from cwf.sections.compiled import CompiledTree
+from cwf.sections.section import Section
+
+# Make the errors go away
+be, equal_to, contain = None, None, None
+
+describe TestCase, "CompiledTree":
+    before_each:
+        self.root = Section('')
+        self.root.first(name="home")
+
+        self.one = self.root.add('one')
+        self.one_a = self.one.add('a')
+        self.one_b = self.one.add('b')
+
+        self.promoted = self.root.add('promoted').configure(promote_children=True)
+        self.promoted_a = self.promoted.add('pa')
+        self.hidden = self.promoted.add('hidden')
+        self.promoted._children[-1].consider_for_menu = False
+
+        self.nested = self.promoted.add('nested').configure(promote_children=True)
+        self.nested_a = self.nested.add('na')
+
+        self.two = self.root.add('/two')
+
+    def menu_sections(self, items):
+        return [item.section for item in items]
+
+    def all_sections(self, section):
+        result = [section]
+        for item in section.children:
+            result.extend(self.all_sections(item.section))
+        return result
+
+    it "gives every section in the tree an index in the order the tree iterates":
+        compiled = CompiledTree(self.root)
+        list(compiled.sections) |should| equal_to(self.all_sections(self.root))
+        for index, section in enumerate(compiled.sections):
+            compiled.index_of(section) |should| be(index)
+
+    it "records the index of each parent":
+        compiled = CompiledTree(self.root)
+        compiled.parents[compiled.index_of(self.root)] |should| be(None)
+        compiled.parent_of(self.one_a) |should| be(self.one)
+        compiled.parent_of(self.nested_a) |should| be(self.nested)
+
+    it "has the same children and menu_children as the live tree":
+        expected = {}
+        for section in self.all_sections(self.root):
+            expected[section] = (list(section.children), list(section.menu_children), section.has_children)
+
+        compiled = CompiledTree(self.root)
+        for section, (children, menu_children, has_children) in expected.items():
+            index = compiled.index_of(section)
+            list(compiled.children[index]) |should| equal_to(children)
+            list(compiled.menu_children[index]) |should| equal_to(menu_children)
+            compiled.has_children[index] |should| be(has_children)
+
+    it "expands promoted children":
+        compiled = CompiledTree(self.root)
+        menu_children = compiled.menu_children[compiled.index_of(self.root)]
+        self.menu_sections(menu_children) |should| equal_to(
+            [self.root._base.section, self.one, self.promoted_a, self.nested_a, self.two]
+            )
+
+    it "knows the request independent url parts for each section":
+        compiled = CompiledTree(self.root)
+        compiled.url_parts[compiled.index_of(self.root)] |should| equal_to(('', ))
+        compiled.url_parts[compiled.index_of(self.one_b)] |should| equal_to(('', 'one', 'b'))
+        compiled.url_parts[compiled.index_of(self.two)] |should| equal_to(('', 'two'))
+
+    describe "Freezing a section":
+        it "gives the compiled tree to every section in the tree":
+            compiled = self.one_a.freeze()
+            compiled.root |should| be(self.root)
+            for section in self.all_sections(self.root):
+                section.compiled |should| be(compiled)
+
+        it "uses the compiled tree for children and menu_children":
+            compiled = self.root.freeze()
+            list(self.root.menu_children) |should| equal_to(list(compiled.menu_children[0]))
+            list(self.one.children) |should| equal_to(list(compiled.children[compiled.index_of(self.one)]))
+            self.one_a.has_children |should| be(False)
+            self.one_a.root_ancestor() |should| be(self.root)
+
+        it "complains if a frozen section is changed":
+            self.root.freeze()
+            with self.assertRaises(ConfigurationError):
+                self.one.add('c')
+
+            with self.assertRaises(ConfigurationError):
+                self.one.configure(alias="blah")
+
+            with self.assertRaises(ConfigurationError):
+                self.one.adopt(Section('other'))
+
+            with self.assertRaises(ConfigurationError):
+                self.one.merge(Section('other'))
+
+            with self.assertRaises(ConfigurationError):
+                self.one.url = 'other'
+
+        it "can still copy frozen sections into a tree that isn't frozen":
+            self.root.freeze()
+            other = Section('other')
+            other.copy(self.one)
+
+            copied = list(other.children)[0].section
+            copied.compiled |should| be(None)
+            [item.section.url for item in copied.children] |should| equal_to(['a', 'b'])
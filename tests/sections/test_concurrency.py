@@ -0,0 +1,162 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+
+from cwf.sections.concurrency import ValuesPool
+from cwf.sections import concurrency
+from cwf.sections.section import Section
+from cwf.sections.values import Values
+from cwf.views.menu import Menu
+
+import threading
+import asyncio
+import time
+
+# Make the errors go away
+be, equal_to = None, None
+
+def slow(delay, found):
+    """Values callable that takes delay seconds to give found"""
+    def values(info):
+        time.sleep(delay)
+        return found
+    return values
+
+def slow_coroutine(delay, found):
+    """Coroutine version of slow"""
+    async def values(info):
+        await asyncio.sleep(delay)
+        return found
+    return values
+
+def failing(info):
+    raise ValueError("nope")
+
+class Connections(object):
+    """Records which threads closed their database connections"""
+    def __init__(self):
+        self.closed = []
+
+    def close_all(self):
+        self.closed.append(threading.current_thread().name)
+
+describe TestCase, "ValuesPool":
+    before_each:
+        self.pool = ValuesPool(max_workers=4)
+        self.info = (None, [''], [''])
+
+    after_each:
+        self.pool.shutdown()
+
+    it "finds values for every job at the same time":
+        jobs = [
+              (Values(slow(0.2, ['a', 'b']), sorter=True), self.info)
+            , (Values(slow(0.2, ['c'])), self.info)
+            , (Values(slow_coroutine(0.2, ['d'])), self.info)
+            , (Values(slow_coroutine(0.2, ['e'])), self.info)
+            ]
+
+        started = time.monotonic()
+        self.pool.evaluate(jobs) |should| equal_to([[('a', 'a'), ('b', 'b')], [('c', 'c')], [('d', 'd')], [('e', 'e')]])
+        (time.monotonic() - started < 0.6) |should| be(True)
+
+    it "uses the fallback when values take too long":
+        jobs = [
+              (Values(slow(1, ['a']), timeout=0.1, fallback=[('fallback', 'Fallback')]), self.info)
+            , (Values(slow_coroutine(1, ['b']), timeout=0.1, fallback=lambda info: [('later', 'Later')]), self.info)
+            , (Values(slow(1, ['c'])), self.info)
+            , (Values(['d']), self.info)
+            ]
+
+        pool = ValuesPool(timeout=0.1)
+        started = time.monotonic()
+        pool.evaluate(jobs) |should| equal_to([[('fallback', 'Fallback')], [('later', 'Later')], [], [('d', 'd')]])
+        (time.monotonic() - started < 0.5) |should| be(True)
+        pool.shutdown(wait=False)
+
+    it "doesn't queue values behind workers that are still finding values that timed out":
+        pool = ValuesPool(max_workers=1)
+        busy = [('busy', 'Busy')]
+        stuck = (Values(slow(0.5, ['a']), timeout=0.1, fallback=busy), self.info)
+        quick = (Values(slow(0, ['b']), timeout=0.2, fallback=busy), self.info)
+        coroutine = (Values(slow_coroutine(0, ['c']), timeout=0.2, fallback=busy), self.info)
+
+        pool.evaluate([stuck]) |should| equal_to([busy])
+
+        started = time.monotonic()
+        pool.evaluate([quick, coroutine]) |should| equal_to([busy, busy])
+        (time.monotonic() - started < 0.1) |should| be(True)
+
+        time.sleep(0.5)
+        pool.evaluate([quick]) |should| equal_to([[('b', 'b')]])
+        pool.evaluate([coroutine]) |should| equal_to([[('c', 'c')]])
+        pool.shutdown()
+
+    it "only waits as long as the longest timeout for coroutines":
+        jobs = [
+              (Values(slow_coroutine(1, ['a']), timeout=0.1, fallback=[('one', 'One')]), self.info)
+            , (Values(slow_coroutine(1, ['b']), timeout=0.2, fallback=[('two', 'Two')]), self.info)
+            ]
+
+        started = time.monotonic()
+        self.pool.evaluate(jobs) |should| equal_to([[('one', 'One')], [('two', 'Two')]])
+        (time.monotonic() - started < 0.5) |should| be(True)
+
+    it "closes database connections in the workers when they are done":
+        recorded = Connections()
+        original = concurrency.connections
+        concurrency.connections = recorded
+        try:
+            jobs = [
+                  (Values(slow(0, ['a'])), self.info)
+                , (Values(slow_coroutine(0, ['b'])), self.info)
+                ]
+            self.pool.evaluate(jobs) |should| equal_to([[('a', 'a')], [('b', 'b')]])
+        finally:
+            concurrency.connections = original
+
+        len(recorded.closed) |should| be(2)
+        all(name.startswith('cwf-values') for name in recorded.closed) |should| be(True)
+        self.pool.busy |should| be(0)
+
+    it "uses the fallback when values fail and complains if there isn't one":
+        self.pool.evaluate([(Values(failing, fallback=[('a', 'A')]), self.info)]) |should| equal_to([[('a', 'A')]])
+
+        with self.assertRaises(Exception):
+            self.pool.evaluate([(Values(failing), self.info)])
+
+    it "runs coroutine values to completion when not used by a pool":
+        list(Values(slow_coroutine(0, ['b', 'a']), sorter=True).get_info(*self.info)) |should| equal_to([('a', 'a'), ('b', 'b')])
+
+    it "remembers values from coroutines in the values cache":
+        called = []
+        async def values(info):
+            called.append(info)
+            return ['a']
+
+        jobs = [(Values(values, cache=True), self.info)]
+        self.pool.evaluate(jobs) |should| equal_to([[('a', 'a')]])
+        self.pool.evaluate(jobs) |should| equal_to([[('a', 'a')]])
+        len(called) |should| be(1)
+
+    describe "In a menu":
+        it "finds the values for each level of the menu at the same time":
+            root = Section('').configure(promote_children=True)
+            for index, name in enumerate(('one', 'two', 'three')):
+                root.add('[a-z]{%d,}' % index).configure(values=Values(slow(0.2, [name])))
+
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+
+            started = time.monotonic()
+            expected = [info.alias for info in Menu(request, root).global_nav()]
+            (time.monotonic() - started >= 0.6) |should| be(True)
+
+            started = time.monotonic()
+            menu = Menu(request, root, values_pool=self.pool)
+            [info.alias for info in menu.global_nav()] |should| equal_to(expected)
+            (time.monotonic() - started < 0.4) |should| be(True)
+            expected |should| equal_to(['one', 'two', 'three'])
@@ -0,0 +1,103 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+
+from cwf.sections.conditionals import Batch, Conditionals, conditionals_for
+from cwf.sections.errors import ConfigurationError
+from cwf.sections.section import Section
+from cwf.views.menu import Menu
+
+# Make the errors go away
+be, equal_to = None, None
+
+describe TestCase, "Conditionals":
+    before_each:
+        self.request = RequestFactory().get('/one/two/')
+        self.request.user = AnonymousUser()
+
+        self.called = []
+        def recorder(name, result=True):
+            def conditional(request):
+                self.called.append(name)
+                return result
+            return conditional
+        self.recorder = recorder
+
+    it "gives back the same Conditionals for a request":
+        conditionals = conditionals_for(self.request)
+        conditionals_for(self.request) |should| be(conditionals)
+
+        other = RequestFactory().get('/')
+        conditionals_for(other) |should_not| be(conditionals)
+
+    it "only calls each conditional once per request":
+        root = Section('')
+        one = root.add('one').configure(active=self.recorder('one active'))
+        two = one.add('two').configure(exists=self.recorder('two exists'))
+
+        for _ in range(3):
+            two.reachable(self.request) |should| be(True)
+            one.reachable(self.request) |should| be(True)
+        sorted(self.called) |should| equal_to(['one active', 'one active', 'two exists'])
+
+        # one active is passed on to two when it's configured
+        other = RequestFactory().get('/')
+        other.user = AnonymousUser()
+        two.reachable(other) |should| be(True)
+        len(self.called) |should| be(6)
+
+    it "shares results between Section.reachable and menus":
+        root = Section('')
+        root.add('one').configure(display=self.recorder('display'), active=self.recorder('active'))
+
+        menu = Menu(self.request, root)
+        [info.alias for info in menu.global_nav() if info.display()] |should| equal_to(['One'])
+        list(root.menu_children)[0].section.reachable(self.request) |should| be(True)
+        sorted(self.called) |should| equal_to(['active', 'display'])
+
+    describe "Batch conditionals":
+        before_each:
+            self.batches = []
+            def visible(request, sections):
+                self.batches.append(list(sections))
+                return [section for section in sections if section.url != 'hidden']
+            self.batch = Batch(visible)
+
+        it "decides the conditional for a whole menu level with one call":
+            root = Section('')
+            one = root.add('one').configure(display=self.batch)
+            hidden = root.add('hidden').configure(display=self.batch)
+            two = root.add('two').configure(display=self.batch)
+
+            menu = Menu(self.request, root)
+            [info.alias for info in menu.global_nav() if info.display()] |should| equal_to(['One', 'Two'])
+            self.batches |should| equal_to([[one, hidden, two]])
+
+        it "can return a dictionary of answers":
+            section = Section('thing').configure(exists=Batch(lambda request, sections: {sections[0]: False}))
+            section.reachable(self.request) |should| be(False)
+
+        it "decides just the one section when asked outside of a menu":
+            section = Section('one').configure(active=self.batch)
+            section.reachable(self.request) |should| be(True)
+            self.batches |should| equal_to([[section]])
+
+        it "complains if decided without a section":
+            section = Section('one').configure(active=self.batch)
+            with self.assertRaises(ConfigurationError):
+                section.options.conditional('active', self.request)
+
+        it "complains if not given a callable":
+            with self.assertRaises(ConfigurationError):
+                Batch(True)
+
+        it "only calls each Batch once for all the sections it's primed with":
+            sections = [Section(str(index)).configure(active=self.batch) for index in range(5)]
+            conditionals = Conditionals(self.request)
+            conditionals.prime(sections)
+            conditionals.prime(sections)
+            [conditionals.get('active', section) for section in sections] |should| equal_to([True] * 5)
+            self.batches |should| equal_to([sections])
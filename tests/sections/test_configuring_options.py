@@ -34,6 +34,7 @@ describe TestCase, "Configuring Options":
 
             # Pattern stuff
             , ('catch_all', False)
+            , ('direct', False)
 
             # menu stuff
             , ('alias',  None)
@@ -47,9 +48,7 @@ describe TestCase, "Configuring Options":
     it "has default values":
         options = Options()
         keys = [k for k, _ in self.defaults]
-        existing = [k for k, v in options.__dict__.items() if
-            not k.startswith("_") and not callable(v)
-        ]
+        existing = list(Options.fields)
 
         # Make sure we haven't missed any keys
         sorted(keys) |should| equal_to(sorted(existing))
@@ -68,7 +67,7 @@ describe TestCase, "Configuring Options":
                   Options.set_view.im_func : ('kls', 'module', 'target', 'redirect', 'extra_context')
                 , Options.set_menu.im_func : ('alias', 'match', 'values', 'needs_auth', 'propogate_display', 'promote_children')
                 , Options.set_urlname.im_func : ('app_name', 'namespace')
-                , Options.set_urlpattern.im_func : ('catch_all', )
+                , Options.set_urlpattern.im_func : ('catch_all', 'direct')
                 , Options.set_conditionals.im_func : ('admin', 'active', 'exists', 'display')
                 }
 
@@ -342,3 +341,9 @@ describe TestCase, "Configuring Options":
                     options = Options()
                     self.setter(options, catch_all=catch_all)
                     options.catch_all |should| be(catch_all)
+
+                it "sets direct":
+                    direct = fudge.Fake("direct")
+                    options = Options()
+                    self.setter(options, direct=direct)
+                    options.direct |should| be(direct)
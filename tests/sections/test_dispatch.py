@@ -5,6 +5,12 @@ from should_dsl import should, should_not
 from django.test import TestCase
 
 from cwf.sections.dispatch import Dispatcher, dispatcher
+from cwf.sections.errors import ConfigurationError
+from cwf.sections.section import Section
+from cwf.views.base import View
+
+import sys
+import os
 
 import fudge
 
@@ -37,26 +43,41 @@ describe TestCase, "Dispatcher":
     describe "Finding a view":
         before_each:
             self.dispatcher = Dispatcher()
+            self.broken = os.path.join(os.path.dirname(__file__), 'broken_views.py')
 
         it "returns location if not a string":
             for location in (fudge.Fake("location"), lambda: 1):
                 self.dispatcher.find_view(location) |should| be(location)
 
-        @fudge.patch("__builtin__.locals", "__builtin__.globals", "__builtin__.__import__")
-        it "using __import__ to find the view if location is a string", fake_locals, fake_globals, fake_import:
-            kls = fudge.Fake('kls')
-            view = fudge.Fake("view")
-            lcls = fudge.Fake("locals")
-            glbls = fudge.Fake("globals")
-            module = fudge.Fake("module")
-            module.name = kls
+        it "imports the module and makes an instance of the kls if location is a string":
+            view = self.dispatcher.find_view("cwf.views.base.View")
+            type(view) |should| be(View)
+            self.dispatcher.resolved |should| equal_to({"cwf.views.base.View" : ("cwf.views.base", ("View", ))})
+
+        it "finds nested attributes after the module":
+            self.dispatcher.resolve("cwf.views.base.View.get_state") |should| be(View.get_state)
+            self.dispatcher.resolved["cwf.views.base.View.get_state"] |should| equal_to(("cwf.views.base", ("View", "get_state")))
+
+        it "uses the module and attributes it already found for a location":
+            self.dispatcher.resolved["somewhere.Thing"] = ("cwf.views.base", ("View", ))
+            self.dispatcher.resolve("somewhere.Thing") |should| be(View)
 
-            kls.expects_call().returns(view)
-            fake_locals.expects_call().returns(lcls)
-            fake_globals.expects_call().returns(glbls)
-            fake_import.expects_call().with_args("path.to.place", glbls, lcls, ['name'], -1).returns(module)
+        it "complains if the location can't be found":
+            for location in ("nonexistant.module.Kls", "Kls", "cwf.views.base.Missing"):
+                with self.assertRaises((ImportError, AttributeError)):
+                    self.dispatcher.find_view(location)
 
-            self.dispatcher.find_view("path.to.place.name") |should| be(view)
+        it "doesn't hide errors from inside the module":
+            sys.modules.pop("tests.sections.broken_views", None)
+            with open(self.broken, 'w') as fle:
+                fle.write("import this_module_does_not_exist\nclass Kls(object): pass\n")
+
+            try:
+                with self.assertRaises(ImportError) as error:
+                    self.dispatcher.find_view("tests.sections.broken_views.Kls")
+                error.exception.name |should| equal_to("this_module_does_not_exist")
+            finally:
+                os.remove(self.broken)
 
     describe "Calling the dispatcher":
         before_each:
@@ -88,13 +109,75 @@ describe TestCase, "Dispatcher":
             result |should| be(self.result)
 
         @fudge.test
-        it "sets view and target on the dispatcher":
+        it "doesn't set view or target on the dispatcher":
             self.view.expects_call()
             self.fake_get_view .expects_call().returns(self.view)
 
+            self.dispatcher(self.request, self.kls, self.target)
             self.dispatcher |should_not| respond_to("view")
             self.dispatcher |should_not| respond_to("target")
+            self.dispatcher.__name__ |should| equal_to("dispatch")
 
-            self.dispatcher(self.request, self.kls, self.target)
-            self.dispatcher.view |should| be(self.view)
-            self.dispatcher.target |should| be(self.target)
+    describe "Warming":
+        before_each:
+            self.made = []
+            made = self.made
+
+            class View(object):
+                def __init__(self):
+                    made.append(self.__class__.__name__)
+
+                def __call__(self, request, target):
+                    return target
+
+            self.View = View
+            self.dispatcher = Dispatcher()
+
+        def found(self, kls):
+            """Make a find_view that knows about these views"""
+            def find_view(location):
+                if location not in kls:
+                    raise ImportError("No %s" % location)
+                return kls[location]()
+            self.dispatcher.find_view = find_view
+
+        it "finds every kls used by the sections":
+            root = Section('').configure(module='app.views', kls='Views', target='index')
+            root.add('one').configure(target='one')
+            root.add('two').configure(kls='Other', target='two')
+            root.add('three').configure(target=lambda request: None)
+            root.add('four').configure(redirect='/one/')
+            self.dispatcher.locations(root) |should| equal_to(['app.views.Views', 'app.views.Other'])
+
+        it "makes the view for every kls before it is used":
+            self.found({'app.views.Views' : self.View, 'app.views.Other' : self.View})
+            root = Section('').configure(module='app.views', kls='Views', target='index')
+            root.add('two').configure(kls='Other', target='two')
+
+            self.dispatcher.warm(root) |should| equal_to({})
+            self.made |should| equal_to(['View', 'View'])
+
+            self.dispatcher(None, 'app.views.Views', 'index') |should| equal_to('index')
+            len(self.made) |should| be(2)
+
+        it "can find views in parallel":
+            kls = dict(('app.views.View%s' % index, self.View) for index in range(10))
+            self.found(kls)
+            root = Section('')
+            for location in kls:
+                root.add(location.split('.')[-1]).configure(kls=location, target='index')
+
+            self.dispatcher.warm(root, parallel=True, max_workers=4) |should| equal_to({})
+            len(self.made) |should| be(10)
+
+        it "reports views that can't be found":
+            self.found({'app.views.Views' : self.View})
+            root = Section('').configure(module='app.views', kls='Views', target='index')
+            root.add('two').configure(kls='Missing', target='two')
+
+            with self.assertRaises(ConfigurationError):
+                self.dispatcher.warm(root)
+
+            failures = self.dispatcher.warm(root, complain=False)
+            list(failures.keys()) |should| equal_to(['app.views.Missing'])
+            type(failures['app.views.Missing']) |should| be(ImportError)
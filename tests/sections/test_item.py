@@ -4,7 +4,7 @@ from noseOfYeti.tokeniser.support import noy_sup_setUp
 from should_dsl import should
 from django.test import TestCase
 
-from cwf.sections.section import Item
+from cwf.sections.section import Item, Section, Mount
 
 import fudge
 
@@ -33,14 +33,13 @@ describe TestCase, "Item":
             Item.create.im_func(fakeItem, self.section, options) |should| be(item)
 
     describe "Creating clone":
-        it "clones the section, merges clone with old section and returns new Item with it":
-            parent = fudge.Fake("parent")
-            cloned_section = (fudge.Fake("cloned_section")
-                .expects("merge").with_args(self.section, take_base=True)
-                )
-            self.section.expects("clone").with_args(parent=parent).returns(cloned_section)
-
-            item = self.item.clone(parent=parent)
-            item.section |should| be(cloned_section)
+        it "mounts the section under the parent and returns new Item with it":
+            section = Section('one')
+            parent = Section('two')
+            item = Item(section, self.consider_for_menu, self.include_as).clone(parent=parent)
+
+            item.section.__class__ |should| be(Mount)
+            item.section.source |should| be(section)
+            item.section.parent |should| be(parent)
             item.include_as |should| be(self.include_as)
             item.consider_for_menu |should| be(self.consider_for_menu)
@@ -0,0 +1,117 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+
+from cwf.sections.section import Section, Mount
+from cwf.sections.pattern_list import PatternList
+
+# Make the errors go away
+be, equal_to, contain = None, None, None
+
+def view(request):
+    pass
+
+describe TestCase, "Mount":
+    before_each:
+        self.help = Section('help').configure(target=view, alias="Help")
+        self.faq = self.help.add('faq').configure(target=view)
+        self.faq.add('one').configure(target=view)
+
+        self.root = Section('').configure(promote_children=True)
+        self.a = self.root.add('a').configure(target=view)
+        self.b = self.root.add('b').configure(target=view)
+        self.a.copy(self.help)
+        self.b.adopt(self.help, clone=True)
+
+    def mount_in(self, section):
+        return list(section.children)[0].section
+
+    def patterns(self, section):
+        return sorted(tpl[0] for tpl in PatternList(section))
+
+    it "shares the section instead of copying it":
+        mount = self.mount_in(self.a)
+        mount.__class__ |should| be(Mount)
+        mount.source |should| be(self.help)
+        mount.shared |should| be(True)
+        mount.parent |should| be(self.a)
+        mount.url |should| equal_to('help')
+        mount.options.alias |should| equal_to('Help')
+
+        # Children are mounted under the mount the first time they are looked at
+        mount._mounted |should| equal_to({})
+        faq = self.mount_in(mount)
+        faq.source |should| be(self.faq)
+        faq.parent |should| be(mount)
+        self.mount_in(mount) |should| be(faq)
+
+    it "makes url patterns for every place it is mounted":
+        self.patterns(self.root) |should| equal_to([
+              '^a/$', '^a/help/$', '^a/help/faq/$', '^a/help/faq/one/$'
+            , '^b/$', '^b/help/$', '^b/help/faq/$', '^b/help/faq/one/$'
+            ])
+
+        one = self.mount_in(self.mount_in(self.mount_in(self.b)))
+        one.reverse() |should| equal_to('/b/help/faq/one/')
+
+    it "takes it's own copy when it is changed":
+        mount = self.mount_in(self.a)
+        faq = self.mount_in(mount)
+        mount.configure(alias="Other").add('extra').configure(target=view)
+
+        mount.shared |should| be(False)
+        mount.options.alias |should| equal_to('Other')
+        self.help.options.alias |should| equal_to('Help')
+        self.mount_in(mount) |should| be(faq)
+        faq.shared |should| be(True)
+
+        self.patterns(self.a) |should| contain('^a/help/extra/$')
+        self.patterns(self.b) |should_not| contain('^b/help/extra/$')
+        self.patterns(self.help) |should_not| contain('^help/extra/$')
+
+    it "doesn't see changes made to the original after it was copied":
+        mount = self.mount_in(self.a)
+        self.faq.configure(alias="Questions").add('two').configure(target=view)
+        self.help.add('new').configure(target=view)
+
+        self.patterns(self.a) |should| equal_to(['^a/$', '^a/help/$', '^a/help/faq/$', '^a/help/faq/one/$'])
+        self.mount_in(mount).options.alias |should| be(None)
+        self.patterns(self.help) |should| contain('^help/faq/two/$')
+
+    it "keeps a copy of a copy independent of the original":
+        first = self.mount_in(self.a)
+        other = Section('other')
+        other.copy(first)
+        second = self.mount_in(other)
+        second.source |should| be(self.help)
+
+        self.help.configure(alias='CHANGED')
+        self.help.add('new').configure(target=view)
+
+        for mount in (first, second):
+            mount.alias |should| equal_to('Help')
+            [item.section.url for item in mount.children] |should| equal_to(['faq'])
+
+    it "makes new url patterns when the url of the original or a mount is changed":
+        mount = self.mount_in(self.a)
+        self.patterns(self.a) |should| contain('^a/help/faq/$')
+
+        self.faq.url = 'questions'
+        self.patterns(self.help) |should| contain('^help/questions/$')
+        self.patterns(self.a) |should| contain('^a/help/faq/$')
+
+        mount.url = 'support'
+        self.patterns(self.a) |should| contain('^a/support/faq/$')
+        self.help.url |should| equal_to('help')
+
+    it "shares the children of merged sections":
+        merged = Section('merged').merge(self.help)
+        [item.section.source for item in merged.children] |should| equal_to([self.faq])
+        self.patterns(merged) |should| contain('^merged/faq/one/$')
+
+    it "can be frozen":
+        compiled = self.root.freeze()
+        len(compiled) |should| be(9)
+        self.mount_in(self.a) |should_not| be(self.mount_in(self.b))
+        self.mount_in(self.a).compiled |should| be(compiled)
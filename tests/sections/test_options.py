@@ -5,11 +5,13 @@ from should_dsl import should, should_not
 from django.test import TestCase
 
 from cwf.sections.errors import ConfigurationError
-from cwf.sections.options import Options
+from cwf.sections.options import Options, Deferred
 
 from django.http import Http404
 import fudge
+import pickle
 import uuid
+import copy
 
 # Make the errors go away
 be, equal_to, throw, be_thrown_by = None, None, None, None
@@ -136,14 +138,14 @@ describe TestCase, "Options":
 
         @fudge.test
         it "returns False if not conditional(exists)":
-            self.fake_conditional.expects_call().with_args('exists', self.request).returns(False)
+            self.fake_conditional.expects_call().with_args('exists', self.request, section=None).returns(False)
             self.options.reachable(self.request) |should| be(False)
 
         @fudge.test
         it "returns False if not conditional(active)":
             (self.fake_conditional.expects_call()
-                .with_args('exists', self.request).returns(True)
-                .next_call().with_args('active', self.request).returns(False)
+                .with_args('exists', self.request, section=None).returns(True)
+                .next_call().with_args('active', self.request, section=None).returns(False)
                 )
             self.options.reachable(self.request) |should| be(False)
 
@@ -151,8 +153,8 @@ describe TestCase, "Options":
         it "returns whether self.has_permissions if both exists and active":
             permissions = fudge.Fake("permissions")
             (self.fake_conditional.expects_call()
-                .with_args('exists', self.request).returns(True)
-                .next_call().with_args('active', self.request).returns(True)
+                .with_args('exists', self.request, section=None).returns(True)
+                .next_call().with_args('active', self.request, section=None).returns(True)
                 )
 
             self.request.user = self.user
@@ -163,7 +165,6 @@ describe TestCase, "Options":
         before_each:
             self.options = Options()
 
-        @fudge.test
         it "passes on everything set by the setters if all is True":
             keys = []
             for _, requirements in self.options.setters():
@@ -175,31 +176,60 @@ describe TestCase, "Options":
                 setattr(self.options, requirement, next)
                 kwargs[requirement] = next
 
-            cloned = fudge.Fake("cloned").expects("set_everything").with_args(**kwargs)
-            fakeOptions = fudge.Fake("Options").expects_call().returns(cloned)
-            with fudge.patched_context("cwf.sections.options", "Options", fakeOptions):
-                self.options.clone(all=True) |should| be(cloned)
+            cloned = self.options.clone(all=True)
+            for requirement in keys:
+                getattr(cloned, requirement) |should| be(kwargs[requirement])
 
-        @fudge.test
         it "passes on everything set by the setters except for alias, match, values, target, propogate_display and promote_children if all is False":
             keys = []
             for _, requirements in self.options.setters():
                 keys.extend(requirements)
 
             kwargs = {}
+            hidden = ('alias', 'match', 'values', 'redirect', 'promote_children', 'target', 'propogate_display')
+            for requirement in keys:
+                next = fudge.Fake(requirement)
+                if requirement == 'propogate_display':
+                    next = True
+                setattr(self.options, requirement, next)
+                kwargs[requirement] = next
+
+            cloned = self.options.clone(all=False)
             for requirement in keys:
-                if requirement not in (
-                      'alias', 'match', 'values', 'redirect'
-                    , 'promote_children', 'target', 'propogate_display'
-                    ):
-                    next = fudge.Fake(requirement)
-                    setattr(self.options, requirement, next)
-                    kwargs[requirement] = next
-
-            cloned = fudge.Fake("cloned").expects("set_everything").with_args(**kwargs)
-            fakeOptions = fudge.Fake("Options").expects_call().returns(cloned)
-            with fudge.patched_context("cwf.sections.options", "Options", fakeOptions):
-                self.options.clone(all=False) |should| be(cloned)
+                if requirement in hidden:
+                    getattr(cloned, requirement) |should| equal_to(Options.default_values[requirement])
+                else:
+                    getattr(cloned, requirement) |should| be(kwargs[requirement])
+
+        it "doesn't copy anything until the original or clone is changed":
+            self.options.set_everything(alias='one', kls='Kls', needs_auth=True)
+            own = self.options._own
+
+            cloned = self.options.clone(all=True)
+            cloned.clone(all=True)._base[1] |should| be(cloned._own)
+            cloned._base[1] |should| be(own)
+
+            self.options.set_everything(kls='Other', target='two')
+            self.options._own |should_not| be(own)
+            self.options.kls |should| equal_to('Other')
+
+            cloned.kls |should| equal_to('Kls')
+            cloned.alias |should| equal_to('one')
+            cloned.target |should| be(None)
+            cloned.needs_auth |should| be(True)
+
+        it "doesn't change the clone of a clone when the original changes":
+            self.options.set_everything(kls='Kls', display=False)
+            grandchild = self.options.clone().clone(active=False)
+            self.options.set_everything(kls='Other', display=True)
+
+            grandchild.kls |should| equal_to('Kls')
+            grandchild.display |should| be(False)
+            grandchild.active |should| be(False)
+
+        it "only inspects the setters once":
+            Options.setter_signatures() |should| be(Options.setter_signatures())
+            Options().setter_signatures() |should| be(Options.setter_signatures())
 
         it "original doesn't get affected if clone is modified":
             keys = []
@@ -259,6 +289,36 @@ describe TestCase, "Options":
                 total_clone.display |should_not| be(display)
                 total_clone.propogate_display |should| be(False)
 
+    describe "Copying":
+        it "can be copied and pickled without changing the original":
+            original = Options()
+            original.alias = "Original"
+            original.needs_auth = "app.perm"
+            options = original.inherit(target="show")
+
+            for copied in (copy.copy(options), copy.deepcopy(options), pickle.loads(pickle.dumps(options))):
+                copied.__class__ |should| be(Options)
+                (copied.alias, copied.needs_auth, copied.target, copied.display) |should| equal_to(
+                    ("Original", "app.perm", "show", True)
+                    )
+
+                copied.target = "other"
+                copied.alias = "Copied"
+                (options.target, options.alias, original.alias) |should| equal_to(("show", "Original", "Original"))
+
+    describe "Getting options as they were set":
+        it "doesn't work out deferred options":
+            called = []
+            deferred = Deferred(lambda: called.append(True) or 'alias')
+            options = Options().inherit(alias=deferred).inherit()
+
+            options.raw('alias') |should| be(deferred)
+            options.raw('display') |should| be(True)
+            called |should| equal_to([])
+
+            options.alias |should| equal_to('alias')
+            options.raw('alias') |should| equal_to('alias')
+
     describe "Creating patterns":
         before_each:
             self.url_parts = fudge.Fake("url_parts")
@@ -268,13 +328,13 @@ describe TestCase, "Options":
         @fudge.test
         it "returns '^.*' if string_from_url_parts is None":
             self.fake_string_from_url_parts.expects_call().with_args(self.url_parts).returns(None)
-            self.options.create_pattern(self.url_parts) |should| equal_to("^.*/$")
+            self.options.make_pattern(self.url_parts) |should| equal_to("^.*/$")
 
         @fudge.test
         it "returns '^.*' without the dollar sign if no url and catch_all is true":
             self.fake_string_from_url_parts.expects_call().with_args(self.url_parts).returns(None)
             self.options.catch_all = True
-            self.options.create_pattern(self.url_parts) |should| equal_to("^.*")
+            self.options.make_pattern(self.url_parts) |should| equal_to("^.*")
 
         @fudge.test
         it "returns '^$' if string_from_url_parts is '' or '/'":
@@ -284,7 +344,7 @@ describe TestCase, "Options":
                 )
 
             for expected in ('^$', '^$'):
-                self.options.create_pattern(self.url_parts) |should| equal_to(expected)
+                self.options.make_pattern(self.url_parts) |should| equal_to(expected)
 
         @fudge.test
         it "returns '^.*' without dollar sign if string_from_url_parts is '' or '/' and self.catch_all":
@@ -295,7 +355,7 @@ describe TestCase, "Options":
 
             self.options.catch_all = True
             for expected in ('^.*', '^.*'):
-                self.options.create_pattern(self.url_parts) |should| equal_to(expected)
+                self.options.make_pattern(self.url_parts) |should| equal_to(expected)
 
         @fudge.test
         it "returns result of string_from_url_parts without leading slashes if ends with slash":
@@ -307,7 +367,7 @@ describe TestCase, "Options":
                 )
 
             for expected in ('^asdf/', '^jlkl/', '^qwer/', '^ghjd/'):
-                self.options.create_pattern(self.url_parts) |should| equal_to(expected)
+                self.options.make_pattern(self.url_parts) |should| equal_to(expected)
 
         @fudge.test
         it "returns with trailing /$ if doesn't already have trailing slash":
@@ -319,7 +379,7 @@ describe TestCase, "Options":
                 )
 
             for expected in ('^asdf/$', '^jlkl/$', '^qwer/$', '^ghjd/$'):
-                self.options.create_pattern(self.url_parts) |should| equal_to(expected)
+                self.options.make_pattern(self.url_parts) |should| equal_to(expected)
 
         @fudge.test
         it "returns with no trailing slash or dollar sign if catch_all":
@@ -332,7 +392,22 @@ describe TestCase, "Options":
 
             self.options.catch_all = True
             for expected in ('^asdf', '^jlkl', '^qwer', '^ghjd'):
-                self.options.create_pattern(self.url_parts) |should| equal_to(expected)
+                self.options.make_pattern(self.url_parts) |should| equal_to(expected)
+
+        @fudge.test
+        it "remembers patterns for the same url_parts and catch_all":
+            url_parts = ['', 'one', 'two']
+            (self.fake_string_from_url_parts.expects_call()
+                            .with_args(url_parts).returns('one/two')
+                .next_call().with_args(url_parts).returns('one/two')
+                )
+
+            self.options.create_pattern(url_parts) |should| equal_to('^one/two/$')
+            self.options.create_pattern(list(url_parts)) |should| equal_to('^one/two/$')
+
+            self.options.set_urlpattern(catch_all=True)
+            self.options.create_pattern(url_parts) |should| equal_to('^one/two')
+            self.options.create_pattern(tuple(url_parts)) |should| equal_to('^one/two')
 
     describe "Getting string from url_parts":
         before_each:
@@ -1,16 +1,27 @@
 # coding: spec
 
 from noseOfYeti.tokeniser.support import noy_sup_setUp
-from should_dsl import should
+from should_dsl import should, should_not
 from django.test import TestCase
 
 from cwf.sections.pattern_list import PatternList
+from cwf.sections.section import Section
+from cwf.views.base import View
+
+from django.test.client import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+
 import fudge
 import re
 
 # Make the errors go away
 be, equal_to, be_empty = None, None, None
 
+class OneView(View):
+    """View with a target called one"""
+    def one(self, request):
+        return None, ('one', request.section)
+
 describe TestCase, "PatternList":
     describe "Initialization":
         before_each:
@@ -88,6 +99,10 @@ describe TestCase, "PatternList":
             list1 = fudge.Fake("list1")
             list2 = fudge.Fake("list2")
             list3 = fudge.Fake("list3")
+            section1.parent = None
+            section2.parent = None
+            section3.parent = None
+
             (fakePatternList.expects_call()
                             .with_args(section1, stop_at=self.stop_at, include_as=include_as1).returns(list1)
                 .next_call().with_args(section2, stop_at=self.stop_at, include_as=include_as2).returns(list2)
@@ -103,6 +118,30 @@ describe TestCase, "PatternList":
             self.section.has_attr(url_children=[item1, item2, item3])
             list(self.lst.pattern_list()) |should| equal_to([t1, t2, t3, t4, t5, t6])
 
+        it "gives children the url parts of this section rather than making them work it out again":
+            root = Section('')
+            one = root.add('one')
+            two = one.add('two')
+
+            lst = PatternList(root)
+            item = list(one.url_children)[0]
+            lst.pattern_list_for_item(item).given_parent_url_parts |should| be(None)
+
+            lst = PatternList(one, stop_at=root, parent_url_parts=[''])
+            lst.pattern_list_for_item(item).given_parent_url_parts |should| equal_to(['', 'one'])
+            lst.pattern_list_for_item(item).determine_url_parts() |should| equal_to(['', 'one', 'two'])
+
+        it "remembers the pattern list on the section":
+            root = Section('')
+            root.add('one').configure(target='view')
+            first = PatternList(root).pattern_list()
+            PatternList(root).pattern_list() |should| be(first)
+            PatternList(root, without_include=True).pattern_list() |should_not| be(first)
+
+            root.changed()
+            PatternList(root).pattern_list() |should_not| be(first)
+            PatternList(root).pattern_list() |should| equal_to(first)
+
     describe "Getting pattern tuples for an item":
         before_each:
             self.item = fudge.Fake("item")
@@ -285,6 +324,35 @@ describe TestCase, "PatternList":
             self.section.expects("make_view").with_args(view, self.section).returns(modified_view)
             self.lst.url_view() |should| equal_to((modified_view, kwargs))
 
+    describe "Direct binding":
+        before_each:
+            self.view = OneView()
+            self.request = RequestFactory().get('/one/')
+            self.request.user = AnonymousUser()
+
+        it "binds the view to the target when patterns are made":
+            section = Section('').configure(kls=self.view, direct=True).add('one').configure(target='one', extra_context={'a' : 1})
+            view, kwargs = PatternList(section).url_view()
+            kwargs |should| equal_to({'a' : 1})
+            view(self.request) |should| equal_to(('one', section))
+
+        it "uses the dispatcher without the direct option":
+            section = Section('').configure(kls=self.view).add('one').configure(target='one')
+            view, kwargs = PatternList(section).url_view()
+            kwargs |should| equal_to({'kls' : self.view, 'target' : 'one'})
+            view(self.request, **kwargs) |should| equal_to(('one', section))
+
+        it "works with any view that can be called with request and target":
+            called = []
+            def kls(request, target):
+                called.append(target)
+                return target
+
+            section = Section('one').configure(kls=kls, target='one', direct=True)
+            view, kwargs = PatternList(section).url_view()
+            view(self.request) |should| equal_to('one')
+            called |should| equal_to(['one'])
+
     describe "Getting url part":
         before_each:
             self.url = fudge.Fake("url")
@@ -388,3 +456,12 @@ describe TestCase, "PatternList":
             fakePatternList.expects_call().with_args(self.parent, stop_at=self.stop_at).returns(pattern_list)
             self.section.parent = self.parent
             self.lst.parent_url_parts() |should| be(parts)
+
+        it "returns a copy of the parent url parts it was given":
+            parts = ['', 'one']
+            self.section.parent = self.parent
+            self.lst.given_parent_url_parts = parts
+
+            result = self.lst.parent_url_parts()
+            result |should| equal_to(parts)
+            result |should_not| be(parts)
@@ -0,0 +1,101 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from cwf.sections.permissions import Permissions, permissions_for, section_permissions
+from cwf.sections.section import Section
+from cwf.views.menu import Menu
+
+# Make the errors go away
+be, equal_to = None, None
+
+class User(object):
+    """User that records how it's permissions were asked for"""
+    is_active = True
+    is_superuser = False
+
+    def __init__(self, perms, authenticated=True):
+        self.perms = perms
+        self.asked = []
+        self.authenticated = authenticated
+
+    def is_authenticated(self):
+        return self.authenticated
+
+    def get_all_permissions(self):
+        self.asked.append("all")
+        return set(self.perms)
+
+    def has_perm(self, perm):
+        self.asked.append(perm)
+        return perm in self.perms
+
+class OldUser(User):
+    """User without get_all_permissions"""
+    get_all_permissions = None
+
+describe TestCase, "Permissions":
+    it "gives back the same Permissions for a user":
+        user = User([])
+        permissions = permissions_for(user)
+        permissions_for(user) |should| be(permissions)
+        permissions_for(User([])) |should_not| be(permissions)
+
+    it "finds all the permissions once and answers from them":
+        user = User(['app.one', 'app.two'])
+        permissions = Permissions(user)
+        permissions.has('app.one') |should| be(True)
+        permissions.has('app.three') |should| be(False)
+        permissions.has_all(['app.one', 'app.two']) |should| be(True)
+        permissions.granted |should| equal_to(frozenset(['app.one', 'app.two']))
+        user.asked |should| equal_to(["all"])
+
+    it "gives active superusers every permission":
+        user = User([])
+        user.is_superuser = True
+        Permissions(user).has('app.anything') |should| be(True)
+
+        user.is_active = False
+        Permissions(user).has('app.anything') |should| be(False)
+
+    it "uses has_perm if the user can't give all it's permissions":
+        user = OldUser(['app.one'])
+        permissions = Permissions(user)
+        permissions.has('app.one') |should| be(True)
+        permissions.has('app.two') |should| be(False)
+        user.asked |should| equal_to(['app.one', 'app.two'])
+
+    describe "Prefetching":
+        it "only finds permissions if some are needed and the user is authenticated":
+            user = User(['app.one'])
+            Permissions(user).prefetch([]) |should| be(False)
+            user.asked |should| equal_to([])
+
+            anonymous = User(['app.one'], authenticated=False)
+            Permissions(anonymous).prefetch(['app.one']) |should| be(True)
+            anonymous.asked |should| equal_to([])
+
+            Permissions(user).prefetch(['app.one']) |should| be(True)
+            user.asked |should| equal_to(["all"])
+
+        it "collects needs_auth from every section in the tree":
+            root = Section('')
+            root.add('one').configure(needs_auth='app.one')
+            two = root.add('two').configure(needs_auth=True)
+            two.add('three').configure(needs_auth=['app.three', 'app.four'])
+            section_permissions(root) |should| equal_to(frozenset(['app.one', 'app.three', 'app.four']))
+
+        it "finds permissions for a menu with one call to the user":
+            root = Section('')
+            root.add('one').configure(needs_auth='app.one')
+            root.add('two').configure(needs_auth=['app.one', 'app.two'])
+            root.add('three').configure(needs_auth='app.three')
+
+            request = RequestFactory().get('/one/')
+            request.user = User(['app.one', 'app.two'])
+
+            menu = Menu(request, root)
+            [info.alias for info in menu.global_nav() if info.display()] |should| equal_to(['One', 'Two'])
+            request.user.asked |should| equal_to(["all"])
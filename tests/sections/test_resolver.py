@@ -0,0 +1,142 @@
+# coding: spec
+
+from should_dsl import should
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+
+from django.urls.resolvers import URLResolver, RegexPattern
+from django.urls.exceptions import Resolver404
+from django.http import HttpResponse, Http404
+
+from cwf.sections.resolver import SectionResolver, SectionTrie
+from cwf.sections.section import Section
+from cwf.sections.values import Values
+
+# Make the errors go away
+be, equal_to = None, None
+
+# Function to make a view that says what it is and what it got
+def make_view(name):
+    def view(request, *args, **kwargs):
+        return HttpResponse("%s|%s|%s" % (name, args, sorted(kwargs.items())))
+    view.__name__ = str(name)
+    return view
+
+########################
+###   SECTIONS FOR TESTING
+########################
+
+root = Section('')
+root.first(name="home").configure(target=make_view("home"))
+
+one = root.add('one', name="one").configure(target=make_view("one"))
+one.add('two', name="two").configure(target=make_view("one/two"))
+one.add('\d+', match="number").configure(target=make_view("one/<number>"))
+one.add('other').configure(target=make_view("one/other"), extra_context={"extra": 1})
+
+years = root.add('years')
+year = years.add('\d{4}').configure(match='year', values=Values([2010, 2011]), target=make_view("years/<year>"))
+year.add('\d{2}').configure(match='month', target=make_view("years/<year>/<month>"))
+year.add('summary').configure(target=make_view("years/<year>/summary"))
+
+# Literal beats a regex that also matches
+clash = root.add('clash')
+clash.add('\w+', match='word').configure(target=make_view("clash/<word>"))
+clash.add('literal').configure(target=make_view("clash/literal"))
+
+# Regex that can match across slashes
+anything = root.add('anything')
+anything.add('.+', match='rest').configure(target=make_view("anything/<rest>"))
+
+# Catch all
+files = root.add('files').configure(catch_all=True, target=make_view("files"))
+
+# Not reachable
+root.add('inactive').configure(active=False, target=make_view("inactive"))
+
+# Redirect
+root.add('old').configure(redirect="/one/")
+
+# Promoted children still appear in urls under their parent
+promoted = root.add('promoted').configure(promote_children=True)
+promoted.add('child').configure(target=make_view("promoted/child"))
+
+paths = [
+      '/', '/one/', '/one/two/', '/one/12/', '/one/other/', '/one/nope/', '/one/two'
+    , '/years/', '/years/2010/', '/years/2010/05/', '/years/2010/summary/', '/years/10/'
+    , '/clash/literal/', '/clash/word/', '/anything/a/b/c/', '/files', '/files/a/b', '/filesxyz'
+    , '/inactive/', '/old/', '/promoted/child/', '/child/', '/nothing/at/all/', '//one//'
+    ]
+
+########################
+###   TESTS
+########################
+
+describe TestCase, "SectionResolver":
+    before_each:
+        self.regex_resolver = URLResolver(RegexPattern(r'^/'), root.patterns())
+        self.trie_resolver = URLResolver(RegexPattern(r'^/'), root.patterns(trie=True))
+
+    def resolved(self, resolver, path):
+        """Return what we get from resolving the path and calling the view"""
+        try:
+            match = resolver.resolve(path)
+        except Resolver404:
+            return None
+
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+        except Http404:
+            response = None
+
+        content = None
+        if response is not None:
+            content = (response.status_code, response.content, response.get('Location'))
+
+        return (
+              match.url_name, match.args, match.kwargs, match.namespaces, match.app_names
+            , content, getattr(request, 'section', None)
+            )
+
+    it "is what section.patterns gives when asked for a trie":
+        patterns = root.patterns(trie=True)
+        len(patterns) |should| be(1)
+        type(patterns[0]) |should| be(SectionResolver)
+        patterns[0].section |should| be(root)
+
+    it "resolves to the same view, kwargs and section as the normal patterns":
+        for path in paths:
+            expected = self.resolved(self.regex_resolver, path)
+            self.resolved(self.trie_resolver, path) |should| equal_to(expected)
+
+    it "actually found views for most of the paths":
+        found = [path for path in paths if self.resolved(self.trie_resolver, path) is not None]
+        len(found) |should| be(17)
+
+    it "reverses using the normal patterns":
+        self.trie_resolver.reverse("two") |should| equal_to("one/two/")
+
+    describe "The trie":
+        it "only checks patterns that could match the path":
+            trie = SectionTrie(root)
+            candidates = [entry.pattern for entry in trie.candidates('one/two/'.split('/'))]
+            sorted(candidates) |should| equal_to(sorted(['^one/two/$', '^files']))
+
+        it "returns None if nothing matches":
+            SectionTrie(root).resolve('nothing/at/all/') |should| be(None)
+
+        it "flattens included sections into the trie":
+            base = Section('')
+            included = Section('included').configure(namespace="inc", app_name="inc_app")
+            included.first().configure(target=make_view("included"))
+            included.add('thing', name="thing").configure(target=make_view("included/thing"))
+            base.adopt(included, include_as="inc")
+
+            entry, match = SectionTrie(base).resolve('inc/included/thing/')
+            entry.name |should| equal_to("thing")
+            entry.pattern |should| equal_to("^inc/included/thing/$")
+            entry.namespaces |should| equal_to(["inc"])
+            entry.app_names |should| equal_to(["inc_app"])
@@ -0,0 +1,83 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+
+from django.urls.resolvers import URLResolver, RegexPattern
+from django.urls import NoReverseMatch
+
+from cwf.sections.reverse import ReverseTemplate
+from cwf.sections.section import Section
+
+# Make the errors go away
+be, equal_to = None, None
+
+describe TestCase, "Reversing sections":
+    before_each:
+        self.root = Section('')
+        self.root.first(name="home").configure(target='view')
+
+        self.one = self.root.add('one', name="one").configure(target='view')
+        self.two = self.one.add('two', name="two").configure(target='view')
+        self.number = self.one.add('\d+', match="number", name="number").configure(target='view')
+        self.more = self.number.add('more', name="more").configure(target='view')
+        self.files = self.root.add('files', name="files").configure(target='view', catch_all=True)
+        self.regex = self.root.add('[a-z]+', name="regex").configure(target='view')
+
+    def django_reverse(self, name, **kwargs):
+        return "/%s" % URLResolver(RegexPattern(r'^/'), self.root.patterns()).reverse(name, **kwargs)
+
+    it "gives the same urls as django's reverse":
+        for section, kwargs in (
+              (self.root._base.section, {})
+            , (self.one, {})
+            , (self.two, {})
+            , (self.number, {'number': 12})
+            , (self.more, {'number': '3'})
+            , (self.files, {})
+            ):
+            section.reverse(**kwargs) |should| equal_to(self.django_reverse(section.name, **kwargs))
+
+    it "has the full pattern for the section compiled":
+        self.more.url_pattern.pattern |should| equal_to('^one/(?P<number>\d+)/more/$')
+        self.more.url_pattern.match('one/12/more/').groupdict() |should| equal_to({'number': '12'})
+
+    it "complains if the kwargs don't fit the url":
+        with self.assertRaises(NoReverseMatch):
+            self.more.reverse()
+
+        with self.assertRaises(NoReverseMatch):
+            self.more.reverse(number='abc')
+
+        with self.assertRaises(NoReverseMatch):
+            self.two.reverse(number=1)
+
+    it "complains if part of the url is a regex without a match":
+        with self.assertRaises(NoReverseMatch):
+            self.regex.reverse()
+
+    it "starts from include_as for included sections":
+        included = Section('included')
+        thing = included.add('thing')
+        self.root.adopt(included, include_as="inc")
+        thing.reverse() |should| equal_to('/inc/included/thing/')
+
+    it "remembers the template until the tree changes":
+        template = self.more.reverse_template
+        self.more.reverse_template |should| be(template)
+
+        self.number.configure(match="num")
+        self.more.reverse_template |should_not| be(template)
+        self.more.reverse(num=4) |should| equal_to('/one/4/more/')
+
+    describe "ReverseTemplate":
+        it "splits the url into literals and named groups":
+            template = ReverseTemplate(self.more)
+            [(name, literal) for name, _, literal in template.segments] |should| equal_to(
+                [(None, 'one'), ('number', None), (None, 'more')]
+                )
+            template.names |should| equal_to(set(['number']))
+
+        it "doesn't add a trailing slash for catch_all sections or the root":
+            ReverseTemplate(self.files).reverse({}) |should| equal_to('/files')
+            ReverseTemplate(self.root).reverse({}) |should| equal_to('/')
@@ -5,7 +5,8 @@ from should_dsl import should, should_not
 from django.test import TestCase
 
 from cwf.sections.errors import ConfigurationError
-from cwf.sections.section import Section, Item
+from cwf.sections.section import Section, Item, Mount
+from cwf.sections.options import Options
 
 from contextlib import contextmanager
 from django.http import Http404
@@ -182,9 +183,9 @@ describe TestCase, "Section":
                 self.parent1 = fudge.Fake("parent1")
                 self.parent2 = fudge.Fake("parent2")
                 self.parent3 = fudge.Fake("parent3")
-                self.section1 = fudge.Fake("section1")
-                self.section2 = fudge.Fake("section2")
-                self.section3 = fudge.Fake("section3")
+                self.section1 = fudge.Fake("section1").provides("changed")
+                self.section2 = fudge.Fake("section2").provides("changed")
+                self.section3 = fudge.Fake("section3").provides("changed")
 
                 self.section = type("Section", (Section, ),
                     { 'copy' : self.fake_copy
@@ -219,6 +220,12 @@ describe TestCase, "Section":
                     for section in (self.section1, self.section2, self.section3):
                         section.parent |should| be(self.section)
 
+                @fudge.test
+                it "tells each adopted section that everything under it has changed":
+                    self.fake_add_child.expects_call()
+                    self.section1.expects("changed").with_args(subtree=True)
+                    self.section.adopt(self.section1)
+
             describe "With cloning":
                 @fudge.test
                 it "uses self.copy on each section and passes on all kwargs except clone":
@@ -304,35 +311,26 @@ describe TestCase, "Section":
                     self.section._base |should| be(cloned_base)
 
         describe "Adding a copy of a section":
-            before_each:
-                self.new_section = fudge.Fake("new_section")
-                self.fake_add_child = fudge.Fake("add_child")
-                self.section = type("Section", (Section, )
-                    , { 'add_child' : self.fake_add_child
-                      }
-                    )()
-
-            @fudge.test
-            it "creates a clone of the given section with new parent and adds it as a child after merging with original":
-                ia = fudge.Fake("ia")
-                cfm = fudge.Fake("cfm")
-                first = fudge.Fake("first")
-
-                # Cloned section is merged with original to get the children
-                cloned_section = (fudge.Fake("cloned_section").expects("merge")
-                    .with_args(self.new_section, take_base=True)
-                    )
-
-                # Section to copy is cloned before added
-                self.new_section.expects("clone").with_args(parent=self.section).returns(cloned_section)
-
-                # Clone is added as a child along with first and consider_for_menu passed into copy
-                self.fake_add_child.expects_call().with_args(cloned_section
-                    , first=first, consider_for_menu=cfm, include_as=ia
-                    )
-
-                copy = self.section.copy(self.new_section, first=first, consider_for_menu=cfm, include_as=ia)
-                copy |should| be(self.section)
+            it "mounts the given section and adds it as a child":
+                original = Section('original')
+                original.add('child')
+
+                section = Section()
+                section.copy(original, consider_for_menu=False, include_as='blah') |should| be(section)
+
+                item = list(section.children)[0]
+                item.consider_for_menu |should| be(False)
+                item.include_as |should| equal_to('blah')
+                item.section.__class__ |should| be(Mount)
+                item.section.source |should| be(original)
+                item.section.parent |should| be(section)
+                [child.section.url for child in item.section.children] |should| equal_to(['child'])
+
+            it "mounts the given section as the base if first":
+                original = Section('original')
+                section = Section()
+                section.copy(original, first=True)
+                section._base.section.source |should| be(original)
 
         describe "Adding a section":
             before_each:
@@ -689,6 +687,47 @@ describe TestCase, "Section":
             result = [t1, t2, t3]
             self.section.patterns(without_include=self.without_include) |should| equal_to(result)
 
+        it "remembers patterns until the section changes":
+            root = Section('')
+            one = root.add('one').configure(target='view')
+            first = root.patterns()
+            root.patterns() |should| equal_to(first)
+            [pattern.pattern.regex.pattern for pattern in first] |should| equal_to(['^one/$'])
+
+            one.add('two').configure(target='view')
+            [pattern.pattern.regex.pattern for pattern in root.patterns()] |should| equal_to(['^one/two/$', '^one/$'])
+
+    describe "Changing the tree":
+        before_each:
+            self.root = Section('')
+            self.one = self.root.add('one')
+            self.two = self.one.add('two')
+            self.three = self.two.add('three')
+            self.other = self.root.add('other')
+
+            for section in (self.root, self.one, self.two, self.three, self.other):
+                section._patterns['remembered'] = True
+
+        def remembering(self):
+            sections = (self.root, self.one, self.two, self.three, self.other)
+            return [section for section in sections if section._patterns]
+
+        it "forgets patterns for the section and it's ancestors":
+            self.two.changed()
+            self.remembering() |should| equal_to([self.three, self.other])
+
+        it "forgets patterns for descendants as well if subtree is True":
+            self.one.changed(subtree=True)
+            self.remembering() |should| equal_to([self.other])
+
+        it "forgets patterns when a child is added":
+            self.three.add('four')
+            self.remembering() |should| equal_to([self.other])
+
+        it "forgets patterns for everything under a section that is configured":
+            self.one.configure(match='thing')
+            self.remembering() |should| equal_to([self.other])
+
     describe "Cloning":
         @fudge.test
         it "defaults url, name and parent to values on the section":
@@ -808,8 +847,8 @@ describe TestCase, "Section":
             self.section.parent = None
 
             fake_reachable = fudge.Fake("reachable").expects_call().returns(result)
-            with fudge.patched_context(self.section.options, 'reachable', fake_reachable):
-                self.section.reachable(self.request) |should| be(result)
+            self.section.options = type("Options", (Options, ), {'reachable' : fake_reachable})()
+            self.section.reachable(self.request) |should| be(result)
 
         @fudge.test
         it "returns whether section is reachable if parent and parent is reachable":
@@ -819,8 +858,8 @@ describe TestCase, "Section":
             self.section.parent = parent
 
             fake_reachable = fudge.Fake("reachable").expects_call().returns(result)
-            with fudge.patched_context(self.section.options, 'reachable', fake_reachable):
-                self.section.reachable(self.request) |should| be(result)
+            self.section.options = type("Options", (Options, ), {'reachable' : fake_reachable})()
+            self.section.reachable(self.request) |should| be(result)
 
     describe "Determining if can display":
         before_each:
@@ -837,7 +876,7 @@ describe TestCase, "Section":
             self.section.options = self.options.has_attr(propogate_display=propogate_display)
 
             (self.options
-                .expects("conditional").with_args("display", self.request).returns(True)
+                .expects("conditional").with_args("display", self.request, section=self.section).returns(True)
                 .expects("has_permissions").with_args(user).returns(True)
                 )
 
@@ -852,7 +891,7 @@ describe TestCase, "Section":
             self.section.options = self.options.has_attr(propogate_display=propogate_display)
 
             (self.options
-                .expects("conditional").with_args("display", self.request).returns(False)
+                .expects("conditional").with_args("display", self.request, section=self.section).returns(False)
                 .expects("has_permissions").with_args(user).returns(True)
                 )
 
@@ -867,7 +906,7 @@ describe TestCase, "Section":
             self.section.options = self.options.has_attr(propogate_display=propogate_display)
 
             (self.options
-                .expects("conditional").with_args("display", self.request).returns(True)
+                .expects("conditional").with_args("display", self.request, section=self.section).returns(True)
                 .expects("has_permissions").with_args(user).returns(False)
                 )
 
@@ -882,7 +921,7 @@ describe TestCase, "Section":
             self.section.options = self.options.has_attr(propogate_display=propogate_display)
 
             (self.options
-                .expects("conditional").with_args("display", self.request).returns(False)
+                .expects("conditional").with_args("display", self.request, section=self.section).returns(False)
                 .expects("has_permissions").with_args(user).returns(False)
                 )
 
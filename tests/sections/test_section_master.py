@@ -1,13 +1,20 @@
 # coding: spec
 
 from noseOfYeti.tokeniser.support import noy_sup_setUp, noy_sup_tearDown
-from should_dsl import should
+from should_dsl import should, should_not
 from django.test import TestCase
 
 from cwf.sections.section_master import (
       memoized, memoizer, make_memoizer
-    , SectionMaster, Info
+    , SectionMaster, SharedValues, Info
+    , shared_values
     )
+from cwf.sections.section import Section
+from cwf.sections.values import Values
+from cwf.views.menu import Menu
+
+import threading
+import gc
 
 import fudge
 
@@ -35,7 +42,7 @@ describe TestCase, "Memoize logic":
 
             self.calculator.expects("%s_value" % self.typ).with_args(self.obj, kw=kwa).returns(value)
             memoized(self.slf, self.typ, self.obj, kw=kwa) |should| be(value)
-            self.slf.results |should| equal_to({self.typ:{self.obj_id:value}})
+            self.slf.results |should| equal_to({self.typ:{self.obj_id:(self.obj, value)}})
 
         @fudge.patch("__builtin__.id")
         it "returns existing value for id of the object and type if already has it", fake_id:
@@ -43,9 +50,22 @@ describe TestCase, "Memoize logic":
             value = fudge.Fake("value")
 
             fake_id.expects_call().with_args(self.obj).returns(self.obj_id)
-            self.slf.results = {self.typ:{self.obj_id:value}}
+            self.slf.results = {self.typ:{self.obj_id:(self.obj, value)}}
             memoized(self.slf, self.typ, self.obj, kw=kwa) |should| be(value)
 
+        @fudge.patch("__builtin__.id")
+        it "recalculates if the id now belongs to a different object", fake_id:
+            old = fudge.Fake("old")
+            value = fudge.Fake("value")
+            old_value = fudge.Fake("old_value")
+
+            fake_id.expects_call().with_args(self.obj).returns(self.obj_id)
+            self.slf.results = {self.typ:{self.obj_id:(old, old_value)}}
+
+            self.calculator.expects("%s_value" % self.typ).with_args(self.obj).returns(value)
+            memoized(self.slf, self.typ, self.obj) |should| be(value)
+            self.slf.results |should| equal_to({self.typ:{self.obj_id:(self.obj, value)}})
+
         it "can take in None as a value":
             value = fudge.Fake("value")
             self.slf.results = {self.typ:{}}
@@ -78,6 +98,14 @@ describe TestCase, "Memoize logic":
             result.memoized.im_func |should| be(memoized)
             result.calculator |should| be(self.calculator)
 
+        it "gives each instance it's own results":
+            kls = make_memoizer(self.calculator, "one", "two")
+            first = kls()
+            second = kls()
+            first.results |should| equal_to({"one":{}, "two":{}})
+            first.results |should_not| be(second.results)
+            first.results["one"] |should_not| be(second.results["one"])
+
         @fudge.test
         it "puts properties for each namespace that will call memoized with that namespace and provided arguments":
             kwa1 = fudge.Fake("kwa1")
@@ -96,6 +124,164 @@ describe TestCase, "Memoize logic":
                 result.one(obj1, kw1=kwa1) |should| be(value1)
                 result.three(obj2, kw2=kwa2) |should| be(value2)
 
+describe TestCase, "Memoizing for concurrent menus":
+    it "doesn't leak results between Info objects":
+        root = Section('')
+        values = root.add('values').configure(''
+            , values = Values(lambda info: [info[0].number * 1000 + i for i in range(20)], as_set=False)
+            )
+        values.add('child')
+
+        class Request(object):
+            def __init__(self, number):
+                self.number = number
+                self.META = {'PATH_INFO': '/values/%s/' % (number * 1000)}
+
+        errors = []
+        def make_menus(number):
+            try:
+                for attempt in range(30):
+                    menu = Menu(Request(number), root)
+                    for info in menu.global_nav():
+                        url_parts = info.url_parts()
+                        if url_parts != ['', info.url] or info.url // 1000 != number:
+                            errors.append((number, info.url, url_parts))
+
+                        for child in info.children():
+                            if child.url_parts() != ['', info.url, 'child']:
+                                errors.append((number, info.url, child.url_parts()))
+                    del menu
+                    if attempt % 10 == 0:
+                        gc.collect()
+            except Exception as error:
+                errors.append((number, error))
+
+        threads = [threading.Thread(target=make_menus, args=(number, )) for number in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        errors |should| equal_to([])
+
+class Request(object):
+    def __init__(self, path):
+        self.META = {'PATH_INFO': '/%s/' % '/'.join(path)}
+
+describe TestCase, "Selected chain":
+    before_each:
+        self.root = Section('').configure(promote_children=True)
+        self.base = self.root.first()
+        self.one = self.root.add('One')
+        self.two = self.one.add('two')
+        self.three = self.one.add('three')
+        self.promoted = self.one.add('promoted').configure(promote_children=True)
+        self.four = self.promoted.add('four')
+        self.other = self.root.add('other')
+        self.master = SectionMaster(fudge.Fake("request"))
+
+    def chain(self, section, path):
+        """Selected chain from a new master, which is what each request gets"""
+        return SectionMaster(fudge.Fake("request")).selected_chain(section, path)
+
+    it "finds every selected section under the root":
+        self.chain(self.root, ['one', 'four']) |should| equal_to([self.root, self.one, self.promoted, self.four])
+        self.chain(self.root, ['ONE', 'two']) |should| equal_to([self.root, self.one, self.two, self.promoted])
+        self.chain(self.root, ['']) |should| equal_to([self.root, self.base])
+        self.chain(self.one, ['other']) |should| equal_to([])
+
+    it "agrees with selected_value for every section":
+        sections = [self.root] + list(self.root.descendants())
+        for path in (['one', 'four'], ['one', 'two'], ['other'], ['one'], ['nope'], ['']):
+            chain = self.chain(self.root, path)
+
+            expected = SectionMaster(fudge.Fake("request"))
+            for section in sections:
+                (section in chain) |should| be(expected.memoized.selected(section, path=path)[0])
+
+    it "gives infos the same answer as selected_value":
+        self.numbers = self.root.add('numbers').configure(values=Values([1, 2, 3], as_set=False))
+        self.numbers.add('leaf')
+
+        def infos(master, path, items, parent=None):
+            for item in items:
+                for info in master.get_info(item.section, item.include_as, path, parent=parent):
+                    yield info
+                    for child in infos(master, path, info.menu_children, parent=info):
+                        yield child
+
+        for path in (['one', 'four'], ['one', 'two'], ['2', 'leaf'], ['one'], ['nope'], ['']):
+            master = SectionMaster(Request(path))
+            expected = SectionMaster(Request(path))
+            for info in infos(master, path, self.root.menu_children):
+                info.selected() |should| equal_to(expected.memoized.selected(info, path=path))
+
+    it "shares segment keys for sections between requests":
+        shared_values.invalidate()
+        self.master.segment_key(self.one) |should| equal_to('one')
+        (self.one in shared_values.results['segment_keys']) |should| be(True)
+        self.chain(self.one, ['one']) |should| equal_to([self.one])
+
+    it "finds the new selected chain when the url of a section is changed":
+        self.chain(self.root, ['one', 'two']) |should| equal_to([self.root, self.one, self.two, self.promoted])
+
+        self.two.url = 'Deux'
+        self.master.segment_key(self.two) |should| equal_to('deux')
+        self.chain(self.root, ['one', 'two']) |should| equal_to([self.root, self.one, self.promoted])
+        self.chain(self.root, ['one', 'deux']) |should| equal_to([self.root, self.one, self.two, self.promoted])
+
+    it "uses segment keys from the compiled tree when frozen":
+        self.root.freeze()
+        self.master.segment_key(self.one) |should| equal_to('one')
+        self.chain(self.root, ['one', 'three']) |should| equal_to([self.root, self.one, self.three, self.promoted])
+
+describe TestCase, "Shared values":
+    before_each:
+        self.shared = SharedValues("one", "two")
+        self.obj = type("Obj", (object, ), {})()
+
+    it "only calculates a value once for each object and namespace":
+        calculated = []
+        def calculate(obj):
+            calculated.append(obj)
+            return len(calculated)
+
+        self.shared.get("one", self.obj, calculate) |should| be(1)
+        self.shared.get("one", self.obj, calculate) |should| be(1)
+        self.shared.get("two", self.obj, calculate) |should| be(2)
+        calculated |should| equal_to([self.obj, self.obj])
+
+    it "forgets everything and increments version when invalidated":
+        version = self.shared.version
+        self.shared.get("one", self.obj, lambda obj: 1)
+        self.shared.invalidate()
+        self.shared.version |should| equal_to(version + 1)
+        self.shared.get("one", self.obj, lambda obj: 2) |should| be(2)
+
+    it "doesn't keep objects alive":
+        self.shared.get("one", self.obj, lambda obj: 1)
+        len(self.shared.results["one"]) |should| be(1)
+        del self.obj
+        len(self.shared.results["one"]) |should| be(0)
+
+    it "shares url_parts for sections between requests until the tree changes":
+        root = Section('')
+        one = root.add('one')
+        two = one.add('two')
+
+        first = SectionMaster(fudge.Fake("request1"))
+        first.memoized.url_parts(two) |should| equal_to(['', 'one', 'two'])
+
+        fake_calculate = fudge.Fake("calculate_url_parts").expects_call().times_called(0)
+        second = SectionMaster(fudge.Fake("request2"))
+        with fudge.patched_context(second, "calculate_url_parts", fake_calculate):
+            second.memoized.url_parts(two) |should| equal_to(['', 'one', 'two'])
+
+        version = shared_values.version
+        one.add('three')
+        shared_values.version |should| equal_to(version + 1)
+        len(shared_values.results['url_parts']) |should| be(0)
+
 describe "SectionMaster":
     before_each:
         self.request = fudge.Fake("request")
@@ -172,8 +358,8 @@ describe "SectionMaster":
                     )
 
                 (self.options.expects('conditional')
-                    .with_args('admin', self.request).returns(True)
-                    .next_call().with_args('admin', self.request).returns(False)
+                    .with_args('admin', self.request, section=self.section).returns(True)
+                    .next_call().with_args('admin', self.request, section=self.section).returns(False)
                     )
 
                 self.section.parent = self.parent
@@ -188,7 +374,7 @@ describe "SectionMaster":
             @fudge.test
             it "says no if doesn't need auth and isn't admin":
                 (self.options.expects('conditional')
-                    .with_args('admin', self.request).returns(False)
+                    .with_args('admin', self.request, section=self.section).returns(False)
                     )
 
                 self.section.options = self.options.has_attr(needs_auth=False)
@@ -216,7 +402,7 @@ describe "SectionMaster":
                 for namespace in self.namespaces:
                     result[namespace] = fudge.Fake("%s_value" % namespace)
                     self.fake_memoized.expects(namespace).with_args(self.parent).returns(True)
-                    self.options.expects('conditional').with_args(namespace, self.request).returns(result[namespace])
+                    self.options.expects('conditional').with_args(namespace, self.request, section=self.section).returns(result[namespace])
 
                 self.section.parent = self.parent
                 self.section.options = self.options
@@ -229,7 +415,7 @@ describe "SectionMaster":
                 result = {}
                 for namespace in self.namespaces:
                     result[namespace] = fudge.Fake("%s_value" % namespace)
-                    self.options.expects('conditional').with_args(namespace, self.request).returns(result[namespace])
+                    self.options.expects('conditional').with_args(namespace, self.request, section=self.section).returns(result[namespace])
 
                 self.section.parent = None
                 self.section.options = self.options
@@ -427,7 +613,7 @@ describe "SectionMaster":
             @fudge.test
             it "yields nothing if active conditional is False":
                 self.section.options = self.options
-                self.options.expects("conditional").with_args('active', self.request).returns(False)
+                self.options.expects("conditional").with_args('active', self.request, section=self.section).returns(False)
                 list(self.master.iter_section(self.section, self.include_as, self.path)) |should| equal_to([])
 
             @fudge.test
@@ -436,7 +622,7 @@ describe "SectionMaster":
                 self.section.alias = self.alias
                 self.section.options = self.options
                 self.section.options.values = None
-                self.options.expects("conditional").with_args('active', self.request).returns(True)
+                self.options.expects("conditional").with_args('active', self.request, section=self.section).returns(True)
                 list(self.master.iter_section(self.section, None, self.path)) |should| equal_to([(self.url, self.alias)])
 
             @fudge.test
@@ -445,7 +631,7 @@ describe "SectionMaster":
                 self.section.alias = self.alias
                 self.section.options = self.options
                 self.section.options.values = None
-                self.options.expects("conditional").with_args('active', self.request).returns(True)
+                self.options.expects("conditional").with_args('active', self.request, section=self.section).returns(True)
                 list(self.master.iter_section(self.section, self.include_as, self.path)) |should| equal_to([(self.include_as, self.alias)])
 
             @fudge.test
@@ -470,7 +656,7 @@ describe "SectionMaster":
                 matched_parent_url_parts = [p1, p2, p3]
                 self.fake_memoized.expects("url_parts").with_args(self.parent).returns([1, 2, 3])
                 self.values.expects("get_info").with_args(self.request, matched_parent_url_parts, path).returns(things)
-                self.options.expects("conditional").with_args('active', self.request).returns(True)
+                self.options.expects("conditional").with_args('active', self.request, section=self.section).returns(True)
                 list(self.master.iter_section(self.section, self.include_as, path)) |should| equal_to(things)
 
         describe "Getting info for each (url, alias) in section":
@@ -518,12 +704,19 @@ describe "SectionMaster":
                     info.alias |should| be(self.alias)
                     info.section |should| be(self.section)
 
+                @fudge.test
+                it "gives Info the master and path instead of making closures for it":
+                    info = self.get_info(self.path)
+                    info.master |should| be(self.master)
+                    info.path |should| be(self.path)
+                    hasattr(info, '__dict__') |should| be(False)
+
                 @fudge.test
                 it "gives info selected as method that says whether info can be selected for given path":
                     info = self.get_info([])
-                    result = fudge.Fake("result")
-                    self.fake_memoized.expects("selected").with_args(info, path=[]).returns(result)
-                    info.selected() |should| be(result)
+                    fake_info_index = fudge.Fake("info_index").expects_call().with_args(info).returns(None)
+                    with fudge.patched_context(self.master, 'info_index', fake_info_index):
+                        info.selected() |should| equal_to((False, []))
 
                 @fudge.test
                 it "gives info selected as method that says whether info is admin or not":
@@ -533,14 +726,20 @@ describe "SectionMaster":
                     info.admin() |should| be(result)
 
                 @fudge.test
-                it "path given to selected is a copy of the path given to get_info":
+                it "path given to selected is the path given to get_info":
                     path = [1, 2, 3]
                     info = self.get_info(path)
-                    path.append(4)
-                    path[1] = 5
-                    result = fudge.Fake("result")
-                    self.fake_memoized.expects("selected").with_args(info, path=[1, 2, 3]).returns(result)
-                    info.selected() |should| be(result)
+                    fake_info_index = fudge.Fake("info_index").expects_call().with_args(info).returns(1)
+                    with fudge.patched_context(self.master, 'info_index', fake_info_index):
+                        info.selected() |should| equal_to((True, [2, 3]))
+
+                @fudge.test
+                it "only asks the master where info is selected once":
+                    info = self.get_info([1, 2, 3])
+                    fake_info_index = fudge.Fake("info_index").expects_call().with_args(info).returns(3).times_called(1)
+                    with fudge.patched_context(self.master, 'info_index', fake_info_index):
+                        info.selected() |should| equal_to((True, []))
+                        info.selected() |should| equal_to((True, []))
 
                 @fudge.test
                 it "gives info url_parts as method that gets url_parts from info":
@@ -5,7 +5,7 @@ from should_dsl import should, should_not
 from django.test import TestCase
 
 from cwf.sections.errors import ConfigurationError
-from cwf.sections.values import Values
+from cwf.sections.values import Values, ValuesCache
 
 import fudge
 
@@ -196,3 +196,127 @@ describe TestCase, "Values":
         it "calls sorted on values with no function if sorter is truthy but not callable", fake_sorted:
             fake_sorted.expects_call().with_args(self.values).returns(self.sorted)
             Values(sorter=True).sort(self.values) |should| be(self.sorted)
+
+    describe "Caching values":
+        before_each:
+            self.called = []
+            def values(info):
+                self.called.append(info[1])
+                return ['b', 'a', 'b']
+            self.values = values
+            self.info = (None, ['', 'one'], ['', 'one', 'two'])
+
+        it "only calls values once for the same key":
+            values = Values(self.values, lambda info, value: (value, value.upper()), sorter=True, cache=True)
+            values.get_values(self.info) |should| equal_to([('a', 'A'), ('b', 'B')])
+            values.get_values(self.info) |should| equal_to([('a', 'A'), ('b', 'B')])
+            values.get_values((None, ['', 'other'], [])) |should| equal_to([('a', 'A'), ('b', 'B')])
+
+            self.called |should| equal_to([['', 'one'], ['', 'other']])
+            values.cache.stats |should| equal_to(dict(hits=1, misses=2, entries=2))
+
+        it "uses the key function to decide what values can be shared":
+            cache = ValuesCache(key=lambda info: 'everything')
+            values = Values(self.values, cache=cache)
+            values.get_values(self.info)
+            values.get_values((None, ['', 'other'], []))
+            len(self.called) |should| be(1)
+            cache.hits |should| be(1)
+            cache.misses |should| be(1)
+
+        it "finds values again after the ttl":
+            now = [0]
+            values = Values(self.values, cache=ValuesCache(ttl=10))
+            values.cache.entries.timer = lambda: now[0]
+
+            values.get_values(self.info)
+            now[0] = 9
+            values.get_values(self.info)
+            len(self.called) |should| be(1)
+
+            now[0] = 10
+            values.get_values(self.info)
+            len(self.called) |should| be(2)
+
+        it "forgets the least recently used values":
+            values = Values(self.values, cache=ValuesCache(max_entries=1))
+            values.get_values(self.info)
+            values.get_values((None, ['', 'other'], []))
+            values.get_values(self.info)
+            len(self.called) |should| be(3)
+
+        it "can be invalidated":
+            values = Values(self.values, cache=True)
+            values.get_values(self.info)
+            values.get_values((None, ['', 'other'], []))
+
+            values.invalidate(('', 'one'))
+            values.get_values(self.info)
+            values.get_values((None, ['', 'other'], []))
+            len(self.called) |should| be(3)
+
+            values.invalidate()
+            values.get_values(self.info)
+            len(self.called) |should| be(4)
+
+        it "complains if cache or key aren't usable":
+            ConfigurationError |should| be_thrown_by(lambda: Values(cache=1))
+            ConfigurationError |should| be_thrown_by(lambda: ValuesCache(key=1))
+
+    describe "Streaming values":
+        before_each:
+            self.info = (None, ['', 'one'], ['', 'one', 'two'])
+
+        def values_from(self, values, **kwargs):
+            """Make Values that stream from these values and remember what was taken from them"""
+            self.taken = []
+            def source(info):
+                for value in values:
+                    self.taken.append(value)
+                    yield value
+            return Values(source, stream=True, **kwargs)
+
+        it "gives the same values as without streaming":
+            source = [5, 3, 9, 3, 1, 7, 5]
+            each = lambda info, value: (value, 'v%s' % value)
+            for kwargs in (
+                  dict()
+                , dict(as_set=False)
+                , dict(sorter=True)
+                , dict(sorter=True, as_set=False)
+                , dict(sorter=True, each=each)
+                , dict(sorter=True, each=each, sort_after_transform=False)
+                ):
+                expected = Values(lambda info: source, **kwargs).get_values(self.info)
+                streamed = list(self.values_from(source, **kwargs).get_values(self.info))
+                if kwargs.get('sorter'):
+                    streamed |should| equal_to(expected)
+                else:
+                    sorted(streamed) |should| equal_to(sorted(expected))
+
+        it "uses a cmp function as the sorter":
+            reverse = lambda a, b: (a < b) - (a > b)
+            values = self.values_from([1, 4, 2, 3], sorter=reverse, limit=2)
+            list(values.get_values(self.info)) |should| equal_to([(4, 4), (3, 3)])
+
+        it "only takes what it needs when not sorting":
+            values = self.values_from(range(1000), offset=10, limit=5)
+            list(values.get_values(self.info)) |should| equal_to([(i, i) for i in range(10, 15)])
+            self.taken |should| equal_to(list(range(15)))
+
+        it "removes duplicates before the window":
+            values = self.values_from([1, 1, 2, 2, 3, 3, 4], offset=1, limit=2)
+            list(values.get_values(self.info)) |should| equal_to([(2, 2), (3, 3)])
+
+        it "finds the top values without sorting all of them":
+            source = [7, 2, 9, 2, 4, 1, 8, 1, 3, 9, 6, 5]
+            values = self.values_from(source, sorter=True, offset=2, limit=3)
+            list(values.get_values(self.info)) |should| equal_to([(3, 3), (4, 4), (5, 5)])
+
+            values = self.values_from(source, sorter=True, as_set=False, limit=4)
+            list(values.get_values(self.info)) |should| equal_to([(1, 1), (1, 1), (2, 2), (2, 2)])
+
+        it "can get the window from the request":
+            window = lambda info: int(info[0])
+            values = self.values_from(range(100), offset=window, limit=window)
+            list(values.get_values(('3', [], []))) |should| equal_to([(3, 3), (4, 4), (5, 5)])
@@ -3,6 +3,7 @@
 from noseOfYeti.tokeniser.support import noy_sup_setUp
 from should_dsl import should, should_not
 from django.test import TestCase
+from django.test.client import RequestFactory
 
 from cwf.views.rendering import Renderer
 from cwf.views.base import View
@@ -12,6 +13,21 @@ import fudge
 # Make the errors go away
 be, equal_to, respond_to = None, None, None
 
+class TargetView(View):
+    """View with a target called target"""
+    def target(self, request, thing=None):
+        return None, (request.state.target, thing)
+
+class ExecutingView(TargetView):
+    """View that changes how targets are executed"""
+    def __init__(self):
+        super(ExecutingView, self).__init__()
+        self.executed = []
+
+    def execute(self, target, request, args, kwargs):
+        self.executed.append(target)
+        return super(ExecutingView, self).execute(target, request, args, kwargs)
+
 describe TestCase, "View":
     before_each:
         self.view = View()
@@ -197,6 +213,36 @@ describe TestCase, "View":
             view = type("view", (View, ), {self.target_name : target})()
             view.get_target(self.target_name) |should| be(target)
 
+    describe "Binding a target":
+        before_each:
+            self.request = RequestFactory().get('/one/')
+            self.kls = TargetView
+
+        it "returns a callable that does the same as calling the view with that target":
+            view = self.kls()
+            view.bind('target')(self.request, thing='stuff/') |should| equal_to(('target', 'stuff'))
+            view(self.request, 'target', thing='stuff/') |should| equal_to(('target', 'stuff'))
+
+        it "only finds the target once":
+            view = self.kls()
+            found = []
+            original = view.get_target
+            view.get_target = lambda target: found.append(target) or original(target)
+
+            bound = view.bind('target')
+            bound(self.request)
+            bound(self.request)
+            found |should| equal_to(['target'])
+
+        it "complains straight away if the target doesn't exist":
+            with self.assertRaises(Exception):
+                self.kls().bind('missing')
+
+        it "just calls the view if it changes how targets are executed":
+            view = ExecutingView()
+            view.bind('target')(self.request) |should| equal_to(('target', None))
+            view.executed |should| equal_to(['target'])
+
     describe "Cleaning view kwargs":
         before_each:
             self.fake_clean_view_kwarg = fudge.Fake("clean_view_kwarg")
@@ -272,74 +318,70 @@ describe TestCase, "View":
                   }
                 )()
 
-        @fudge.patch("cwf.views.base.Menu", "cwf.views.base.DictObj")
-        it "returns a dictobj with menu, path, target, section and base_url", fakeMenu, fakeDictObj:
+        @fudge.patch("cwf.views.base.Menu")
+        it "returns a State with path, target, section and base_url", fakeMenu:
             path = fudge.Fake("path")
-            result = fudge.Fake("result")
-            fakeMenu.expects_call().with_args(self.request, self.section).returns(self.menu)
+            self.fake_get_section.expects_call().with_args(self.request, path).returns(self.section)
+            self.fake_path_from_request.expects_call().with_args(self.request).returns(path)
+            self.fake_base_url_from_request.expects_call().with_args(self.request).returns('')
+
+            state = self.view.get_state(self.request, self.target)
+            state.path |should| be(path)
+            state.target |should| be(self.target)
+            state.section |should| be(self.section)
+            state.base_url |should| equal_to('')
+
+        @fudge.patch("cwf.views.base.Menu")
+        it "only makes the menu when it's used and gives it the path parts", fakeMenu:
+            path = ['', 'asdf', 'weouri', '']
+            self.request.has_attr(path='/asdf/weouri/')
+            fakeMenu.expects_call().with_args(self.request, self.section, path=['asdf', 'weouri']).times_called(1).returns(self.menu)
 
             self.fake_get_section.expects_call().with_args(self.request, path).returns(self.section)
             self.fake_path_from_request.expects_call().with_args(self.request).returns(path)
             self.fake_base_url_from_request.expects_call().with_args(self.request).returns('')
 
-            (fakeDictObj.expects_call()
-                .with_args(menu=self.menu, target=self.target, section=self.section, path=path, base_url='').returns(result)
-                )
+            state = self.view.get_state(self.request, self.target)
+            state.menu |should| be(self.menu)
+            state['menu'] |should| be(self.menu)
 
-            self.view.get_state(self.request, self.target) |should| be(result)
+        @fudge.patch("cwf.views.base.Menu")
+        it "lets the menu find it's own path if there is a base url", fakeMenu:
+            path = ['', 'asdf', 'weouri', '']
+            fakeMenu.expects_call().with_args(self.request, self.section, path=None).returns(self.menu)
 
-        @fudge.patch("cwf.views.base.Menu", "cwf.views.base.DictObj")
-        it "doesn't make a menu if can't get a section", fakeMenu, fakeDictObj:
-            path = fudge.Fake("path")
-            result = fudge.Fake("result")
+            self.fake_get_section.expects_call().with_args(self.request, path).returns(self.section)
+            self.fake_path_from_request.expects_call().with_args(self.request).returns(path)
+            self.fake_base_url_from_request.expects_call().with_args(self.request).returns(self.base_url)
 
+            self.view.get_state(self.request, self.target).menu |should| be(self.menu)
+
+        @fudge.patch("cwf.views.base.Menu")
+        it "doesn't make a menu if can't get a section", fakeMenu:
+            path = fudge.Fake("path")
             self.fake_get_section.expects_call().with_args(self.request, path).returns(None)
             self.fake_path_from_request.expects_call().with_args(self.request).returns(path)
             self.fake_base_url_from_request.expects_call().with_args(self.request).returns('')
 
-            (fakeDictObj.expects_call()
-                .with_args(menu=None, target=self.target, section=None, path=path, base_url='').returns(result)
-                )
-
-            self.view.get_state(self.request, self.target) |should| be(result)
+            self.view.get_state(self.request, self.target).menu |should| be(None)
 
-        @fudge.patch("cwf.views.base.Menu", "cwf.views.base.DictObj")
-        it "pops start of path if base url isn't an empty string and path starts with ''", fakeMenu, fakeDictObj:
+        @fudge.patch("cwf.views.base.Menu")
+        it "pops start of path if base url isn't an empty string and path starts with ''", fakeMenu:
             path = ['', 'asdf', 'weouri']
-            result = fudge.Fake("result")
-            fakeMenu.expects_call().with_args(self.request, self.section).returns(self.menu)
-
             self.fake_get_section.expects_call().with_args(self.request, path).returns(self.section)
             self.fake_path_from_request.expects_call().with_args(self.request).returns(path)
             self.fake_base_url_from_request.expects_call().with_args(self.request).returns(self.base_url)
 
-            (fakeDictObj.expects_call()
-                .with_args(
-                      menu=self.menu, target=self.target, section=self.section
-                    , path=['asdf', 'weouri'], base_url=self.base_url
-                    ).returns(result)
-                )
-
-            self.view.get_state(self.request, self.target) |should| be(result)
+            self.view.get_state(self.request, self.target).path |should| equal_to(['asdf', 'weouri'])
 
-        @fudge.patch("cwf.views.base.Menu", "cwf.views.base.DictObj")
-        it "doesn't pop start of path if base url isn't an empty string but path doesn't start with ''", fakeMenu, fakeDictObj:
+        @fudge.patch("cwf.views.base.Menu")
+        it "doesn't pop start of path if base url isn't an empty string but path doesn't start with ''", fakeMenu:
             path = ['asdf', 'weouri']
-            result = fudge.Fake("result")
-            fakeMenu.expects_call().with_args(self.request, self.section).returns(self.menu)
-
             self.fake_get_section.expects_call().with_args(self.request, path).returns(self.section)
             self.fake_path_from_request.expects_call().with_args(self.request).returns(path)
             self.fake_base_url_from_request.expects_call().with_args(self.request).returns(self.base_url)
 
-            (fakeDictObj.expects_call()
-                .with_args(
-                      menu=self.menu, target=self.target, section=self.section
-                    , path=['asdf', 'weouri'], base_url=self.base_url
-                    ).returns(result)
-                )
-
-            self.view.get_state(self.request, self.target) |should| be(result)
+            self.view.get_state(self.request, self.target).path |should| equal_to(['asdf', 'weouri'])
 
     describe "Getting the current section":
         before_each:
@@ -4,6 +4,7 @@ from noseOfYeti.tokeniser.support import noy_sup_setUp
 from should_dsl import should
 from django.test import TestCase
 
+from cwf.sections.section_master import Info
 from cwf.views.menu import Menu
 
 import fudge
@@ -126,7 +127,16 @@ describe TestCase, "Menu":
             request = fudge.Fake('request').has_attr(META={'PATH_INFO' : '////blah/things///'})
             Menu(request, None).path |should| equal_to(['blah', 'things'])
 
-    describe "Generating function to act as children":
+        it "ignores duplicate slashes in the middle of the path":
+            request = fudge.Fake('request').has_attr(META={'PATH_INFO' : '/blah//things///stuff/'})
+            Menu(request, None).path |should| equal_to(['blah', 'things', 'stuff'])
+
+        it "is the base path when there is nothing but slashes":
+            for path in ('', '/', '///'):
+                request = fudge.Fake('request').has_attr(META={'PATH_INFO' : path})
+                Menu(request, None).path |should| equal_to([''])
+
+    describe "Getting children of an info":
         before_each:
             self.parent = fudge.Fake("parent")
             self.fake_navs_for = fudge.Fake("navs_for")
@@ -137,12 +147,19 @@ describe TestCase, "Menu":
                 }
             )(self.request, self.section)
 
+            self.section.has_attr(menu_children=self.menu_children, options=fudge.Fake("options"))
+            self.info = Info('url', 'alias', self.section, self.parent)
+
         @fudge.test
-        it "calls navs_for for the menu_children on specified section":
+        it "calls navs_for on the menu of the info for the menu_children of it's section":
             navs = fudge.Fake("navs")
-            self.section.menu_children = self.menu_children
-            self.fake_navs_for.expects_call().with_args(self.menu_children, parent=self.parent).returns(navs)
-            self.menu.children_function_for(self.section, self.parent)() |should| be(navs)
+            self.info.menu = self.menu
+            self.fake_navs_for.expects_call().with_args(self.menu_children, parent=self.info).returns(navs)
+            self.info.children() |should| be(navs)
+
+        @fudge.test
+        it "has no children if it has no menu":
+            self.info.children() |should| equal_to([])
 
     describe "Getting navs for a list of sections":
         before_each:
@@ -153,11 +170,8 @@ describe TestCase, "Menu":
             self.info2 = fudge.Fake("info2")
             self.info3 = fudge.Fake("info3")
 
-            self.has_children1 = fudge.Fake("has_children1")
-            self.has_children2 = fudge.Fake("has_children2")
-
-            self.section1 = fudge.Fake("section1").has_attr(has_children=self.has_children1)
-            self.section2 = fudge.Fake("section2").has_attr(has_children=self.has_children2)
+            self.section1 = fudge.Fake("section1")
+            self.section2 = fudge.Fake("section2")
             self.include_as1 = fudge.Fake("include_as1")
             self.include_as2 = fudge.Fake("include_as2")
 
@@ -165,36 +179,23 @@ describe TestCase, "Menu":
             self.item2 = fudge.Fake("item2").has_attr(section=self.section2, include_as=self.include_as2)
             self.items = [self.item1, self.item2]
 
-            self.child_function1 = fudge.Fake("child_function1")
-            self.child_function2 = fudge.Fake("child_function2")
-            self.child_function3 = fudge.Fake("child_function3")
-            self.fake_children_function_for = fudge.Fake("children_function_for")
-
             self.menu = type("Menu", (Menu, )
                 , { 'path' : self.path
-                  , 'children_function_for' : self.fake_children_function_for
                   }
                 )(self.request, self.section)
 
         @fudge.test
-        it "gets info using section master for each child using path and sets up children":
+        it "gets info using section master for each child using path and gives them the menu":
             master = (fudge.Fake("master").expects("get_info")
                 .with_args(self.section1, self.include_as1, self.path, parent=self.parent).returns([self.info1])
                 .next_call().with_args(self.section2, self.include_as2, self.path, parent=self.parent).returns([self.info2, self.info3])
                 )
 
-            # The children function allows us to inject into the infos logic from the menu
-            # item2 has two infos so it gets called twice
-            (self.fake_children_function_for.expects_call()
-                .with_args(self.section1, self.info1).returns(self.child_function1)
-                .next_call().with_args(self.section2, self.info2).returns(self.child_function2)
-                .next_call().with_args(self.section2, self.info3).returns(self.child_function3)
-                )
-
-            # setup_children is how we inject menu logic
-            self.info1.expects("setup_children").with_args(self.child_function1, self.has_children1)
-            self.info2.expects("setup_children").with_args(self.child_function2, self.has_children2)
-            self.info3.expects("setup_children").with_args(self.child_function3, self.has_children2)
+            master.has_attr(conditionals=fudge.Fake("conditionals").expects("prime"))
 
             self.menu.master = master
             list(self.menu.navs_for(self.items, parent=self.parent)) |should| equal_to([self.info1, self.info2, self.info3])
+
+            # The menu is how infos find their children
+            for info in (self.info1, self.info2, self.info3):
+                info.menu |should| be(self.menu)
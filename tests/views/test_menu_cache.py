@@ -0,0 +1,191 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache.backends.locmem import LocMemCache
+
+from cwf.views.menu_cache import MenuCache, MenuKey
+from cwf.sections.section_master import shared_values
+from cwf.views.menu_renderer import MenuRenderer
+from cwf.sections.section import Section
+from cwf.sections.values import Values
+from cwf.views.menu import Menu
+
+# Make the errors go away
+be, equal_to = None, None
+
+class User(object):
+    """User with a set of permissions"""
+    is_active = True
+    is_superuser = False
+    is_authenticated = True
+
+    def __init__(self, perms):
+        self.perms = perms
+
+    def get_all_permissions(self):
+        return set(self.perms)
+
+class Renderer(MenuRenderer):
+    """Renderer that counts how many menus it renders"""
+    rendered = 0
+
+    def render(self, menu):
+        Renderer.rendered += 1
+        return super(Renderer, self).render(menu)
+
+describe TestCase, "MenuCache":
+    before_each:
+        Renderer.rendered = 0
+        self.cache = MenuCache()
+
+        # Local memory caches with the same name share their html
+        self.backend = LocMemCache('menus', {})
+        self.backend.clear()
+
+        self.root, self.one = self.make_tree()
+
+    def make_tree(self):
+        """Make the same tree each time, like each process does, and return (root, one)"""
+        root = Section('').configure(promote_children=True)
+        one = root.add('one')
+        one.add('a')
+        one.add('b').configure(needs_auth='app.b')
+        root.add('two').add('c')
+        return root, one
+
+    def request(self, path, user=None):
+        request = RequestFactory().get(path)
+        request.user = user or AnonymousUser()
+        return request
+
+    def render(self, path, nav='side_nav', user=None, root=None):
+        menu = Menu(self.request(path, user=user), root or self.root, cache=self.cache)
+        return menu.render_nav(nav, Renderer)
+
+    it "renders the same html as the menu without a cache":
+        for path in ('/', '/one/', '/one/a/', '/two/c/'):
+            for nav in ('global_nav', 'side_nav'):
+                menu = Menu(self.request(path), self.root)
+                self.render(path, nav) |should| equal_to(menu.render_nav(nav, Renderer))
+
+    it "only renders once for the same path and visibility":
+        first = self.render('/one/')
+        self.render('/one/') |should| equal_to(first)
+        Renderer.rendered |should| be(1)
+
+        self.render('/one/a/')
+        Renderer.rendered |should| be(2)
+
+    it "gives different html for users that can see different sections":
+        anonymous = self.render('/one/')
+        allowed = self.render('/one/', user=User(['app.b']))
+        allowed |should_not| equal_to(anonymous)
+        ('B' in allowed) |should| be(True)
+        ('B' in anonymous) |should| be(False)
+
+        self.render('/one/', user=User(['app.b', 'app.other'])) |should| equal_to(allowed)
+        Renderer.rendered |should| be(2)
+
+    it "gives different keys when a promoted section or the root needs permissions":
+        key = MenuKey()
+        allowed = User(['app.group', 'app.root'])
+
+        root = Section('').configure(needs_auth='app.root', promote_children=True)
+        group = root.add('group').configure(needs_auth='app.group', promote_children=True)
+        # Children don't need permissions themselves, but are hidden when their parents are
+        group.add('one').configure(needs_auth=False).add('a')
+        root.add('two').configure(needs_auth=False)
+
+        for path in ('/', '/one/'):
+            for nav in ('global_nav', 'side_nav'):
+                keys = set()
+                for user in (allowed, User(['app.root']), User(['app.group']), AnonymousUser()):
+                    menu = Menu(self.request(path, user=user), root)
+                    keys.add(key(menu, nav, Renderer, False))
+                len(keys) |should| be(4)
+
+    it "gives different html when a conditional gives a different answer":
+        shown = [True]
+        self.one.add('c').configure(display=lambda request: shown[0])
+
+        self.render('/one/')
+        shown[0] = False
+        ('C' in self.render('/one/')) |should| be(False)
+        shown[0] = True
+        ('C' in self.render('/one/')) |should| be(True)
+        Renderer.rendered |should| be(2)
+
+    it "doesn't use html from before the tree changed":
+        self.render('/one/')
+        self.one.add('d')
+        ('D' in self.render('/one/')) |should| be(True)
+        Renderer.rendered |should| be(2)
+
+    it "doesn't cache menus with dynamic values":
+        names = ['first']
+        self.one.add('\w+').configure(values=Values(lambda info: list(names)))
+
+        ('first' in self.render('/one/first/')) |should| be(True)
+        names[0] = 'second'
+        ('second' in self.render('/one/first/')) |should| be(True)
+        Renderer.rendered |should| be(2)
+
+    it "caches values that say they aren't dynamic":
+        self.one.add('\w+').configure(values=Values(lambda info: ['first'], dynamic=False))
+        self.render('/one/first/')
+        self.render('/one/first/')
+        Renderer.rendered |should| be(1)
+
+    it "uses a django cache if given one":
+        self.cache = MenuCache(backend=self.backend)
+        html = self.render('/one/')
+
+        self.cache = MenuCache(backend=self.backend)
+        self.render('/one/') |should| equal_to(html)
+        Renderer.rendered |should| be(1)
+
+    it "shares html in a django cache between processes with the same tree":
+        self.cache = MenuCache(backend=self.backend)
+        html = self.render('/one/')
+
+        # Another process has it's own tree and hasn't changed it as many times
+        self.root, _ = self.make_tree()
+        shared_values.invalidate()
+        self.cache = MenuCache(backend=self.backend)
+        self.render('/one/') |should| equal_to(html)
+        Renderer.rendered |should| be(1)
+
+    it "doesn't share html between processes with different trees or versions":
+        self.cache = MenuCache(backend=self.backend, version='1')
+        self.render('/one/', nav='global_nav')
+
+        self.root, one = self.make_tree()
+        one.configure(alias='Uno')
+        self.cache = MenuCache(backend=self.backend, version='1')
+        ('Uno' in self.render('/one/', nav='global_nav')) |should| be(True)
+
+        self.root, _ = self.make_tree()
+        self.cache = MenuCache(backend=self.backend, version='2')
+        self.render('/one/', nav='global_nav')
+        Renderer.rendered |should| be(3)
+
+    it "can be given a different key strategy":
+        self.cache = MenuCache(key=lambda menu, nav, template, ignore_children: nav)
+        first = self.render('/one/')
+        self.render('/two/') |should| equal_to(first)
+
+        self.cache = MenuCache(key=lambda menu, nav, template, ignore_children: None)
+        self.render('/one/')
+        self.render('/one/')
+        Renderer.rendered |should| be(3)
+
+    it "forgets old menus when it has too many":
+        self.cache = MenuCache(max_entries=1)
+        self.render('/one/')
+        self.render('/two/')
+        self.render('/one/')
+        Renderer.rendered |should| be(3)
+        len(self.cache.local) |should| be(1)
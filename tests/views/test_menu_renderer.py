@@ -0,0 +1,148 @@
+# coding: spec
+
+from should_dsl import should
+from django.test import TestCase
+from django.template import loader, Context
+
+from cwf.views.menu_renderer import MenuRenderer
+from cwf.views.rendering import renderer
+from cwf.sections.section import Section
+from cwf.sections.values import Values
+from cwf.views.menu import Menu
+
+import fudge
+
+# Make the errors go away
+be, equal_to = None, None
+
+########################
+###   SECTIONS FOR TESTING
+########################
+
+section = Section('', name="renderertest")
+section.first().configure(alias="Home")
+
+one = section.add('one').configure(target='one')
+one.add('some').configure(alias='b<l>ah', target='some')
+one.add('\w+').configure(
+      match = 'blah'
+    , target = 'blah'
+    , values = Values(
+        lambda info : ['2', '1', '3']
+      , lambda info, value : ('%s_url' % value, 'alias_%s' % value)
+      , sorter = True
+      )
+    )
+
+two = section.add('2').configure(alias='two')
+two.first().configure(alias='meh', target='two')
+two_one = two.add('1').configure(target='two_one')
+two_one.add('2').configure(active=False, target='inactive')
+two_one_three = two_one.add('3').configure(target='three')
+two_one_three.add('4').configure(target='four')
+
+three = section.add('3').configure(display=False, target='three')
+three.add('test1').configure(target='test1')
+
+four = section.add('4').configure(target='four')
+four.first().configure(display=False, propogate_display=False)
+four.add('this').configure(target='this')
+needs = four.add('needs').configure(target='needs')
+needs.add('a').configure(target='a')
+path = needs.add('path').configure(target='path')
+path.add('\w+').configure(values=Values(['things', 'asdf', 'poiu'], as_set=False), target='value').add('meh')
+four.add('more').add('test')
+
+paths = [
+      '/', '/one/', '/oNe/', '/one/some/', '/one/1_url/', '/2/', '/2/1/', '/2/1/3/4/'
+    , '/3/', '/3/test1/', '/4/', '/4/needs/path/asdf/meh/', '/4/more/test/', '/nothing/'
+    ]
+
+########################
+###   TESTS
+########################
+
+describe TestCase, "MenuRenderer":
+    before_each:
+        self.request = fudge.Fake("request")
+        self.request.user = fudge.Fake("user")
+
+    def menu_for(self, path):
+        return type("Menu", (Menu, ), {'path' : path.split('/')})(self.request, section)
+
+    def template_render(self, menu, ignore_children=False):
+        template = loader.get_template('menu/base.html')
+        template = getattr(template, 'template', template)
+        extra = dict(menu=menu, children_template='menu/base.html', ignore_children=ignore_children)
+        return template.render(Context(extra))
+
+    it "renders exactly the same html as menu/base.html for the global nav":
+        for path in paths:
+            expected = self.template_render(self.menu_for(path).global_nav(), ignore_children=True)
+            MenuRenderer(ignore_children=True).render(self.menu_for(path).global_nav()) |should| equal_to(expected)
+
+    it "renders exactly the same html as menu/base.html for the side nav":
+        for path in paths:
+            expected = self.template_render(self.menu_for(path).side_nav())
+            MenuRenderer().render(self.menu_for(path).side_nav()) |should| equal_to(expected)
+
+    it "is used by Menu.render for menu/base.html":
+        MenuRenderer.renders('menu/base.html') |should| be(True)
+        MenuRenderer.renders('rendering/simple.html') |should| be(False)
+
+        menu = self.menu_for('/4/needs/path/asdf/meh/')
+        menu.render(menu.side_nav(), 'menu/base.html') |should| equal_to(self.template_render(menu.side_nav()))
+
+    it "only looks at where menu/base.html came from again when the template changes":
+        MenuRenderer.renders('menu/base.html') |should| be(True)
+
+        loaded = []
+        get_template = loader.get_template
+        def counting_get_template(*args, **kwargs):
+            loaded.append(args)
+            return get_template(*args, **kwargs)
+
+        checked = []
+        original_is_ours = MenuRenderer.__dict__['is_ours']
+        is_ours = MenuRenderer.is_ours
+        def counting_is_ours(found):
+            checked.append(found)
+            return is_ours(found)
+
+        loader.get_template = counting_get_template
+        MenuRenderer.is_ours = staticmethod(counting_is_ours)
+        try:
+            MenuRenderer.renders('menu/base.html') |should| be(True)
+            MenuRenderer.renders('menu/base.html') |should| be(True)
+            (len(loaded), len(checked)) |should| equal_to((0, 0))
+
+            # What the template cache does when the file changes
+            renderer.templates.clear()
+            MenuRenderer.renders('menu/base.html') |should| be(True)
+            MenuRenderer.renders('menu/base.html') |should| be(True)
+            (len(loaded), len(checked)) |should| equal_to((1, 1))
+        finally:
+            loader.get_template = get_template
+            MenuRenderer.is_ours = original_is_ours
+
+    it "has hooks in place of the blocks in the template":
+        class Renderer(MenuRenderer):
+            def selected_item_attrs(self, info):
+                return 'class="current"'
+
+            def unselected_item_attrs(self, info):
+                return 'class="other"'
+
+            def item_link(self, info):
+                return '<span>%s</span>' % info.alias
+
+            def item_children(self, info, selected, buf):
+                return False
+
+        menu = self.menu_for('/2/1/')
+        Renderer().render(menu.side_nav()) |should| equal_to(
+            '\n\n<ul>\n\n\n    <li class="other"><span>meh</span></li>\n    <li class="current"><span>1</span></li>\n</ul>\n'
+            )
+
+        menu = self.menu_for('/2/1/')
+        menu.render(menu.side_nav(), Renderer) |should| equal_to(Renderer().render(menu.side_nav()))
@@ -0,0 +1,97 @@
+# coding: spec
+
+from should_dsl import should
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase
+
+from cwf.views.serializers import Serializers, JsonSerializer, serializers
+from cwf.views.rendering import Renderer
+
+import json
+
+# Make the errors go away
+be, equal_to = None, None
+
+class Missing(JsonSerializer):
+    module = 'cwf_module_that_does_not_exist'
+
+    def dumps(self, data):
+        raise AssertionError("Shouldn't be used")
+
+class Upper(JsonSerializer):
+    def dumps(self, data):
+        return json.dumps(data).upper().encode('utf-8')
+
+describe TestCase, "Serializers":
+    before_each:
+        self.serializers = Serializers(preferred=['missing', 'json'])
+        self.serializers.register('json', JsonSerializer)
+        self.serializers.register('missing', Missing)
+
+    it "uses the first preferred serializer that is available":
+        self.serializers.get().__class__ |should| be(JsonSerializer)
+        self.serializers.get() |should| be(self.serializers.get('json'))
+
+        self.serializers.register('missing', Upper)
+        self.serializers.get().__class__ |should| be(Upper)
+
+    it "uses the json module unless told to prefer something else":
+        serializers.get().__class__ |should| be(JsonSerializer)
+        Serializers().preferred |should| equal_to(['json'])
+
+        self.serializers.get().__class__ |should| be(JsonSerializer)
+        self.serializers.register('upper', Upper)
+        self.serializers.prefer('upper', 'json')
+        self.serializers.get().__class__ |should| be(Upper)
+
+    it "complains about serializers that can't be used":
+        with self.assertRaises(ImportError):
+            self.serializers.get('missing')
+
+        with self.assertRaises(KeyError):
+            self.serializers.get('other')
+
+    it "gives back serializer objects as is":
+        upper = Upper()
+        self.serializers.get(upper) |should| be(upper)
+
+describe TestCase, "Serializer chunks":
+    it "gives back lists a few items at a time":
+        serializer = JsonSerializer()
+        serializer.per_chunk = 2
+        data = [1, {"a": [2, 3]}, "four", None, 5.5]
+
+        chunks = list(serializer.chunks(data))
+        chunks |should| equal_to(['[', '1, {"a": [2, 3]}', ', "four", null', ', 5.5', ']'])
+        json.loads(''.join(chunks)) |should| equal_to(data)
+
+    it "works with generators, empty lists and bytes":
+        def generate():
+            for i in range(3):
+                yield {'i': i}
+
+        json.loads(''.join(Upper().chunks(generate()))) |should| equal_to([{'I': 0}, {'I': 1}, {'I': 2}])
+        ''.join(JsonSerializer().chunks([])) |should| equal_to('[]')
+        list(JsonSerializer().chunks({'a': 1})) |should| equal_to(['{"a": 1}'])
+
+describe TestCase, "Renderer json":
+    it "uses the serializer it is given":
+        response = Renderer().json({'a': 'b'}, serializer=Upper())
+        response.__class__ |should| be(HttpResponse)
+        response.content |should| equal_to(b'{"A": "B"}')
+        response['Content-Type'] |should| equal_to('application/javascript')
+
+    it "streams the json":
+        data = [{'a': i} for i in range(250)]
+        response = Renderer().json(data, serializer='json', stream=True)
+        response.__class__ |should| be(StreamingHttpResponse)
+        json.loads(b''.join(response.streaming_content).decode('utf-8')) |should| equal_to(data)
+
+    it "gives back the same json whether it is streamed or not":
+        data = [{'a': i, 'b': [i, 'two']} for i in range(250)] + [[], 1.5, None]
+        for name in ('json', 'ujson', 'orjson'):
+            if not serializers.available(name):
+                continue
+
+            streamed = Renderer().json(data, serializer=name, stream=True)
+            b''.join(streamed.streaming_content) |should| equal_to(Renderer().json(data, serializer=name).content)
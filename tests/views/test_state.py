@@ -0,0 +1,126 @@
+# coding: spec
+
+from should_dsl import should, should_not
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.template import Context
+
+from cwf.views.base import State, DictObj, View
+from cwf.sections.section import Section
+
+# Make the errors go away
+be, equal_to = None, None
+
+describe TestCase, "State":
+    it "starts with the fields for a request":
+        state = State()
+        state.keys() |should| equal_to(['menu', 'path', 'target', 'section', 'base_url'])
+        state.values() |should| equal_to([None, None, None, None, None])
+        len(state) |should| be(5)
+
+    it "only has a dictionary for extra values":
+        state = State(menu=1, path=['a'], target='t', section=2, base_url='')
+        hasattr(state, '__dict__') |should| be(False)
+        state.extra |should| equal_to({})
+
+    it "behaves like an object":
+        state = State(menu=1, things=2)
+        state.menu |should| be(1)
+        state.things |should| be(2)
+
+        state.path = ['a']
+        state.other = 3
+        state.path |should| equal_to(['a'])
+        state.other |should| be(3)
+        state.extra |should| equal_to({'things':2, 'other':3})
+
+        del state.other
+        with self.assertRaises(AttributeError):
+            state.other
+
+        with self.assertRaises(AttributeError):
+            del state.menu
+
+    it "behaves like a dictionary":
+        state = State(menu=1)
+        state['menu'] |should| be(1)
+
+        state['target'] = 't'
+        state['a'] = 3
+        state.target |should| equal_to('t')
+        state.a |should| be(3)
+
+        ('a' in state) |should| be(True)
+        ('menu' in state) |should| be(True)
+        ('b' in state) |should| be(False)
+
+        with self.assertRaises(KeyError):
+            state['b']
+
+        state.get('b') |should| be(None)
+        state.get('b', 5) |should| be(5)
+        state.get('a') |should| be(3)
+
+        state.update({'path':['p']}, c=4)
+        state.path |should| equal_to(['p'])
+        list(state)[-2:] |should| equal_to(['a', 'c'])
+        dict(state.items())['c'] |should| be(4)
+
+    it "is used as a template context without being copied":
+        state = State(menu=1)
+        context = Context(state)
+        context['menu'] |should| be(1)
+
+        state.things = 2
+        context['things'] |should| be(2)
+        context.flatten()['things'] |should| be(2)
+
+    it "makes the menu the first time it is used":
+        made = []
+        def make_menu():
+            made.append(1)
+            return 'menu'
+
+        state = State(make_menu=make_menu)
+        made |should| equal_to([])
+
+        state.menu |should| equal_to('menu')
+        state['menu'] |should| equal_to('menu')
+        Context(state)['menu'] |should| equal_to('menu')
+        made |should| equal_to([1])
+
+    it "doesn't make the menu to show the state":
+        state = State(make_menu=lambda : self.fail("Shouldn't make the menu"), path=['one'])
+        repr(state) |should| equal_to("<State menu=<lazy>, path=['one'], target=None, section=None, base_url=None>")
+        ('menu' in state) |should| be(True)
+        list(state) |should| equal_to(['menu', 'path', 'target', 'section', 'base_url'])
+
+        state = State(make_menu=lambda : 'menu')
+        dict(state.items())['menu'] |should| equal_to('menu')
+        repr(state) |should| equal_to("<State menu='menu', path=None, target=None, section=None, base_url=None>")
+
+    it "doesn't make the menu if it is set first":
+        state = State(make_menu=lambda : self.fail("Shouldn't make the menu"))
+        state.menu = 'other'
+        state.menu |should| equal_to('other')
+
+describe TestCase, "State from a View":
+    it "only splits the path once and shares it with the menu":
+        section = Section('one')
+        request = RequestFactory().get('/oNe/Two/')
+        request.section = section
+
+        state = View().get_state(request, 'target')
+        state.path |should| equal_to(['', 'one', 'two', ''])
+        state.make_menu |should_not| be(None)
+
+        parts = request.cwf_path_parts[1]
+        state.menu.path |should| be(parts)
+        parts |should| equal_to(['oNe', 'Two'])
+        state.menu.section |should| be(section)
+
+describe TestCase, "DictObj init":
+    it "is made with the values it is given":
+        d = DictObj({'a':1}, b=2)
+        sorted(d.items()) |should| equal_to([('a', 1), ('b', 2)])
+        d.a |should| be(1)
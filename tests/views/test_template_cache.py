@@ -0,0 +1,98 @@
+# coding: spec
+
+from should_dsl import should
+from django.template import Engine, Context
+from django.test import TestCase
+
+from cwf.views.rendering import TemplateCache, Renderer
+from cwf.sections.errors import ConfigurationError
+from cwf.sections.section import Section
+from cwf.views.base import View
+
+import tempfile
+import shutil
+import os
+
+# Make the errors go away
+be, equal_to = None, None
+
+class TemplatesView(View):
+    templates = ('one.html', 'two.html')
+
+    def one(self, request):
+        return 'one.html', {}
+
+describe TestCase, "TemplateCache":
+    before_each:
+        self.folder = tempfile.mkdtemp()
+        self.engine = Engine(dirs=[self.folder])
+        self.loaded = []
+
+        def get_template(name):
+            self.loaded.append(name)
+            return self.engine.get_template(name)
+        self.get_template = get_template
+
+        self.write('one.html', 'one {{ thing }}')
+        self.write('two.html', 'two')
+
+    after_each:
+        shutil.rmtree(self.folder)
+
+    def write(self, name, content, mtime=None):
+        location = os.path.join(self.folder, name)
+        with open(location, 'w') as fle:
+            fle.write(content)
+        if mtime is not None:
+            os.utime(location, (mtime, mtime))
+
+    it "only loads a template once":
+        cache = TemplateCache(check_mtime=False, get_template=self.get_template)
+        template = cache.get('one.html')
+        template.render(Context({'thing': 1})) |should| equal_to('one 1')
+        cache.get('one.html') |should| be(template)
+        self.loaded |should| equal_to(['one.html'])
+
+        cache.get(template) |should| be(template)
+
+    it "loads a template again when it's file changes if checking mtimes":
+        self.write('one.html', 'one', mtime=1000)
+        def reset():
+            for loader in self.engine.template_loaders:
+                loader.reset()
+
+        cache = TemplateCache(check_mtime=True, get_template=self.get_template, reset=reset)
+        cache.get('one.html').render(Context()) |should| equal_to('one')
+        cache.get('one.html')
+        self.loaded |should| equal_to(['one.html'])
+
+        self.write('one.html', 'changed', mtime=2000)
+        cache.get('one.html').render(Context()) |should| equal_to('changed')
+        self.loaded |should| equal_to(['one.html', 'one.html'])
+
+    it "doesn't look at mtimes if not checking":
+        self.write('one.html', 'one', mtime=1000)
+        cache = TemplateCache(check_mtime=False, get_template=self.get_template)
+        cache.get('one.html')
+
+        self.write('one.html', 'changed', mtime=2000)
+        cache.get('one.html').render(Context()) |should| equal_to('one')
+
+    it "precompiles templates for the views used by sections":
+        root = Section('').configure(kls=TemplatesView(), promote_children=True)
+        root.add('one').configure(target='one')
+
+        renderer = Renderer(TemplateCache(check_mtime=False, get_template=self.get_template))
+        renderer.precompile(root, names=['two.html']) |should| equal_to({})
+        sorted(self.loaded) |should| equal_to(['one.html', 'two.html'])
+
+        renderer.simple_render('one.html', {'thing': 2}) |should| equal_to('one 2')
+        self.loaded |should| equal_to(['two.html', 'one.html'])
+
+    it "complains about templates it can't load":
+        cache = TemplateCache(check_mtime=False, get_template=self.get_template)
+        with self.assertRaises(ConfigurationError):
+            cache.precompile(names=['one.html', 'missing.html'])
+
+        failures = cache.precompile(names=['missing.html'], complain=False)
+        list(failures.keys()) |should| equal_to(['missing.html'])